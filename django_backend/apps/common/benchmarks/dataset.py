@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+from apps.common import synthetic
+from apps.common.models import Team
+from apps.tasks.models import Tag, Task, TaskAssignment
+
+User = get_user_model()
+
+# Fixed-scale datasets: budgets recorded for one scale only hold for that scale.
+SCALES = {
+    "small": {"users": 50, "tasks": 2000, "comments_per_task": 2, "history_per_task": 3},
+    "medium": {"users": 1000, "tasks": 50000, "comments_per_task": 3, "history_per_task": 5},
+}
+
+BENCHMARK_USERNAME = "bench"
+BENCHMARK_PASSWORD = "bench-password"
+
+
+def build_dataset(scale, seed):
+    """
+    Fill the (empty, test) database with the synthetic dataset of `scale`.
+
+    The benchmark user is the first user, so it creates and is assigned a
+    large share of the tasks, like the heaviest users of a real deployment.
+    Returns {"user": benchmark user, "user_ids": [...], "task_ids": [active task ids]}.
+    """
+    options = SCALES[scale]
+    for name in ("Development", "Operations"):
+        Team.objects.get_or_create(name=name)
+    for name in synthetic.TAG_NAMES:
+        Tag.objects.get_or_create(name=name)
+
+    user = User.objects.create_user(BENCHMARK_USERNAME, email="bench@example.com", password=BENCHMARK_PASSWORD)
+    synthetic.init_worker({
+        "seed": seed,
+        "now": timezone.now(),
+        "password": make_password("password"),
+        "team_ids": list(Team.objects.values_list("id", flat=True)),
+        "tag_ids": list(Tag.objects.values_list("id", flat=True)),
+        "comments_per_task": options["comments_per_task"],
+        "history_per_task": options["history_per_task"],
+    })
+
+    first_user = synthetic.reserve_ids("users_user", options["users"])
+    for batch in synthetic.batches(first_user, options["users"], 10000):
+        synthetic.write_users(*batch)
+    user_ids = [user.pk, *range(first_user, first_user + options["users"])]
+    synthetic.context["user_ids"] = user_ids
+
+    first_task = synthetic.reserve_ids("tasks_task", options["tasks"])
+    for batch in synthetic.batches(first_task, options["tasks"], 10000):
+        synthetic.write_tasks(*batch)
+    # scenarios work on tasks the API lists (archived ones are hidden)
+    task_ids = list(Task.objects.active().order_by("id").values_list("id", flat=True))
+
+    # the benchmark user sees a full page of assigned tasks
+    TaskAssignment.objects.bulk_create(
+        [TaskAssignment(task_id=task_id, user=user) for task_id in task_ids[:20]],
+        ignore_conflicts=True,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return {"user": user, "user_ids": user_ids, "task_ids": task_ids}
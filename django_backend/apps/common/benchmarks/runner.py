@@ -0,0 +1,134 @@
+import json
+import statistics
+import time
+from pathlib import Path
+from unittest import mock
+from celery import group
+from celery.app.task import Task as CeleryTask
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from apps.common.redis import get_redis
+from .dataset import build_dataset
+from .scenarios import SCENARIOS, BenchmarkContext
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# what the benchmark measures is the uncached path, with mail kept in memory
+BENCHMARK_SETTINGS = {
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+    "EMAIL_BACKEND": "django.core.mail.backends.locmem.EmailBackend",
+}
+
+
+class RowCounter:
+    """execute_wrapper adding up the rows each statement returned or changed (cursor.rowcount)."""
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.rows += max(context["cursor"].rowcount, 0)
+        return result
+
+
+def measure(action):
+    """Run `action` once; returns (response, milliseconds, queries, rows)."""
+    counter = RowCounter()
+    with CaptureQueriesContext(connection) as queries, connection.execute_wrapper(counter):
+        start = time.perf_counter()
+        response = action()
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)
+        elapsed = (time.perf_counter() - start) * 1000
+    return response, elapsed, len(queries), counter.rows
+
+
+def run_scenarios(data, names, repeat):
+    """
+    Run every scenario `repeat` times (after one warm-up run).
+
+    Celery jobs queued by the code under test are recorded instead of sent, so
+    measurements don't depend on a broker; jobs are benchmarked on their own.
+    Returns {name: {"ms": median, "queries": max, "rows": max}}.
+    """
+    ctx = BenchmarkContext(data)
+    results = {}
+    with mock.patch.object(CeleryTask, "apply_async"), mock.patch.object(group, "apply_async"):
+        for name in names:
+            ctx.authenticate()
+            timings, queries, rows = [], [], []
+            for run in range(repeat + 1):
+                response, elapsed, query_count, row_count = measure(SCENARIOS[name](ctx))
+                status_code = getattr(response, "status_code", 200)
+                if status_code >= 400:
+                    raise RuntimeError(f"{name} answered {status_code}: {getattr(response, 'data', '')}")
+                if run:
+                    timings.append(elapsed)
+                    queries.append(query_count)
+                    rows.append(row_count)
+            results[name] = {"ms": round(statistics.median(timings), 2), "queries": max(queries), "rows": max(rows)}
+    return results
+
+
+def run_benchmark(scale, seed, names, repeat):
+    """
+    Build the `scale` dataset in the current (empty, test) database and run the
+    scenarios `names` on it, with Redis on BENCHMARK_REDIS_URL (flushed first),
+    the cache disabled and mail kept in memory. Returns run_scenarios() results.
+    """
+    with override_settings(REDIS_URL=settings.BENCHMARK_REDIS_URL, **BENCHMARK_SETTINGS):
+        get_redis.cache_clear()
+        try:
+            get_redis().flushdb()
+            data = build_dataset(scale, seed)
+            return run_scenarios(data, names, repeat)
+        finally:
+            get_redis.cache_clear()
+
+
+def compare(results, baseline, rows_tolerance, time_tolerance):
+    """
+    Compare results with the baseline of the same scale.
+
+    More queries than the baseline is always a regression (an N+1 shows up here
+    first); rows and time regress past their tolerance (0.2 = 20% more).
+    Returns a list of (name, metric, baseline value, value, is_regression).
+    """
+    report = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        checks = [
+            ("queries", expected["queries"], result["queries"] > expected["queries"]),
+            ("rows", expected["rows"], result["rows"] > expected["rows"] * (1 + rows_tolerance)),
+            ("ms", expected["ms"], result["ms"] > expected["ms"] * (1 + time_tolerance)),
+        ]
+        for metric, expected_value, regressed in checks:
+            report.append((name, metric, expected_value, result[metric], regressed))
+    return report
+
+
+def regressions(report, include_time=False):
+    """Failed budgets of a compare() report, as "name: metric value > baseline" lines."""
+    return [
+        f"{name}: {metric} {value:g} > {expected:g}"
+        for name, metric, expected, value, is_regression in report
+        if is_regression and (metric != "ms" or include_time)
+    ]
+
+
+def load_baseline(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, baseline):
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write("\n")
@@ -0,0 +1,422 @@
+import itertools
+from datetime import timedelta
+import re
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.common.redis import get_redis
+from apps.tasks import tasks as jobs
+from apps.tasks.models import Task, TaskAssignment, TaskDependency
+from apps.tasks.notifications import queue_task_events
+from .dataset import BENCHMARK_PASSWORD, BENCHMARK_USERNAME
+
+# name -> scenario. A scenario does its setup (not measured) and returns the
+# action to measure: a callable returning the response, if any.
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+class BenchmarkContext:
+    """
+    What scenarios work with: the dataset ids and an API client authenticated
+    with a real JWT (so authentication is part of every measurement).
+    """
+    def __init__(self, data):
+        self.user = data["user"]
+        self.user_ids = data["user_ids"]
+        self.task_ids = data["task_ids"]
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.counter = itertools.count()
+
+    def authenticate(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def new_tasks(self, count, **fields):
+        """Create throwaway tasks for scenarios that consume them (delete, archive...)."""
+        defaults = {
+            "description": "Benchmark task",
+            "due_date": timezone.now() + timedelta(days=7),
+            "estimated_hours": 1,
+            "created_by": self.user,
+        }
+        tasks = Task.objects.bulk_create([
+            Task(title=f"Benchmark task {next(self.counter)}", **{**defaults, **fields}) for _ in range(count)
+        ])
+        return [task.pk for task in tasks]
+
+    def task_payload(self):
+        return {
+            "title": f"Benchmark task {next(self.counter)}",
+            "description": "Created by the benchmark",
+            "status": "todo",
+            "priority": "high",
+            "due_date": (timezone.now() + timedelta(days=7)).isoformat(),
+            "estimated_hours": "3.5",
+        }
+
+
+# --- Tasks API ---
+
+@scenario("tasks.list")
+def tasks_list(ctx):
+    return lambda: ctx.client.get("/api/tasks/?page_size=8")
+
+
+@scenario("tasks.list.fields")
+def tasks_list_fields(ctx):
+    return lambda: ctx.client.get("/api/tasks/?page_size=8&fields=id,title,status,assigned_to")
+
+
+@scenario("tasks.list.expand")
+def tasks_list_expand(ctx):
+    return lambda: ctx.client.get("/api/tasks/?page_size=8&expand=comments,history")
+
+
+@scenario("tasks.list.search")
+def tasks_list_search(ctx):
+    return lambda: ctx.client.get("/api/tasks/?page_size=8&search=login")
+
+
+@scenario("tasks.list.estimated_count")
+def tasks_list_estimated_count(ctx):
+    return lambda: ctx.client.get("/api/tasks/?page_size=8&count=estimated")
+
+
+@scenario("tasks.list.stateless")
+def tasks_list_stateless(ctx):
+    # the user is built from the token claims: no users_user query
+    def action():
+        with override_settings(JWT_STATELESS_READS=True):
+            return ctx.client.get("/api/tasks/?page_size=8")
+    return action
+
+
+@scenario("tasks.list.cursor")
+def tasks_list_cursor(ctx):
+    first = ctx.client.get("/api/tasks/?page_size=8&pagination=cursor").json()
+    return lambda: ctx.client.get(first["next"])
+
+
+@scenario("tasks.retrieve")
+def tasks_retrieve(ctx):
+    return lambda: ctx.client.get(f"/api/tasks/{ctx.task_ids[0]}/")
+
+
+@scenario("tasks.retrieve.not_modified")
+def tasks_retrieve_not_modified(ctx):
+    etag = ctx.client.get(f"/api/tasks/{ctx.task_ids[0]}/")["ETag"]
+    return lambda: ctx.client.get(f"/api/tasks/{ctx.task_ids[0]}/", HTTP_IF_NONE_MATCH=etag)
+
+
+@scenario("tasks.create")
+def tasks_create(ctx):
+    payload = ctx.task_payload()
+    return lambda: ctx.client.post("/api/tasks/", payload, format="json")
+
+
+@scenario("tasks.update")
+def tasks_update(ctx):
+    # a fresh task per run, so every run serializes the same amount of history
+    task_id, = ctx.new_tasks(1)
+    payload = ctx.task_payload()
+    return lambda: ctx.client.put(f"/api/tasks/{task_id}/", payload, format="json")
+
+
+@scenario("tasks.partial_update")
+def tasks_partial_update(ctx):
+    task_id, = ctx.new_tasks(1)
+    payload = {"title": f"Renamed {next(ctx.counter)}"}
+    return lambda: ctx.client.patch(f"/api/tasks/{task_id}/", payload, format="json")
+
+
+@scenario("tasks.destroy")
+def tasks_destroy(ctx):
+    task_id, = ctx.new_tasks(1)
+    return lambda: ctx.client.delete(f"/api/tasks/{task_id}/")
+
+
+@scenario("tasks.assign")
+def tasks_assign(ctx):
+    task_id = ctx.task_ids[2]
+    user_ids = ctx.user_ids[1:4]
+    TaskAssignment.objects.filter(task_id=task_id, user_id__in=user_ids).delete()
+    return lambda: ctx.client.post(f"/api/tasks/{task_id}/assign/", {"assigned_to": user_ids}, format="json")
+
+
+@scenario("tasks.comments.list")
+def tasks_comments_list(ctx):
+    return lambda: ctx.client.get(f"/api/tasks/{ctx.task_ids[0]}/comments/")
+
+
+@scenario("tasks.comments.create")
+def tasks_comments_create(ctx):
+    task_id, = ctx.new_tasks(1)
+    return lambda: ctx.client.post(f"/api/tasks/{task_id}/comments/", {"description": "Benchmark comment"}, format="json")
+
+
+@scenario("tasks.history")
+def tasks_history(ctx):
+    return lambda: ctx.client.get(f"/api/tasks/{ctx.task_ids[0]}/history/")
+
+
+@scenario("tasks.export")
+def tasks_export(ctx):
+    return lambda: ctx.client.get("/api/tasks/export/?status=in_progress")
+
+
+@scenario("tasks.tree")
+def tasks_tree(ctx):
+    root = Task.objects.filter(parent_task__isnull=True, subtasks__isnull=False).order_by("id").first()
+    return lambda: ctx.client.get(f"/api/tasks/{root.pk}/tree/")
+
+
+def dependency_chain(ctx):
+    """A chain of 50 tasks, each also depending on the one two steps back; returns their ids."""
+    chain = ctx.task_ids[700:750]
+    TaskDependency.objects.bulk_create(
+        [TaskDependency(task_id=task_id, depends_on_id=chain[i - 1]) for i, task_id in enumerate(chain) if i]
+        + [TaskDependency(task_id=task_id, depends_on_id=chain[i - 2]) for i, task_id in enumerate(chain) if i > 1],
+        ignore_conflicts=True,
+    )
+    return chain
+
+
+@scenario("tasks.dependencies.list")
+def tasks_dependencies_list(ctx):
+    chain = dependency_chain(ctx)
+    return lambda: ctx.client.get(f"/api/tasks/{chain[25]}/dependencies/")
+
+
+@scenario("tasks.dependencies.add")
+def tasks_dependencies_add(ctx):
+    task_id, = ctx.new_tasks(1)
+    payload = {"depends_on": ctx.task_ids[600:610]}
+    return lambda: ctx.client.post(f"/api/tasks/{task_id}/dependencies/", payload, format="json")
+
+
+@scenario("tasks.dependencies.remove")
+def tasks_dependencies_remove(ctx):
+    task_id, = ctx.new_tasks(1)
+    depends_on = ctx.task_ids[600:610]
+    TaskDependency.objects.bulk_create([TaskDependency(task_id=task_id, depends_on_id=pk) for pk in depends_on])
+    return lambda: ctx.client.delete(f"/api/tasks/{task_id}/dependencies/", {"depends_on": depends_on}, format="json")
+
+
+@scenario("tasks.dependencies.order")
+def tasks_dependencies_order(ctx):
+    chain = dependency_chain(ctx)
+    return lambda: ctx.client.get(f"/api/tasks/dependencies/order/?task={chain[-1]}")
+
+
+@scenario("tasks.dependencies.critical_path")
+def tasks_dependencies_critical_path(ctx):
+    chain = dependency_chain(ctx)
+    return lambda: ctx.client.get(f"/api/tasks/dependencies/critical-path/?task={chain[-1]}")
+
+
+@scenario("tasks.dependencies.unblocked")
+def tasks_dependencies_unblocked(ctx):
+    # fresh open tasks each waiting on two done ones
+    done = ctx.new_tasks(2, status="done")
+    TaskDependency.objects.bulk_create(
+        [TaskDependency(task_id=task_id, depends_on_id=pk) for task_id in ctx.new_tasks(10) for pk in done]
+    )
+    return lambda: ctx.client.get("/api/tasks/dependencies/unblocked/")
+
+
+@scenario("tasks.stats")
+def tasks_stats(ctx):
+    return lambda: ctx.client.get("/api/tasks/stats/")
+
+
+@scenario("tasks.bulk.create")
+def tasks_bulk_create(ctx):
+    items = [ctx.task_payload() for _ in range(100)]
+    return lambda: ctx.client.post("/api/tasks/bulk/", items, format="json")
+
+
+@scenario("tasks.bulk.update")
+def tasks_bulk_update(ctx):
+    n = next(ctx.counter)
+    items = [{"id": task_id, "title": f"Bulk renamed {n}"} for task_id in ctx.task_ids[100:200]]
+    return lambda: ctx.client.patch("/api/tasks/bulk/", items, format="json")
+
+
+@scenario("tasks.bulk.archive")
+def tasks_bulk_archive(ctx):
+    ids = ctx.new_tasks(100)
+    return lambda: ctx.client.post("/api/tasks/bulk/archive/", {"ids": ids}, format="json")
+
+
+@scenario("tasks.bulk.assign")
+def tasks_bulk_assign(ctx):
+    task_ids, user_ids = ctx.task_ids[200:220], ctx.user_ids[1:6]
+    TaskAssignment.objects.filter(task_id__in=task_ids, user_id__in=user_ids).delete()
+    payload = {"task_ids": task_ids, "users": [{"id": user_id, "role": "reviewer"} for user_id in user_ids]}
+    return lambda: ctx.client.post("/api/tasks/bulk/assign/", payload, format="json")
+
+
+@scenario("tasks.bulk.unassign")
+def tasks_bulk_unassign(ctx):
+    task_ids, user_ids = ctx.task_ids[200:220], ctx.user_ids[1:6]
+    TaskAssignment.objects.bulk_create(
+        [TaskAssignment(task_id=task_id, user_id=user_id) for task_id in task_ids for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    payload = {"task_ids": task_ids, "user_ids": user_ids}
+    return lambda: ctx.client.post("/api/tasks/bulk/unassign/", payload, format="json")
+
+
+# --- Template pages ---
+
+def session_client(ctx):
+    client = Client(SERVER_NAME="localhost")
+    client.force_login(ctx.user)
+    return client
+
+
+@scenario("pages.tasks_list")
+def pages_tasks_list(ctx):
+    client = session_client(ctx)
+    return lambda: client.get("/tasks/")
+
+
+@scenario("pages.tasks_list.next")
+def pages_tasks_list_next(ctx):
+    client = session_client(ctx)
+    first = client.get("/tasks/").content.decode()
+    next_url = re.search(r'href="([^"]+)">Next page', first).group(1).replace("&amp;", "&")
+    return lambda: client.get(f"/tasks/{next_url}")
+
+
+@scenario("pages.task_detail")
+def pages_task_detail(ctx):
+    client = session_client(ctx)
+    return lambda: client.get(f"/tasks/{ctx.task_ids[0]}/")
+
+
+# --- Users and auth API ---
+
+@scenario("auth.login")
+def auth_login(ctx):
+    payload = {"username": BENCHMARK_USERNAME, "password": BENCHMARK_PASSWORD}
+    return lambda: ctx.client.post("/api/auth/login/", payload, format="json")
+
+
+@scenario("auth.refresh")
+def auth_refresh(ctx):
+    payload = {"refresh": str(RefreshToken.for_user(ctx.user))}
+    return lambda: ctx.client.post("/api/auth/refresh/", payload, format="json")
+
+
+@scenario("users.list")
+def users_list(ctx):
+    return lambda: ctx.client.get("/api/users/")
+
+
+@scenario("users.retrieve")
+def users_retrieve(ctx):
+    return lambda: ctx.client.get(f"/api/users/{ctx.user_ids[1]}/")
+
+
+@scenario("users.update")
+def users_update(ctx):
+    payload = {"username": BENCHMARK_USERNAME, "email": "bench@example.com", "team": None}
+    return lambda: ctx.client.put(f"/api/users/{ctx.user.pk}/", payload, format="json")
+
+
+@scenario("users.me")
+def users_me(ctx):
+    return lambda: ctx.client.get("/api/users/me/")
+
+
+@scenario("users.notifications.get")
+def users_notifications_get(ctx):
+    return lambda: ctx.client.get("/api/users/me/notifications/")
+
+
+@scenario("users.notifications.put")
+def users_notifications_put(ctx):
+    payload = {"notification_opt_outs": ["updated"]}
+    return lambda: ctx.client.put("/api/users/me/notifications/", payload, format="json")
+
+
+# --- Celery tasks (run in-process; the jobs they queue are recorded, not run) ---
+
+@scenario("celery.send_task_notification")
+def celery_send_task_notification(ctx):
+    return lambda: jobs.send_task_notification(ctx.task_ids[0], "updated")
+
+
+@scenario("celery.send_tasks_notification")
+def celery_send_tasks_notification(ctx):
+    return lambda: jobs.send_tasks_notification(ctx.task_ids[:100], "updated")
+
+
+@scenario("celery.send_assignment_notification")
+def celery_send_assignment_notification(ctx):
+    assignments = [[task_id, ctx.user_ids[1]] for task_id in ctx.task_ids[:100]]
+    return lambda: jobs.send_assignment_notification(assignments)
+
+
+@scenario("celery.send_unassignment_notification")
+def celery_send_unassignment_notification(ctx):
+    removals = [[task_id, ctx.user_ids[1]] for task_id in ctx.task_ids[:100]]
+    return lambda: jobs.send_unassignment_notification(removals)
+
+
+@scenario("celery.flush_notification_digests")
+def celery_flush_notification_digests(ctx):
+    queue_task_events(ctx.task_ids[:200], "updated")
+
+    def flush():
+        with override_settings(NOTIFICATION_DIGEST_WINDOW=0):
+            return jobs.flush_notification_digests()
+    return flush
+
+
+@scenario("celery.generate_daily_summary")
+def celery_generate_daily_summary(ctx):
+    return jobs.generate_daily_summary
+
+
+@scenario("celery.send_daily_summary_batch")
+def celery_send_daily_summary_batch(ctx):
+    summaries = [
+        {"email": f"user{n}@example.com", "created": [["Task", "todo"]] * 5, "assigned": [["Task", "done"]] * 5}
+        for n in range(500)
+    ]
+    return lambda: jobs.send_daily_summary_batch(summaries)
+
+
+@scenario("celery.check_overdue_tasks")
+def celery_check_overdue_tasks(ctx):
+    # a fixed amount of work per run: 200 open tasks past due, no watermark
+    get_redis().delete(jobs.OVERDUE_WATERMARK_KEY)
+    Task.objects.overdue().update(due_date=timezone.now() + timedelta(days=30))
+    Task.objects.filter(pk__in=ctx.task_ids[300:500]).update(
+        status="todo", due_date=timezone.now() - timedelta(days=1)
+    )
+    return jobs.check_overdue_tasks
+
+
+@scenario("celery.reconcile_task_stats")
+def celery_reconcile_task_stats(ctx):
+    return jobs.reconcile_task_stats
+
+
+@scenario("celery.cleanup_archived_tasks")
+def celery_cleanup_archived_tasks(ctx):
+    # a fixed amount of work per run: only these 50 are old enough
+    Task.objects.filter(is_archived=True).update(updated_at=timezone.now())
+    ids = ctx.new_tasks(50, is_archived=True)
+    Task.objects.filter(pk__in=ids).update(updated_at=timezone.now() - timedelta(days=31))
+    return jobs.cleanup_archived_tasks
@@ -0,0 +1,39 @@
+import csv
+import io
+from django.db import connections
+
+
+def copy_rows(cursor, table, columns, rows):
+    """
+    Load `rows` (tuples of values, None for NULL) into `table` with one
+    COPY ... FROM STDIN, much faster than INSERT for large batches.
+
+    `cursor` is a Django cursor; rows are sent as CSV, where an unquoted empty
+    field is NULL.
+    Returns the number of rows copied.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    with cursor.cursor.copy(sql) as copy:
+        copy.write(buffer.getvalue())
+    return count
+
+
+def close_pools():
+    """
+    Close this process's database connections and connection pools (DB_POOL).
+
+    Call it before forking workers: a child inheriting a pool would share its
+    sockets with the parent, without the threads that maintain it. Each child
+    opens its own pool on first use.
+    """
+    connections.close_all()
+    for conn in connections.all():
+        if conn.settings_dict["OPTIONS"].get("pool"):
+            conn.close_pool()
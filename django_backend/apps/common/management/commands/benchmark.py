@@ -0,0 +1,67 @@
+import fnmatch
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+from apps.common.benchmarks.dataset import SCALES
+from apps.common.benchmarks.runner import (
+    BASELINE_PATH, compare, load_baseline, regressions, run_benchmark, save_baseline,
+)
+from apps.common.benchmarks.scenarios import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every task/user endpoint and Celery task on a fixed-scale dataset "
+        "(in a throwaway test database) and compare wall time, SQL queries and rows "
+        "with the stored baseline. Exits with an error on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="small", help="Dataset size")
+        parser.add_argument("--seed", type=int, default=42, help="Dataset random seed")
+        parser.add_argument("--repeat", type=int, default=5, help="Measured runs per scenario")
+        parser.add_argument("--only", nargs="+", default=["*"], help="Scenario name patterns, e.g. 'tasks.list*'")
+        parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline JSON file")
+        parser.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline")
+        parser.add_argument("--rows-tolerance", type=float, default=0.2, help="Allowed extra rows (0.2 = 20%%)")
+        parser.add_argument("--time-tolerance", type=float, default=1.0, help="Allowed extra time (1.0 = 100%%)")
+        parser.add_argument("--fail-on-time", action="store_true", help="Also fail on time regressions")
+
+    def handle(self, *args, **options):
+        names = [name for name in SCENARIOS if any(fnmatch.fnmatch(name, pattern) for pattern in options["only"])]
+        if not names:
+            raise CommandError("No scenario matches --only.")
+
+        self.stdout.write(self.style.WARNING(f"Building the '{options['scale']}' dataset..."))
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = run_benchmark(options["scale"], options["seed"], names, options["repeat"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        baselines = load_baseline(options["baseline"])
+        baseline = baselines.get(options["scale"], {})
+        report = compare(results, baseline, options["rows_tolerance"], options["time_tolerance"])
+        regressed = {(name, metric) for name, metric, _, _, is_regression in report if is_regression}
+
+        self.stdout.write(f"{'scenario':40} {'ms':>10} {'queries':>10} {'rows':>10}")
+        for name, result in results.items():
+            expected = baseline.get(name)
+            cells = []
+            for metric in ("ms", "queries", "rows"):
+                cell = f"{result[metric]:g}" + (f" ({expected[metric]:g})" if expected else "")
+                cells.append(self.style.ERROR(f"{cell:>10}") if (name, metric) in regressed else f"{cell:>10}")
+            self.stdout.write(f"{name:40} " + " ".join(cells) + ("" if expected else "  new"))
+
+        if options["update_baseline"]:
+            baselines[options["scale"]] = {**baseline, **results}
+            save_baseline(options["baseline"], baselines)
+            self.stdout.write(self.style.SUCCESS(f"Baseline updated: {options['baseline']}"))
+            return
+
+        failures = regressions(report, include_time=options["fail_on_time"])
+        slower = [name for name, metric in regressed if metric == "ms"]
+        if slower and not options["fail_on_time"]:
+            self.stdout.write(self.style.WARNING(f"Slower than the baseline: {', '.join(sorted(slower))}"))
+        if failures:
+            raise CommandError("Benchmark regressions:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("✅ Within the baseline budgets"))
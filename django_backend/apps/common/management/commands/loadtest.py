@@ -0,0 +1,90 @@
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.users.services import issue_tokens
+
+# sessions ever opened on the database (PostgreSQL 14+); the counters of live
+# connections are flushed within a few seconds
+SESSIONS_SQL = "SELECT sessions FROM pg_stat_database WHERE datname = current_database()"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a running server with concurrent GET requests on one URL for a fixed time, "
+        "then report requests/s, latency percentiles and the database connections opened meanwhile. "
+        "Run it before and after a change (e.g. DB_POOL=False / True on the server) to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="URL to request, e.g. http://localhost:8000/api/tasks/")
+        parser.add_argument("--concurrency", type=int, default=16, help="Clients sending requests in parallel")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds of load")
+        parser.add_argument("--user", help="Username to send a JWT access token for")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("The URL must be http://host[:port]/path.")
+        headers = {}
+        if options["user"]:
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"No user '{options['user']}'.")
+            headers["Authorization"] = f"Bearer {issue_tokens(user)['access']}"
+        path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+
+        latencies, errors = [], []
+        deadline = time.monotonic() + options["duration"]
+
+        def client():
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    conn.request("GET", path, headers=headers)
+                    response = conn.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException) as error:
+                    errors.append(type(error).__name__)
+                    conn.close()
+                    continue
+                if response.status >= 400:
+                    errors.append(str(response.status))
+                else:
+                    latencies.append(time.perf_counter() - start)
+            conn.close()
+
+        sessions = self.opened_sessions()
+        self.stdout.write(f"GET {options['url']}: {options['concurrency']} clients, {options['duration']:g}s")
+        clients = [threading.Thread(target=client) for _ in range(options["concurrency"])]
+        started = time.monotonic()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.monotonic() - started
+        # let the server's connections report their statistics
+        time.sleep(1)
+        sessions = self.opened_sessions() - sessions
+
+        self.stdout.write(f"requests:     {len(latencies)} ok, {len(errors)} failed")
+        if errors:
+            self.stdout.write(self.style.ERROR(f"errors:       {', '.join(sorted(set(errors)))}"))
+        self.stdout.write(self.style.SUCCESS(f"requests/s:   {len(latencies) / elapsed:.1f}"))
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"latency (ms): p50 {cuts[49] * 1000:.1f}, p95 {cuts[94] * 1000:.1f}, p99 {cuts[98] * 1000:.1f}"
+            )
+        self.stdout.write(f"db connections opened: {sessions}")
+
+    def opened_sessions(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_stat_clear_snapshot()")
+            cursor.execute(SESSIONS_SQL)
+            return cursor.fetchone()[0]
@@ -1,16 +1,39 @@
-from django.core.management.base import BaseCommand
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from apps.common import synthetic
+from apps.common.db import close_pools
 from apps.common.models import Team
 from apps.tasks.models import Task, Tag, Comment, TaskHistory, TaskTemplate, TaskAssignment
+from apps.tasks.cache import invalidate_tasks
 from django.utils import timezone
 from datetime import timedelta
 
 User = get_user_model()
 
 class Command(BaseCommand):
-    help = "Seed database with initial data (teams, users, tags, tasks, etc.)"
+    help = (
+        "Seed database with initial data (teams, users, tags, tasks, etc.). "
+        "With --users / --tasks, generate a synthetic dataset of that size instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=0, help="Synthetic users to create")
+        parser.add_argument("--tasks", type=int, default=0, help="Synthetic tasks to create")
+        parser.add_argument("--comments-per-task", type=int, default=2, help="Average comments per task")
+        parser.add_argument("--history-per-task", type=int, default=3, help="Average history rows per task")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed; same seed, same dataset")
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="Processes writing batches")
+        parser.add_argument("--batch-size", type=int, default=10000, help="Users or tasks per batch (one COPY transaction)")
+
+    def handle(self, *args, **options):
+        if options["users"] or options["tasks"]:
+            return self.seed_synthetic(options)
 
-    def handle(self, *args, **kwargs):
         self.stdout.write(self.style.WARNING("Seeding database..."))
 
         # --- Teams ---
@@ -113,4 +136,66 @@ class Command(BaseCommand):
             },
         )
 
-        self.stdout.write(self.style.SUCCESS("✅ Database seeded successfully!"))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS("✅ Database seeded successfully!"))
+
+    def seed_synthetic(self, options):
+        """
+        Generate `--users` users and `--tasks` tasks (with tags, assignees,
+        comments and history) in batches written with COPY by a process pool.
+        Synthetic users log in with the password "password".
+        """
+        start = time.monotonic()
+        values = {
+            "seed": options["seed"],
+            "now": timezone.now(),
+            "password": make_password("password"),
+            "team_ids": list(Team.objects.values_list("id", flat=True)),
+            "comments_per_task": options["comments_per_task"],
+            "history_per_task": options["history_per_task"],
+        }
+        for name in synthetic.TAG_NAMES:
+            Tag.objects.get_or_create(name=name)
+        values["tag_ids"] = list(Tag.objects.filter(name__in=synthetic.TAG_NAMES).values_list("id", flat=True))
+
+        if options["users"]:
+            first_user = synthetic.reserve_ids("users_user", options["users"])
+            self.run_batches(synthetic.write_users, first_user, options, "users", values)
+            values["user_ids"] = list(range(first_user, first_user + options["users"]))
+        else:
+            values["user_ids"] = list(User.objects.values_list("id", flat=True))
+        if options["tasks"]:
+            if not values["user_ids"]:
+                raise CommandError("Tasks need users: pass --users or seed some first.")
+            first_task = synthetic.reserve_ids("tasks_task", options["tasks"])
+            self.run_batches(synthetic.write_tasks, first_task, options, "tasks", values)
+
+        # fresh statistics, so query plans match the new data volume
+        with connection.cursor() as cursor:
+            for table in ["users_user", "tasks_task", "tasks_task_tags", "tasks_taskassignment",
+                          "tasks_comment", "tasks_taskhistory"]:
+                cursor.execute(f"ANALYZE {table}")
+        invalidate_tasks([])
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Synthetic dataset seeded in {time.monotonic() - start:.1f}s"))
+
+    def run_batches(self, write, first_id, options, kind, values):
+        """Run `write` over every batch of the id range in a pool of processes."""
+        batches = synthetic.batches(first_id, options[kind], options["batch_size"])
+        totals, start = {}, time.monotonic()
+        # children must not share the parent's database connection or pool:
+        # each one opens its own on first use
+        close_pools()
+        pool = ProcessPoolExecutor(
+            max_workers=max(1, options["workers"]),
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=synthetic.init_worker,
+            initargs=(values,),
+        )
+        with pool:
+            for done, future in enumerate(as_completed(pool.submit(write, *batch) for batch in batches), 1):
+                for name, count in future.result().items():
+                    totals[name] = totals.get(name, 0) + count
+                rate = totals[kind] / (time.monotonic() - start)
+                self.stdout.write(f"{kind}: batch {done}/{len(batches)} ({rate:.0f} {kind}/s)")
+        self.stdout.write(", ".join(f"{count} {name}" for name, count in totals.items()))
+
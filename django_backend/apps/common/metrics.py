@@ -0,0 +1,117 @@
+import os
+import time
+from contextvars import ContextVar
+from celery import current_task
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+
+# Per-route request metrics, exposed on /metrics (see apps/common/views.py).
+# `route` is the URL name ("tasks-list", "tasks-detail"...), so label
+# cardinality stays bounded whatever the ids in the URLs.
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Total request time", ["method", "route", "status"],
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL queries per request", ["method", "route"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL queries per request", ["method", "route"],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 200, 500),
+)
+REQUEST_SERIALIZE_DURATION = Histogram(
+    "http_request_serialize_duration_seconds", "Time spent in DRF serializers per request", ["method", "route"],
+)
+
+# Celery task metrics, recorded from Celery signals (see apps/common/signals.py)
+# and served by the worker on CELERY_METRICS_PORT.
+TASK_RUNTIME = Histogram(
+    "celery_task_runtime_seconds", "Task execution time", ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600),
+)
+TASK_QUEUE_LAG = Histogram(
+    "celery_task_queue_lag_seconds", "Time between publication (or ETA) and start", ["task", "queue"],
+    buckets=(0.01, 0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 1800, 3600, 4 * 3600),
+)
+TASK_RETRIES = Counter("celery_task_retries", "Task retries", ["task"])
+TASK_FAILURES = Counter("celery_task_failures", "Tasks that raised", ["task", "exception"])
+TASK_ITEMS = Counter("celery_task_items_processed", "Items (tasks, emails, users...) processed by tasks", ["task"])
+
+# metrics of the request being handled, read by TimedSerializerMixin
+current_request_metrics = ContextVar("current_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Timings collected while handling one request.
+
+    Attributes:
+        queries (list[tuple[float, str]]): (seconds, sql) of every query run.
+        serialize (float): Seconds spent in serializers (outermost calls only).
+        render (float): Seconds spent rendering the response.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = []
+        self.serialize = 0.0
+        self.render = 0.0
+        self.serializer_depth = 0
+
+    @property
+    def db(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def top_queries(self, count):
+        return sorted(self.queries, key=lambda query: query[0], reverse=True)[:count]
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute_wrapper timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - start, sql))
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin adding the time spent in to_representation() to the
+    current request's metrics (Server-Timing `serialize`). Nested and list
+    children calls are counted once, in their outermost serializer.
+    """
+    def to_representation(self, instance):
+        metrics = current_request_metrics.get()
+        if metrics is None:
+            return super().to_representation(instance)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serialize += time.perf_counter() - start
+
+
+def items_processed(count):
+    """Count the items the running Celery task processed (no-op outside a worker)."""
+    if current_task and not current_task.request.called_directly:
+        TASK_ITEMS.labels(current_task.name).inc(count)
+
+
+def metrics_registry():
+    """
+    Registry to expose: the process registry, or, when the app runs in several
+    processes (PROMETHEUS_MULTIPROC_DIR set), the values aggregated from all of them.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics():
+    return generate_latest(metrics_registry())
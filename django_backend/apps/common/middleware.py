@@ -0,0 +1,92 @@
+import logging
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from .metrics import (
+    REQUEST_DB_DURATION, REQUEST_DB_QUERIES, REQUEST_DURATION, REQUEST_SERIALIZE_DURATION,
+    RequestMetrics, current_request_metrics,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def route_name(request):
+    """URL name of the matched route ("tasks-detail"...), never the raw path."""
+    match = getattr(request, "resolver_match", None)
+    return (match.view_name or match.route) if match else "unmatched"
+
+
+def server_timing(metrics, total):
+    """Server-Timing header value (durations in milliseconds)."""
+    return ", ".join([
+        f'db;dur={metrics.db * 1000:.1f};desc="{len(metrics.queries)} queries"',
+        f"serialize;dur={metrics.serialize * 1000:.1f}",
+        f"render;dur={metrics.render * 1000:.1f}",
+        f"total;dur={total * 1000:.1f}",
+    ])
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures every request: SQL query count and time, serializer time (see
+    TimedSerializerMixin), render time and total time.
+
+    The numbers are sent back in a `Server-Timing` header (shown by the
+    browser dev tools) with DEBUG or SERVER_TIMING, observed in the per-route
+    histograms of /metrics and, when the request takes more than
+    SLOW_REQUEST_THRESHOLD_MS, logged with its SLOW_REQUEST_TOP_QUERIES
+    slowest queries. The log has the path, never the query string, which
+    may carry an access token (?token= of /api/events/).
+
+    Streaming responses are measured up to the first byte.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_request_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                request.metrics = metrics
+                response = self.get_response(request)
+        finally:
+            current_request_metrics.reset(token)
+
+        total = metrics.elapsed()
+        # query counts and timings are internals: only shown when asked for
+        if settings.DEBUG or settings.SERVER_TIMING:
+            response["Server-Timing"] = server_timing(metrics, total)
+        self.observe(request, response, metrics, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook
+        start = time.perf_counter()
+
+        def rendered(response):
+            request.metrics.render += time.perf_counter() - start
+        response.add_post_render_callback(rendered)
+        return response
+
+    def observe(self, request, response, metrics, total):
+        route = route_name(request)
+        REQUEST_DURATION.labels(request.method, route, response.status_code).observe(total)
+        REQUEST_DB_DURATION.labels(request.method, route).observe(metrics.db)
+        REQUEST_DB_QUERIES.labels(request.method, route).observe(len(metrics.queries))
+        REQUEST_SERIALIZE_DURATION.labels(request.method, route).observe(metrics.serialize)
+
+        if total * 1000 < settings.SLOW_REQUEST_THRESHOLD_MS:
+            return
+        queries = "".join(
+            f"\n  {duration * 1000:.1f} ms: {sql}"
+            for duration, sql in metrics.top_queries(settings.SLOW_REQUEST_TOP_QUERIES)
+        )
+        logger.warning(
+            "Slow request %s %s (%s) %d: %.1f ms, %d queries in %.1f ms, serialize %.1f ms. Slowest queries:%s",
+            request.method, request.path, route, response.status_code, total * 1000,
+            len(metrics.queries), metrics.db * 1000, metrics.serialize * 1000, queries or " none",
+        )
@@ -0,0 +1,14 @@
+from functools import lru_cache
+import redis
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    """
+    Shared Redis client for application data (notification buffers, watermarks...).
+
+    The client keeps its own connection pool, which redis-py resets after a fork,
+    so it is safe to share between Celery prefork children.
+    """
+    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
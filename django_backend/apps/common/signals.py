@@ -0,0 +1,92 @@
+import glob
+import os
+import time
+from datetime import datetime
+from celery.signals import (
+    before_task_publish, task_failure, task_postrun, task_prerun, task_retry, worker_init, worker_process_shutdown,
+)
+from django.conf import settings
+from prometheus_client import start_http_server
+from prometheus_client import multiprocess
+from .db import close_pools
+from .metrics import TASK_FAILURES, TASK_QUEUE_LAG, TASK_RETRIES, TASK_RUNTIME, metrics_registry
+
+# task id -> perf_counter() at start, for the tasks running in this process
+_started = {}
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    """
+    Add the publication time to the message headers, so the worker can tell
+    how long the task waited in the queue. Wall clock: it is compared across hosts.
+    """
+    if headers is not None:
+        headers.setdefault("published_at", time.time())
+
+
+@task_prerun.connect
+def task_started(task_id=None, task=None, **kwargs):
+    _started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is None:
+        return
+    # a task with an ETA/countdown is only late from its ETA on
+    eta = task.request.eta
+    if isinstance(eta, str):
+        eta = datetime.fromisoformat(eta)
+    ready_at = max(published_at, eta.timestamp()) if eta else published_at
+    queue = (task.request.delivery_info or {}).get("routing_key") or "unknown"
+    TASK_QUEUE_LAG.labels(task.name, queue).observe(max(time.time() - ready_at, 0))
+
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    start = _started.pop(task_id, None)
+    if start is not None:
+        TASK_RUNTIME.labels(task.name, state or "unknown").observe(time.perf_counter() - start)
+
+
+@task_retry.connect
+def task_retried(sender=None, **kwargs):
+    TASK_RETRIES.labels(sender.name).inc()
+
+
+@task_failure.connect
+def task_failed(sender=None, exception=None, **kwargs):
+    TASK_FAILURES.labels(sender.name, type(exception).__name__).inc()
+
+
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    """
+    Serve the worker metrics on CELERY_METRICS_PORT (0 disables it).
+
+    Prefork pool processes each have their own metrics: set PROMETHEUS_MULTIPROC_DIR
+    so they are written there and aggregated by this server. The directory is
+    emptied here since the values of a previous run would be added up.
+    """
+    if not settings.CELERY_METRICS_PORT:
+        return
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+    start_http_server(settings.CELERY_METRICS_PORT, registry=metrics_registry())
+    print(f"Celery metrics served on port {settings.CELERY_METRICS_PORT}")
+
+
+@worker_init.connect
+def close_database_pools(**kwargs):
+    """
+    Close anything the worker opened on the database before forking its pool
+    processes: each of them opens its own pool (DB_POOL) on its first task.
+    """
+    close_pools()
+
+
+@worker_process_shutdown.connect
+def pool_process_exited(pid=None, **kwargs):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
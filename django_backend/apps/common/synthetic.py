@@ -0,0 +1,151 @@
+import json
+import random
+from datetime import timedelta
+from django.db import connection, transaction
+from apps.common.db import copy_rows
+
+# Synthetic dataset for `seed --users N --tasks N ...` (load and query-plan
+# testing). Rows are generated in batches of consecutive ids, each batch from
+# its own RNG seeded with (--seed, first id), and written with COPY. On an
+# empty database the same options always produce the same dataset, whatever
+# the number of workers.
+
+STATUS_WEIGHTS = {"todo": 35, "in_progress": 30, "done": 30, "overdue": 5}
+PRIORITY_WEIGHTS = {"low": 20, "medium": 45, "high": 25, "critical": 10}
+ROLE_WEIGHTS = {"contributor": 80, "reviewer": 15, "owner": 5}
+TAG_NAMES = [
+    "bug", "feature", "urgent", "backend", "frontend", "api", "database", "performance",
+    "security", "docs", "refactor", "testing", "ux", "infra", "mobile", "billing",
+    "search", "reporting", "onboarding", "tech-debt",
+]
+WORDS = [
+    "fix", "add", "update", "remove", "refactor", "review", "migrate", "design", "deploy",
+    "test", "login", "dashboard", "report", "invoice", "search", "export", "import",
+    "cache", "queue", "email", "profile", "settings", "billing", "api", "page", "form",
+    "error", "timeout", "layout", "permissions", "notifications", "metrics", "backup",
+]
+HISTORY_FIELDS = ["status", "priority", "due_date", "estimated_hours", "title"]
+
+# per-worker values set by init_worker (inherited or pickled once per process)
+context = {}
+
+
+def init_worker(values):
+    context.update(values)
+
+
+def reserve_ids(table, count):
+    """
+    Reserve `count` consecutive ids from the table's sequence, so rows can be
+    written with explicit ids (and reference each other) without round trips.
+    Returns the first id.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        sequence = cursor.fetchone()[0]
+        cursor.execute("SELECT nextval(%s)", [sequence])
+        first = cursor.fetchone()[0]
+        cursor.execute("SELECT setval(%s, %s)", [sequence, first + count - 1])
+    return first
+
+
+def batches(first_id, count, size):
+    """Split an id range into (first id, count) batches."""
+    return [(start, min(size, first_id + count - start)) for start in range(first_id, first_id + count, size)]
+
+
+def weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def skewed(rng, values):
+    # a few values take most of the picks (active users, popular tags)
+    return values[int(len(values) * rng.random() ** 3)]
+
+
+def sentence(rng, low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize()
+
+
+def write_users(first_id, count):
+    """Write users first_id..first_id+count-1; they can log in with the seed password."""
+    rng = random.Random(f"{context['seed']}:users:{first_id}")
+    now, team_ids = context["now"], context["team_ids"]
+    rows = []
+    for user_id in range(first_id, first_id + count):
+        rows.append((
+            user_id, context["password"], False, f"user{user_id}", rng.choice(WORDS).capitalize(),
+            rng.choice(WORDS).capitalize(), f"user{user_id}@example.com", False, True,
+            now - timedelta(days=rng.uniform(0, 730)), "admin" if rng.random() < 0.01 else "member",
+            rng.choice(team_ids) if team_ids and rng.random() < 0.9 else None, "[]", 0,
+        ))
+    with transaction.atomic(), connection.cursor() as cursor:
+        copy_rows(cursor, "users_user", [
+            "id", "password", "is_superuser", "username", "first_name", "last_name", "email",
+            "is_staff", "is_active", "date_joined", "role", "team_id", "notification_opt_outs", "token_version",
+        ], rows)
+    return {"users": count}
+
+
+def write_tasks(first_id, count):
+    """
+    Write tasks first_id..first_id+count-1 with their tags, assignees, comments
+    and history, in one transaction.
+
+    About a fifth of the tasks are subtasks of an earlier task of the same batch,
+    which builds trees a few levels deep.
+    """
+    rng = random.Random(f"{context['seed']}:tasks:{first_id}")
+    now, user_ids, tag_ids = context["now"], context["user_ids"], context["tag_ids"]
+    comments_per_task, history_per_task = context["comments_per_task"], context["history_per_task"]
+    tasks, task_tags, assignments, comments, history = [], [], [], [], []
+
+    for task_id in range(first_id, first_id + count):
+        status = weighted(rng, STATUS_WEIGHTS)
+        created_at = now - timedelta(days=rng.uniform(0, 365))
+        updated_at = created_at + (now - created_at) * rng.random()
+        if status == "overdue":
+            due_date = now - timedelta(days=rng.uniform(1, 30))
+        else:
+            due_date = created_at + timedelta(days=rng.uniform(1, 90))
+        estimated = round(min(rng.lognormvariate(1.5, 0.8), 200), 2)
+        actual = round(min(estimated * rng.uniform(0.5, 1.8), 999), 2) if status == "done" else None
+        parent = rng.randrange(first_id, task_id) if task_id > first_id and rng.random() < 0.2 else None
+        creator = skewed(rng, user_ids)
+        tasks.append((
+            task_id, sentence(rng, 2, 6), sentence(rng, 8, 30), status, weighted(rng, PRIORITY_WEIGHTS),
+            due_date, estimated, actual, creator, parent,
+            json.dumps({"source": "seed"} if rng.random() < 0.3 else {}),
+            created_at, updated_at, status == "done" and rng.random() < 0.15,
+        ))
+
+        for tag_id in {skewed(rng, tag_ids) for _ in range(rng.choice((0, 1, 1, 2, 2, 3)))}:
+            task_tags.append((task_id, tag_id))
+        for user_id in {skewed(rng, user_ids) for _ in range(rng.choice((0, 1, 1, 1, 2, 3)))}:
+            assignments.append((task_id, user_id, created_at, creator, weighted(rng, ROLE_WEIGHTS)))
+        for _ in range(rng.randint(0, comments_per_task * 2)):
+            comments.append((task_id, skewed(rng, user_ids), sentence(rng, 5, 25), created_at + (now - created_at) * rng.random()))
+        for _ in range(rng.randint(0, history_per_task * 2)):
+            field = rng.choice(HISTORY_FIELDS)
+            history.append((task_id, skewed(rng, user_ids), field, sentence(rng, 1, 2), sentence(rng, 1, 2),
+                            created_at + (updated_at - created_at) * rng.random()))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        copy_rows(cursor, "tasks_task", [
+            "id", "title", "description", "status", "priority", "due_date", "estimated_hours",
+            "actual_hours", "created_by_id", "parent_task_id", "metadata", "created_at", "updated_at",
+            "is_archived",
+        ], tasks)
+        copy_rows(cursor, "tasks_task_tags", ["task_id", "tag_id"], task_tags)
+        copy_rows(cursor, "tasks_taskassignment", ["task_id", "user_id", "assigned_at", "assigned_by_id", "role"], assignments)
+        copy_rows(cursor, "tasks_comment", ["task_id", "author_id", "description", "created_at"], comments)
+        copy_rows(cursor, "tasks_taskhistory", [
+            "task_id", "changed_by_id", "field_changed", "old_value", "new_value", "changed_at",
+        ], history)
+    return {
+        "tasks": len(tasks),
+        "tags": len(task_tags),
+        "assignments": len(assignments),
+        "comments": len(comments),
+        "history": len(history),
+    }
@@ -1,3 +1,52 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
+from apps.common.benchmarks.runner import BASELINE_PATH, compare, load_baseline, regressions, run_benchmark
+from apps.common.benchmarks.scenarios import SCENARIOS
+from apps.users.models import User
 
-# Create your tests here.
+
+class MetricsEndpointTests(TestCase):
+    def test_anonymous_scrape_is_forbidden(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="scrape-me")
+    def test_scrape_with_the_metrics_token(self):
+        self.assertEqual(self.client.get("/metrics", headers={"authorization": "Bearer wrong"}).status_code, 403)
+        response = self.client.get("/metrics", headers={"authorization": "Bearer scrape-me"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"http_request_duration_seconds", response.content)
+
+    def test_staff_can_scrape(self):
+        self.client.force_login(User.objects.create_user("ops", password="secret", is_staff=True))
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def test_server_timing_is_opt_in(self):
+        self.assertNotIn("Server-Timing", self.client.get("/metrics"))
+        with self.settings(SERVER_TIMING=True):
+            self.assertIn("db;dur=", self.client.get("/metrics")["Server-Timing"])
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_request_log_leaves_the_query_string_out(self):
+        with self.assertLogs("apps.common.middleware", "WARNING") as logs:
+            self.client.get("/metrics", {"token": "secret-token"})
+        self.assertIn("/metrics", logs.output[0])
+        self.assertNotIn("secret-token", logs.output[0])
+
+
+# the scenario clients call the API on localhost, which only DEBUG allows by default
+@override_settings(ALLOWED_HOSTS=["localhost"])
+class BenchmarkBudgetTests(TransactionTestCase):
+    """
+    The query and row budgets of benchmarks/baseline.json ('small' scale) on
+    every test run, so an N+1 fails the build. Times are left to the
+    benchmark command: they depend on the machine.
+    """
+    # the dataset is laid out by id, as on the fresh database of the benchmark command
+    reset_sequences = True
+
+    def test_scenarios_stay_within_their_budgets(self):
+        baseline = load_baseline(BASELINE_PATH)["small"]
+        results = run_benchmark("small", 42, list(SCENARIOS), repeat=1)
+        self.assertEqual(sorted(set(results) - set(baseline)), [], "no baseline: run benchmark --update-baseline")
+        self.assertEqual(regressions(compare(results, baseline, rows_tolerance=0.2, time_tolerance=0)), [])
@@ -1,3 +1,24 @@
-from django.shortcuts import render
+import hmac
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST
+from .metrics import render_metrics
 
-# Create your views here.
+
+def can_scrape(request):
+    """Staff users, and scrapers sending `Authorization: Bearer <METRICS_TOKEN>` when one is set."""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    return bool(token) and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint: per-route request histograms in the text
+    exposition format (see apps/common/middleware.py). Forbidden to anyone
+    but staff users and scrapers holding METRICS_TOKEN.
+    """
+    if not can_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,61 @@
+import hashlib
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.cache import get_conditional_response
+from apps.tasks.models import Comment, TaskHistory
+
+# related rows whose changes show up in each task resource
+RELATED = {
+    "comments": (Comment, "created_at"),
+    "history": (TaskHistory, "changed_at"),
+}
+
+
+def related_state(model, timestamp_field):
+    """Latest timestamp and row count of a task's related rows, as subqueries."""
+    rows = model.objects.filter(task=OuterRef("pk")).order_by().values("task")
+    latest = Subquery(rows.annotate(latest=Max(timestamp_field)).values("latest"))
+    count = Coalesce(Subquery(rows.annotate(count=Count("id")).values("count")), 0, output_field=IntegerField())
+    return latest, count
+
+
+def resource_etag(request, queryset, pk, related=()):
+    """
+    Compute the ETag of a task resource in one query.
+
+    The state is the task's updated_at plus, for each name in `related`
+    ('comments', 'history'), the latest timestamp and the row count of those rows
+    (the count catches deletions). The ETag also covers the full URL, since query
+    parameters change the representation. Nothing is serialized.
+
+    No Last-Modified: the latest of the timestamps, at one-second resolution,
+    doesn't move when a related row is deleted or when two changes fall in the
+    same second, so If-Modified-Since would answer 304 to stale copies.
+
+    Returns None when the task does not exist in `queryset`.
+    """
+    annotations = {}
+    for name in related:
+        annotations[f"{name}_latest"], annotations[f"{name}_count"] = related_state(*RELATED[name])
+    try:
+        state = queryset.filter(pk=pk).order_by().annotate(**annotations).values("updated_at", *annotations).first()
+    except (TypeError, ValueError):
+        state = None
+    if state is None:
+        return None
+
+    fingerprint = repr(sorted(state.items())) + request.get_full_path()
+    return '"%s"' % hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
+def not_modified(request, etag):
+    """Return a 304 response when the client's copy is still current, None otherwise."""
+    if etag is None:
+        return None
+    return get_conditional_response(request, etag=etag)
+
+
+def set_etag(response, etag):
+    if etag is not None and response.status_code == 200:
+        response["ETag"] = etag
+    return response
@@ -0,0 +1,22 @@
+from rest_framework import filters
+
+
+class TaskSearchFilter(filters.SearchFilter):
+    """
+    Full-text search filter for tasks.
+
+    Keeps the standard `search` query parameter, but delegates to
+    TaskQuerySet.search() (GIN indexed tsvector, ranked results) instead of
+    building `icontains` lookups over `search_fields`.
+
+    Query syntax:
+    - search=login error: tasks containing both words (stemmed)
+    - search="login error": phrase search
+    - search=login or signup / search=login -mobile: websearch operators
+    - search=deplo*: prefix search
+    """
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        return queryset.search(query)
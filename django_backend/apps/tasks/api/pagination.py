@@ -1,6 +1,221 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import F, Field, Func, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def planner_row_estimate(queryset):
+    """
+    Return the number of rows PostgreSQL's planner expects `queryset` to return,
+    read from EXPLAIN (no rows are scanned).
+    """
+    plan = json.loads(queryset.explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Django paginator that uses the planner estimate as `count` when the result
+    set is large, instead of running COUNT(*) over every matching row.
+
+    Small result sets (estimate below TASKS_ESTIMATED_COUNT_THRESHOLD) still get
+    an exact count.
+    """
+    @cached_property
+    def count(self):
+        estimate = planner_row_estimate(self.object_list)
+        if estimate < settings.TASKS_ESTIMATED_COUNT_THRESHOLD:
+            self.is_estimate = False
+            return self.object_list.count()
+        self.is_estimate = True
+        return estimate
+
 
 class TasksPagination(PageNumberPagination):
+    """
+    Page number pagination for tasks.
+
+    `?count=estimated` replaces the exact COUNT(*) with the planner estimate on
+    large result sets; the response then carries `count_is_estimate: true`.
+    """
+    page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = 8
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.count_query_param) == 'estimated':
+            self.django_paginator_class = EstimatedCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        is_estimate = getattr(self.page.paginator, 'is_estimate', None)
+        if is_estimate is not None:
+            response.data['count_is_estimate'] = is_estimate
+        return response
+
+
+class Row(Func):
+    """SQL row constructor, used for (a, b) < (x, y) keyset comparisons."""
+    function = 'ROW'
+    output_field = Field()
+
+
+def ordering_field(queryset, name):
+    """Field of an ordering column of `queryset`: an annotation (e.g. search_rank) or a model field."""
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    return queryset.model._meta.get_field(name)
+
+
+def keyset_page(queryset, ordering, position, page_size):
+    """
+    One page of `queryset` ordered by `ordering` (all fields in the same
+    direction, the last one unique), starting right after `position` (the
+    ordering values of the last row of the previous page, None for the first
+    page) with a row comparison, e.g. `(updated_at, id) < (%s, %s)`.
+
+    Returns (rows, position of the next page or None on the last page).
+    """
+    fields = [name.lstrip('-') for name in ordering]
+    queryset = queryset.order_by(*ordering)
+    if position is not None:
+        compare = LessThan if ordering[0].startswith('-') else GreaterThan
+        keys = Row(*(F(name) for name in fields))
+        values = Row(*(
+            Value(value, output_field=ordering_field(queryset, name))
+            for name, value in zip(fields, position)
+        ))
+        queryset = queryset.filter(compare(keys, values))
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, [getattr(rows[-1], name) for name in fields]
+
+
+def encode_cursor(position):
+    # full isoformat: DjangoJSONEncoder would truncate datetimes to milliseconds
+    values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+    data = json.dumps(values)
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor, queryset, ordering):
+    """
+    Position encoded in `cursor` (None when there is none) for `ordering` over
+    `queryset`; raises ValueError when it is invalid.
+    """
+    if not cursor:
+        return None
+    fields = [name.lstrip('-') for name in ordering]
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if len(values) != len(fields):
+            raise ValueError
+        return [ordering_field(queryset, name).to_python(value) for name, value in zip(fields, values)]
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination.
+
+    Rows are ordered by `ordering` (all fields in the same direction, the last
+    one unique) and each page starts right after the last row of the previous
+    one with a row comparison, e.g. `(updated_at, id) < (%s, %s)`. Backed by a
+    matching index, every page costs the same as the first: no OFFSET scan and
+    no COUNT(*).
+
+    The response contains `next` (null on the last page) and `results`.
+    """
     page_size = 5
     page_size_query_param = 'page_size'
-    max_page_size = 8
\ No newline at end of file
+    max_page_size = 8
+    cursor_query_param = 'cursor'
+    ordering = ('-updated_at', '-id')
+
+    def get_ordering(self, queryset):
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(queryset)
+        try:
+            position = decode_cursor(request.query_params.get(self.cursor_query_param), queryset, ordering)
+        except ValueError:
+            raise NotFound("Invalid cursor")
+        rows, self.next_position = keyset_page(queryset, ordering, position, self.page_size)
+        self.has_next = self.next_position is not None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class TasksCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for tasks, most recently updated first (index
+    task_updated_id_idx). Searches keep their relevance order: pages follow
+    the rank, then the id (the rank is computed for every match, as without
+    cursors).
+    """
+    ordering = ('-updated_at', '-id')
+    search_ordering = ('-search_rank', '-id')
+
+    def get_ordering(self, queryset):
+        if 'search_rank' in queryset.query.annotations:
+            return self.search_ordering
+        return self.ordering
+
+
+class CommentsCursorPagination(KeysetPagination):
+    """Keyset pagination for a task's comments, newest first (index comment_task_created_idx)."""
+    page_size = 20
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class HistoryCursorPagination(KeysetPagination):
+    """Keyset pagination for a task's history, newest first (index history_task_changed_idx)."""
+    page_size = 20
+    max_page_size = 100
+    ordering = ('-changed_at', '-id')
@@ -1,6 +1,58 @@
 from rest_framework import serializers
+from apps.common.metrics import TimedSerializerMixin
 from apps.tasks.models import Tag, TaskAssignment, Comment, TaskHistory, TaskTemplate, Task
 from apps.users.api.serializers import UserSerializer
+from apps.users.models import User
+
+
+def split_param(value):
+    """Split a comma separated query parameter into a list of names."""
+    if not value:
+        return []
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def existing_ids(model, ids):
+    """Check that every id exists, with one query; returns the ids without duplicates."""
+    ids = list(dict.fromkeys(ids))
+    found = set(model.objects.filter(pk__in=ids).values_list("pk", flat=True))
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        raise serializers.ValidationError(f"Invalid pk(s) {missing} - object does not exist.")
+    return ids
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for sparse fieldsets and opt-in expansion.
+
+    Reads the request from the serializer context:
+    - `?fields=id,title,status` keeps only the listed fields.
+    - `?expand=comments,history` adds fields listed in `Meta.expandable_fields`,
+      which are left out by default.
+
+    Unknown names are ignored. `requested_fields()` is also used by the view to
+    decide which relations need to be prefetched.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+        requested = self.requested_fields(request.query_params)
+        for name in list(self.fields):
+            if name not in requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, query_params):
+        expandable = set(getattr(cls.Meta, "expandable_fields", []))
+        expand = set(split_param(query_params.get("expand"))) & expandable
+        fields = set(cls.Meta.fields) - expandable
+        sparse = set(split_param(query_params.get("fields")))
+        if sparse:
+            fields &= sparse
+        return fields | expand
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -39,7 +91,7 @@ class TaskAssignmentSerializer(serializers.ModelSerializer):
         model = TaskAssignment
         fields = ["id", "task", "user", "assigned_at", "assigned_by", "role"]
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for the Comment model.
 
@@ -59,7 +111,7 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ["id", "task", "author", "description", "created_at"]
 
-class TaskHistorySerializer(serializers.ModelSerializer):
+class TaskHistorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for the TaskHistory model.
 
@@ -98,7 +150,7 @@ class TaskTemplateSerializer(serializers.ModelSerializer):
         model = TaskTemplate
         fields = ["id", "name", "description", "default_priority", "default_estimated_hours", "metadata"]
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for the Task model.
 
@@ -152,3 +204,169 @@ class TaskSerializer(serializers.ModelSerializer):
             "comments",
             "history",
         ]
+
+
+class TaskListSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Compact serializer used by the task list endpoint.
+
+    Relations are rendered as identifiers instead of nested objects and the
+    unbounded fields (description, metadata) are left out. Comments and history
+    are only included when requested with `?expand=comments,history`, and
+    `?fields=` trims the output further (see SparseFieldsetMixin).
+
+    Fields:
+        id (int): Primary key of the task
+        title (str): Task title
+        status (str): Current status of the task
+        priority (str): Task priority
+        due_date (datetime): Task due date
+        estimated_hours (Decimal): Estimated hours to complete
+        actual_hours (Decimal): Actual hours spent
+        created_by (int): ID of the user who created the task
+        assigned_to (int[]): IDs of the users assigned to the task
+        tags (str[]): Names of the tags related to the task
+        parent_task (int): Optional parent task
+        created_at (datetime): Timestamp when the task was created
+        updated_at (datetime): Timestamp when the task was last updated
+        is_archived (bool): Boolean indicating if the task is archived
+        comments (Comment[]): Comments on the task (only with ?expand=comments)
+        history: Task change history (only with ?expand=history)
+    """
+    created_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    assigned_to = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field="name")
+    comments = CommentSerializer(many=True, read_only=True)
+    history = TaskHistorySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Task
+        fields = [
+            "id",
+            "title",
+            "status",
+            "priority",
+            "due_date",
+            "estimated_hours",
+            "actual_hours",
+            "created_by",
+            "assigned_to",
+            "tags",
+            "parent_task",
+            "created_at",
+            "updated_at",
+            "is_archived",
+            "comments",
+            "history",
+        ]
+        expandable_fields = ["comments", "history"]
+
+
+class TaskBulkItemSerializer(serializers.ModelSerializer):
+    """
+    Serializer validating one item of a bulk create or update.
+
+    Only validates, in the view: rows are written with bulk_create / bulk_update
+    by apps.tasks.services. `parent_task` is a plain id here so a batch doesn't
+    run one query per item; the service checks all of them in a single query.
+
+    Fields:
+        id (int): Task to update (bulk update only)
+        title (str): Task title
+        description (str): Task description
+        status (str): Current status of the task
+        priority (str): Task priority
+        due_date (datetime): Task due date
+        estimated_hours (Decimal): Estimated hours to complete
+        actual_hours (Decimal): Actual hours spent
+        parent_task (int): Optional parent task id
+        metadata (JSON): Optional JSON metadata
+    """
+    id = serializers.IntegerField(required=False)
+    parent_task = serializers.IntegerField(source="parent_task_id", required=False, allow_null=True)
+
+    class Meta:
+        model = Task
+        fields = [
+            "id",
+            "title",
+            "description",
+            "status",
+            "priority",
+            "due_date",
+            "estimated_hours",
+            "actual_hours",
+            "parent_task",
+            "metadata",
+        ]
+
+
+class TaskBulkUpdateItemSerializer(TaskBulkItemSerializer):
+    """
+    Serializer validating one item of a bulk update: used with partial=True,
+    every field is optional but the id of the task to update.
+    """
+    def validate(self, attrs):
+        if "id" not in attrs:
+            raise serializers.ValidationError({"id": [self.fields["id"].error_messages["required"]]})
+        return attrs
+
+
+class AssigneeSerializer(serializers.Serializer):
+    """
+    One user of a bulk assignment.
+
+    Fields:
+        id (int): User to assign
+        role (str): Role of the user on every task of the batch
+    """
+    id = serializers.IntegerField()
+    role = serializers.CharField(max_length=50, default="contributor")
+
+
+class BulkAssignSerializer(serializers.Serializer):
+    """
+    Serializer for assigning many users to many tasks.
+
+    Every user is assigned to every task. Unknown task or user ids are reported
+    as validation errors (one query each for the whole batch).
+
+    Fields:
+        task_ids (list[int]): Tasks to assign
+        users (list[Assignee]): Users to assign, each with an optional role
+    """
+    task_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    users = AssigneeSerializer(many=True, allow_empty=False)
+
+    def validate_task_ids(self, value):
+        return existing_ids(Task, value)
+
+    def validate_users(self, value):
+        existing_ids(User, [user["id"] for user in value])
+        return value
+
+
+class BulkUnassignSerializer(serializers.Serializer):
+    """
+    Serializer for removing many users from many tasks.
+
+    Fields:
+        task_ids (list[int]): Tasks to unassign
+        user_ids (list[int]): Users to remove from every task of the batch
+    """
+    task_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    user_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+
+
+class DependenciesSerializer(serializers.Serializer):
+    """
+    Serializer for adding or removing dependencies of a task.
+
+    Fields:
+        depends_on (list[int]): Tasks the task depends on (must exist)
+    """
+    depends_on = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_depends_on(self, value):
+        return existing_ids(Task, value)
@@ -0,0 +1,81 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from apps.tasks.events import get_broadcaster, requested_channels
+from apps.users.services import SESSION_TOKEN_KEY, token_user
+
+
+def authenticate(request):
+    """
+    User of a stream request, from the usual Authorization header or, since
+    EventSource can't set headers, a ?token= parameter or the session's
+    access token (template views). None when there is no valid token.
+
+    The database connection is given back before returning: Django would
+    otherwise keep it until request_finished, i.e. until the stream ends.
+    """
+    try:
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else None
+        raw_token = raw_token or request.GET.get("token") or request.session.get(SESSION_TOKEN_KEY)
+        return token_user(raw_token) if raw_token else None
+    finally:
+        connections.close_all()
+
+
+async def event_stream(broadcaster, subscription):
+    # tell EventSource how soon to reconnect once the stream ends
+    yield f"retry: {settings.TASK_EVENTS_RETRY_MS}\n\n"
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), settings.TASK_EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                # comment line: keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            if message is None:
+                return
+            yield f"data: {message}\n\n"
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+async def task_events_view(request):
+    """
+    Server-Sent Events stream of task changes: GET /api/events/?task=1,2&user=3&team=4
+
+    Each event is {"event", "task", "at"} (event: created, updated, deleted,
+    assigned, unassigned, commented), a hint to refetch the task. {"event": "resync"}
+    means events were dropped because the client read too slowly.
+
+    Served from Redis pub/sub (see apps/tasks/events.py): an open stream holds
+    no database connection and costs no query. Needs an ASGI server
+    (uvicorn config.asgi:application).
+    """
+    user = await sync_to_async(authenticate)(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    try:
+        channels = requested_channels(request.GET)
+    except ValueError as error:
+        return JsonResponse({"detail": str(error)}, status=400)
+    if not channels:
+        return JsonResponse({"detail": "Subscribe to at least one task, user or team."}, status=400)
+    if len(channels) > settings.TASK_EVENTS_MAX_CHANNELS:
+        return JsonResponse(
+            {"detail": f"At most {settings.TASK_EVENTS_MAX_CHANNELS} tasks, users and teams per stream."},
+            status=400,
+        )
+
+    broadcaster = get_broadcaster()
+    subscription = await broadcaster.subscribe(channels)
+    response = StreamingHttpResponse(event_stream(broadcaster, subscription), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # nginx would otherwise buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -3,11 +3,28 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework import filters
-from apps.tasks.models import Task, TaskAssignment
-from .serializers import TaskSerializer, CommentSerializer, TaskHistorySerializer
-from .pagination import TasksPagination
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404
+from apps.tasks.models import Task, Comment, TaskHistory
+from .serializers import TaskSerializer, TaskListSerializer, CommentSerializer, TaskHistorySerializer, BulkAssignSerializer, BulkUnassignSerializer, DependenciesSerializer, TaskBulkItemSerializer, TaskBulkUpdateItemSerializer
+from .pagination import TasksPagination, TasksCursorPagination, CommentsCursorPagination, HistoryCursorPagination
+from .filters import TaskSearchFilter
+from .export import EXPORT_FORMATS, stream_export
+from apps.tasks.stats import task_stats
+from apps.tasks.tree import task_tree
+from apps.tasks.dependencies import (
+    DependencyCycle, DependencyGraph, add_dependencies, remove_dependencies, unblocked_tasks,
+)
 from apps.tasks.tasks import send_task_notification
+from apps.tasks.notifications import task_recipients
+from apps.tasks import cache as task_cache
+from apps.tasks.events import publish_task_events, task_audiences
+from .conditional import resource_etag, not_modified, set_etag
+from apps.tasks.services import (
+    filter_tasks, list_prefetches, detail_prefetches,
+    bulk_create_tasks, bulk_update_tasks, bulk_archive_tasks, bulk_assign_users, bulk_unassign_users, item_error,
+)
 
 class TaskViewSet(viewsets.ModelViewSet):
     """
@@ -16,7 +33,7 @@ class TaskViewSet(viewsets.ModelViewSet):
     Provides CRUD operations and additional actions for tasks.
 
     Endpoints:
-    - list: GET /api/tasks/ - list tasks with filtering, search and pagination.
+    - list: GET /api/tasks/ - list tasks with filtering, search and pagination (compact representation).
     - retrieve: GET /api/tasks/{id}/ — retrieve a single task
     - create: POST /api/tasks/ — create a new task (authenticated user is automatically the creator)
     - update: PUT /api/tasks/{id}/ — update a task
@@ -27,104 +44,411 @@ class TaskViewSet(viewsets.ModelViewSet):
     - assign: POST /api/tasks/{id}/assign/ — assign users to a task
     - comments: GET/POST /api/tasks/{id}/comments/ — retrieve or create comments for a task
     - history: GET /api/tasks/{id}/history/ — retrieve task change history
+    - tree: GET /api/tasks/{id}/tree/ — the task and all its subtasks, nested, with rolled-up hours and completion
+    - bulk: POST /api/tasks/bulk/ — create a batch of tasks (JSON list of tasks)
+    - bulk: PATCH /api/tasks/bulk/ — partially update a batch of tasks (JSON list, each item with its "id")
+    - bulk_archive: POST /api/tasks/bulk/archive/ — archive a batch of tasks ({"ids": [...]})
+    - export: GET /api/tasks/export/ — stream every matching task as NDJSON or CSV
+    - bulk_assign: POST /api/tasks/bulk/assign/ — assign many users (with roles) to many tasks
+    - bulk_unassign: POST /api/tasks/bulk/unassign/ — remove many users from many tasks
+    - stats: GET /api/tasks/stats/ — dashboard counts by status, priority, team and overdue state
+    - dependencies: GET/POST/DELETE /api/tasks/{id}/dependencies/ — list, add or remove the tasks a task depends on
+    - dependency_order: GET /api/tasks/dependencies/order/ — task ids in dependency (topological) order
+    - critical_path: GET /api/tasks/dependencies/critical-path/ — longest chain by estimated hours
+    - unblocked: GET /api/tasks/dependencies/unblocked/ — open tasks whose dependencies are all done
+
+    Bulk endpoints validate every item, write the valid ones in one transaction with
+    bulk_create / bulk_update, and report the invalid ones by index: 201/200 when
+    all items succeed, 207 when some failed, 400 when none succeeded.
 
     Features:
     - Filters tasks by status, priority, and created_by
-    - Search tasks by title or description
-    - Automatically sends notifications on task creation, update, and deletion
-    - Supports pagination
+    - Full-text search tasks by title or description (ranked by relevance)
+    - Automatically notifies assignees and creator on task creation, update, and deletion
+      (coalesced into per-recipient digests, see apps/tasks/notifications.py)
+    - Supports page number pagination and keyset (cursor) pagination
+    - list and retrieve responses are cached in Redis and invalidated by task, comment,
+      assignment and history writes (see apps/tasks/cache.py)
+    - retrieve, comments and history answer conditional GETs: responses carry an ETag,
+      and If-None-Match gets a 304 without serializing
 
     Permissions:
     - Only authenticated users can access any of the endpoints
 
     Query Parameters:
     - include_archived (optional): 'true' to include archived tasks in the list
+    - fields (optional): comma separated fields to return in the list, e.g. 'id,title,status'
+    - expand (optional): 'comments' and/or 'history' to nest them in the list
+    - pagination (optional): 'cursor' for keyset pagination on the list, comments and
+      history (follow the `next` link, which carries the `cursor` parameter)
+    - count (optional): 'estimated' to use the planner row estimate in page number mode
     - status (optional): filter tasks by status
     - priority (optional): filter tasks by priority
-    - search (optional): search tasks by title or description
+    - search (optional): full-text search on title and description; supports
+      "phrases", `or`, `-word` and trailing `*` for prefix matching
+    - output (optional, export only): 'ndjson' (default) or 'csv'
+    - depth (optional, tree only): levels of subtasks to load (all by default)
+    - task (optional, dependency order and critical path): only that task and what it depends on
     """
     # select_related: optimization of queries, Django brings in a single query all the tasks created by the same user
     # 2 queries: 1 query for main object and 1 query for related objects
     queryset = Task.objects.select_related('created_by', 'parent_task').prefetch_related('assigned_to', 'tags')
     serializer_class = TaskSerializer
+    list_serializer_class = TaskListSerializer
     permission_classes = [IsAuthenticated]
+    # reads only need the user id: with JWT_STATELESS_READS they skip the user lookup
+    stateless_authentication = True
     pagination_class = TasksPagination
+    cursor_pagination_class = TasksCursorPagination
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter]
     filterset_fields = ['status', 'priority', 'created_by']
-    search_fields = ['title', 'description']
+
+    # actions that render the compact TaskListSerializer
+    list_actions = ('list', 'unblocked')
+    # actions that render a full TaskSerializer and need every relation loaded
+    detail_actions = ('retrieve', 'create', 'update', 'partial_update')
+
+    def use_cursor_pagination(self):
+        params = self.request.query_params
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.use_cursor_pagination():
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
+    def get_serializer_class(self):
+        if self.action in self.list_actions:
+            return self.list_serializer_class
+        return self.serializer_class
 
     def get_queryset(self):
-        include_archived = self.request.query_params.get('include_archived')
-        qs = Task.objects.active().select_related('created_by', 'parent_task').prefetch_related('assigned_to', 'tags')
-        if include_archived == 'true':
-            qs = Task.objects.all()
-
-        status = self.request.query_params.get('status')
-        if status:
-            qs = qs.by_status(status)
-        priority = self.request.query_params.get('priority')
-        if priority:
-            qs = qs.by_priority(priority)
-        search = self.request.query_params.get('search')
-        if search:
-            qs = qs.search(search)
+        # search is applied by TaskSearchFilter
+        return self.with_related(filter_tasks(self.request.query_params))
+
+    def with_related(self, qs):
+        """
+        Apply the prefetch plan matching what the current action serializes, so a
+        page of tasks costs a fixed number of queries whatever its size.
+
+        - list actions: only the relations kept by ?fields= / added by ?expand=
+        - detail actions: creator, assignees, tags, comments and history
+        - other actions (assign, comments, history): the bare task
+        """
+        if self.action in self.list_actions:
+            fields = self.list_serializer_class.requested_fields(self.request.query_params)
+            return qs.prefetch_related(*list_prefetches(fields))
+
+        if self.action in self.detail_actions:
+            return qs.select_related('created_by').prefetch_related(*detail_prefetches())
         return qs
 
+    def list(self, request, *args, **kwargs):
+        key = task_cache.list_cache_key(request)
+        data = task_cache.get_cached(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        task_cache.set_cached(key, response.data)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = resource_etag(request, self.get_queryset(), kwargs['pk'], ('comments', 'history'))
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+
+        key = task_cache.detail_cache_key(kwargs['pk'], request)
+        data = task_cache.get_cached(key)
+        if data is not None:
+            return set_etag(Response(data), etag)
+        response = super().retrieve(request, *args, **kwargs)
+        task_cache.set_cached(key, response.data)
+        return set_etag(response, etag)
+
     def perform_create(self, serializer):
         # Assign user as creator
         task = serializer.save(created_by=self.request.user)
+        publish_task_events([task.id], "created")
         # exec celery task
         send_task_notification.delay(task.id, "created")
 
     def perform_update(self, serializer):
         # Assign user who performs update
         instance = serializer.save(updated_by=self.request.user)
+        publish_task_events([instance.id], "updated")
         # exec celery task
         send_task_notification.delay(instance.id, "updated")
 
     # override method to peroform celery task
     def perform_destroy(self, instance):
         task_id = instance.id
+        # recipients are resolved before the task and its assignments are gone
+        title, recipient_ids = task_recipients([task_id])[task_id]
+        audiences = task_audiences([task_id])
         instance.delete()
+        publish_task_events([task_id], "deleted", audiences)
         # exec celery task
-        send_task_notification.delay(task_id, "deleted")
+        send_task_notification.delay(task_id, "deleted", title=title, recipient_ids=list(recipient_ids))
 
 
+    # GET /api/tasks/export/
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        # same filters, search and ordering as the list, without pagination
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"output must be one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        asynchronous = isinstance(request._request, ASGIRequest)
+        return stream_export(queryset, output, settings.TASKS_EXPORT_CHUNK_SIZE, asynchronous)
+
+    # GET /api/tasks/stats/
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        # maintained counters (see apps/tasks/stats.py): no scan of the tasks
+        return Response(task_stats())
+
     # POST /api/tasks/{id}/assign/
     @action(detail=True, methods=["post"])
     def assign(self, request, pk=None):
         task = self.get_object()
         users_ids = request.data.get("assigned_to", [])
-        for user_id in users_ids:
-            TaskAssignment.objects.create(
-                task=task,
-                user_id=user_id,
-                assigned_by=request.user
-            )
+        role = request.data.get("role", "contributor")
+        if users_ids:
+            # same path as bulk/assign: users already assigned are skipped
+            serializer = BulkAssignSerializer(data={
+                "task_ids": [task.pk],
+                "users": [{"id": user_id, "role": role} for user_id in users_ids],
+            })
+            serializer.is_valid(raise_exception=True)
+            users = serializer.validated_data["users"]
+            bulk_assign_users([task.pk], {user["id"]: user["role"] for user in users}, request.user)
         return Response({"detail": "Users assigned successfully"})
     
     # POST and GET /api/tasks/{id}/comments/
     @action(detail=True, methods=["get", "post"], url_path="comments")
     def comments(self, request, pk=None):
-        task = self.get_object()
-
         if request.method == "POST":
+            task = self.get_object()
             serializer = CommentSerializer(data=request.data)
             if serializer.is_valid():
                 serializer.save(author=request.user, task=task)
+                publish_task_events([task.pk], "commented")
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        # GET
-        comments = task.comments.all()
+        # GET, answered with a 304 before loading anything when the client is up to date
+        etag = resource_etag(request, self.get_queryset(), pk, ('comments',))
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+        if etag is None:
+            self.get_object()  # 404
+        comments = Comment.objects.filter(task_id=pk).select_related('author').order_by('-created_at', '-id')
+        if self.use_cursor_pagination():
+            paginator = CommentsCursorPagination()
+            page = paginator.paginate_queryset(comments, request, view=self)
+            response = paginator.get_paginated_response(CommentSerializer(page, many=True).data)
+            return set_etag(response, etag)
         serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        return set_etag(Response(serializer.data), etag)
     
     # GET /api/tasks/{id}/history/
     @action(detail=True, methods=["get"])
     def history(self, request, pk=None):
-        task = self.get_object()
-        history = task.history.all()
+        etag = resource_etag(request, self.get_queryset(), pk, ('history',))
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+        if etag is None:
+            self.get_object()  # 404
+        history = TaskHistory.objects.filter(task_id=pk).select_related('changed_by').order_by('-changed_at', '-id')
+        if self.use_cursor_pagination():
+            paginator = HistoryCursorPagination()
+            page = paginator.paginate_queryset(history, request, view=self)
+            response = paginator.get_paginated_response(TaskHistorySerializer(page, many=True).data)
+            return set_etag(response, etag)
         serializer = TaskHistorySerializer(history, many=True) 
-        return Response(serializer.data)
\ No newline at end of file
+        return set_etag(Response(serializer.data), etag)
+
+    # GET /api/tasks/{id}/tree/
+    @action(detail=True, methods=["get"])
+    def tree(self, request, pk=None):
+        # one recursive query loads the whole subtree (see apps/tasks/tree.py)
+        depth = request.query_params.get("depth")
+        if depth is not None and not depth.isdigit():
+            return Response({"detail": "depth must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if not pk.isdigit():
+            raise Http404
+        root = task_tree(
+            int(pk),
+            include_archived=request.query_params.get("include_archived") == "true",
+            max_depth=int(depth) if depth is not None else None,
+        )
+        if root is None:
+            raise Http404
+        return Response(root)
+
+    # GET/POST/DELETE /api/tasks/{id}/dependencies/
+    @action(detail=True, methods=["get", "post", "delete"])
+    def dependencies(self, request, pk=None):
+        task = self.get_object()
+        if request.method == "GET":
+            def summary(queryset):
+                return list(queryset.order_by("id").values("id", "title", "status"))
+            return Response({
+                "depends_on": summary(Task.objects.filter(dependents__task=task)),
+                "dependents": summary(Task.objects.filter(dependencies__depends_on=task)),
+            })
+
+        serializer = DependenciesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        depends_on = serializer.validated_data["depends_on"]
+        error = self.check_batch_size(len(depends_on))
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == "DELETE":
+            return Response({"removed": remove_dependencies(task.pk, depends_on)})
+        try:
+            added = add_dependencies(task.pk, depends_on, request.user)
+        except DependencyCycle as exc:
+            return Response({"depends_on": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"added": added}, status=status.HTTP_201_CREATED if added else status.HTTP_200_OK)
+
+    def dependency_graph(self, request):
+        """Graph of ?task= and its upstream tasks, or the whole graph. Returns (graph, error response)."""
+        root = request.query_params.get("task")
+        if root is None:
+            return DependencyGraph.load(), None
+        if not root.isdigit() or not Task.objects.filter(pk=root).exists():
+            return None, Response({"detail": "task must be an existing task id."}, status=status.HTTP_400_BAD_REQUEST)
+        return DependencyGraph.load(int(root)), None
+
+    # GET /api/tasks/dependencies/order/
+    @action(detail=False, methods=["get"], url_path="dependencies/order")
+    def dependency_order(self, request):
+        graph, error = self.dependency_graph(request)
+        if error:
+            return error
+        order = graph.topological_order()
+        return Response({"count": len(order), "order": order})
+
+    # GET /api/tasks/dependencies/critical-path/
+    @action(detail=False, methods=["get"], url_path="dependencies/critical-path")
+    def critical_path(self, request):
+        graph, error = self.dependency_graph(request)
+        if error:
+            return error
+        hours, path = graph.critical_path()
+        return Response({
+            "estimated_hours": f"{hours:.2f}",
+            "tasks": [
+                {"id": task_id, "title": graph.tasks[task_id][0], "estimated_hours": f"{graph.tasks[task_id][2]:.2f}"}
+                for task_id in path
+            ],
+        })
+
+    # GET /api/tasks/dependencies/unblocked/
+    @action(detail=False, methods=["get"], url_path="dependencies/unblocked")
+    def unblocked(self, request):
+        queryset = self.with_related(unblocked_tasks()).order_by("-updated_at", "-id")
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    def check_batch(self, items, kind="a JSON list"):
+        if not isinstance(items, list) or not items:
+            return f"Expected {kind} with at least one item."
+        return self.check_batch_size(len(items))
+
+    def check_batch_size(self, size):
+        if size > settings.TASKS_BULK_MAX_ITEMS:
+            return f"A batch can contain at most {settings.TASKS_BULK_MAX_ITEMS} items."
+        return None
+
+    def validate_bulk_items(self, items, serializer_class, partial=False):
+        """
+        Validate every item of a batch; returns (valid, errors): valid is a list of
+        (index, validated_data), errors a list of {"index", "errors"}.
+        """
+        valid, errors = [], []
+        for index, item in enumerate(items):
+            serializer = serializer_class(data=item, partial=partial)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append(item_error(index, serializer.errors))
+        return valid, errors
+
+    def bulk_response(self, key, ids, errors, success_status):
+        errors = sorted(errors, key=lambda error: error["index"])
+        if errors and not ids:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = success_status
+        return Response({key: ids, "errors": errors}, status=response_status)
+
+    # POST and PATCH /api/tasks/bulk/
+    @action(detail=False, methods=["post", "patch"], url_path="bulk")
+    def bulk(self, request):
+        items = request.data
+        error = self.check_batch(items)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == "POST":
+            valid, errors = self.validate_bulk_items(items, TaskBulkItemSerializer)
+            created, create_errors = bulk_create_tasks(valid, request.user)
+            return self.bulk_response("created", created, errors + create_errors, status.HTTP_201_CREATED)
+        valid, errors = self.validate_bulk_items(items, TaskBulkUpdateItemSerializer, partial=True)
+        updated, update_errors = bulk_update_tasks(valid, request.user)
+        return self.bulk_response("updated", updated, errors + update_errors, status.HTTP_200_OK)
+
+    # POST /api/tasks/bulk/archive/
+    @action(detail=False, methods=["post"], url_path="bulk/archive")
+    def bulk_archive(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        error = self.check_batch(ids, kind='"ids", a list of task ids,')
+        if error is None and not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            error = "Task ids must be integers."
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        archived, errors = bulk_archive_tasks(ids, request.user)
+        return self.bulk_response("archived", archived, errors, status.HTTP_200_OK)
+
+    # POST /api/tasks/bulk/assign/
+    @action(detail=False, methods=["post"], url_path="bulk/assign")
+    def bulk_assign(self, request):
+        serializer = BulkAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        task_ids = serializer.validated_data["task_ids"]
+        roles = {user["id"]: user["role"] for user in serializer.validated_data["users"]}
+        error = self.check_batch_size(len(task_ids) * len(roles))
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = bulk_assign_users(task_ids, roles, request.user)
+        return Response({"assigned": [{"task": task_id, "user": user_id} for task_id, user_id in created]})
+
+    # POST /api/tasks/bulk/unassign/
+    @action(detail=False, methods=["post"], url_path="bulk/unassign")
+    def bulk_unassign(self, request):
+        serializer = BulkUnassignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        task_ids = serializer.validated_data["task_ids"]
+        user_ids = serializer.validated_data["user_ids"]
+        error = self.check_batch_size(len(task_ids) * len(user_ids))
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        removed = bulk_unassign_users(task_ids, user_ids, request.user)
+        return Response({"unassigned": [{"task": task_id, "user": user_id} for task_id, user_id in removed]})
\ No newline at end of file
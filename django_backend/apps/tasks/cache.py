@@ -0,0 +1,86 @@
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+
+# Version keys: bumping one orphans every cached response built under the old
+# value, which then simply expires.
+# - the collection version covers every task list response
+# - a task version covers the detail responses and the HTML list row of that task
+COLLECTION_VERSION_KEY = "tasks:version:collection"
+TASK_VERSION_KEY = "tasks:version:task:{task_id}"
+
+# {% cache %} fragment of a task's row in the HTML list, varying on the task id
+# and version (apps/tasks/templates/tasks_list.html)
+ROW_FRAGMENT = "task_row"
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def get_version(key):
+    """
+    Current value of a version key. A missing (never set or evicted) version is
+    replaced by a new random one, so it can never match stale entries.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def task_versions(task_ids):
+    """Current version of each task, {task_id: version}, in one round trip unless some are missing."""
+    keys = {TASK_VERSION_KEY.format(task_id=task_id): task_id for task_id in task_ids}
+    found = cache.get_many(keys)
+    return {task_id: found[key] if key in found else get_version(key) for key, task_id in keys.items()}
+
+
+def cached_rows(versions):
+    """Ids of the tasks whose row fragment is cached under their current version ({task_id: version})."""
+    keys = {make_template_fragment_key(ROW_FRAGMENT, [task_id, version]): task_id for task_id, version in versions.items()}
+    return {keys[key] for key in cache.get_many(keys)}
+
+
+def url_digest(request):
+    return hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+
+
+def list_cache_key(request):
+    """Key of a list response: the full URL (filters, page...) under the collection version."""
+    return f"tasks:list:{get_version(COLLECTION_VERSION_KEY)}:{url_digest(request)}"
+
+
+def detail_cache_key(task_id, request):
+    """Key of a detail response: the full URL under the task version."""
+    version = get_version(TASK_VERSION_KEY.format(task_id=task_id))
+    return f"tasks:detail:{task_id}:{version}:{url_digest(request)}"
+
+
+def get_cached(key):
+    return cache.get(key)
+
+
+def set_cached(key, data):
+    cache.set(key, data, timeout=settings.TASK_CACHE_TIMEOUT)
+
+
+def bump_versions(task_ids):
+    versions = {TASK_VERSION_KEY.format(task_id=task_id): new_version() for task_id in task_ids}
+    versions[COLLECTION_VERSION_KEY] = new_version()
+    cache.set_many(versions, timeout=None)
+
+
+def invalidate_tasks(task_ids):
+    """
+    Invalidate the cached detail responses of `task_ids` and every cached list.
+
+    Runs once the current transaction commits, so a concurrent request can't
+    cache the pre-commit state under the new versions.
+    """
+    task_ids = list(task_ids)
+    transaction.on_commit(lambda: bump_versions(task_ids))
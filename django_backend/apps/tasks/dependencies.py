@@ -0,0 +1,176 @@
+import heapq
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from .models import OPEN_STATUSES, Task, TaskDependency
+
+# pg_advisory_xact_lock key serializing dependency writes: two transactions
+# adding A -> B and B -> A at the same time would each see no cycle
+DEPENDENCY_LOCK_KEY = 7_305_001
+
+# Is `task` reachable from one of `depends_on` by following existing
+# dependencies? Only the tasks upstream of `depends_on` are visited, and the
+# walk stops at the first match (UNION drops the tasks already visited).
+CYCLE_SQL = """
+WITH RECURSIVE upstream(id) AS (
+    SELECT unnest(%(depends_on)s::bigint[])
+    UNION
+    SELECT dependency.depends_on_id
+    FROM tasks_taskdependency dependency JOIN upstream ON dependency.task_id = upstream.id
+)
+SELECT 1 FROM upstream WHERE id = %(task)s LIMIT 1
+"""
+
+# edges of the whole graph, or only of what `root` transitively depends on
+ALL_EDGES = "edges(task_id, depends_on_id) AS (SELECT task_id, depends_on_id FROM tasks_taskdependency)"
+UPSTREAM_EDGES = """edges(task_id, depends_on_id) AS (
+    SELECT task_id, depends_on_id FROM tasks_taskdependency WHERE task_id = %(root)s
+    UNION
+    SELECT dependency.task_id, dependency.depends_on_id
+    FROM tasks_taskdependency dependency JOIN edges ON dependency.task_id = edges.depends_on_id
+)"""
+
+# one row per task of the graph, with the ids of the tasks it depends on
+ADJACENCY_SQL = """
+WITH RECURSIVE {edges},
+nodes(id) AS (SELECT task_id FROM edges UNION SELECT depends_on_id FROM edges UNION SELECT %(root)s::bigint)
+SELECT task.id, task.title, task.status, task.estimated_hours,
+       array_remove(array_agg(edges.depends_on_id), NULL)
+FROM nodes
+JOIN tasks_task task ON task.id = nodes.id
+LEFT JOIN edges ON edges.task_id = task.id
+GROUP BY task.id
+"""
+
+
+class DependencyCycle(Exception):
+    """Raised when a new dependency would make the graph cyclic."""
+
+
+def add_dependencies(task_id, depends_on_ids, user):
+    """
+    Make `task_id` depend on every task of `depends_on_ids` (existing edges are kept).
+
+    New edges are checked for a cycle against the current graph, all in one
+    query walking only the tasks upstream of the new dependencies (then one
+    query per dependency to name the culprits, if any). Writes are serialized with
+    a transaction-level advisory lock, so concurrent additions can't close a
+    cycle together. Raises DependencyCycle naming the offending ids.
+    Returns the ids of the dependencies added.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [DEPENDENCY_LOCK_KEY])
+        cursor.execute(CYCLE_SQL, {"task": task_id, "depends_on": list(depends_on_ids)})
+        if cursor.fetchone():
+            cycles = []
+            for depends_on_id in depends_on_ids:
+                cursor.execute(CYCLE_SQL, {"task": task_id, "depends_on": [depends_on_id]})
+                if cursor.fetchone():
+                    cycles.append(depends_on_id)
+            raise DependencyCycle(f"Task {task_id} can't depend on {cycles}: it would create a dependency cycle.")
+
+        existing = set(
+            TaskDependency.objects.filter(task_id=task_id, depends_on_id__in=depends_on_ids)
+            .values_list("depends_on_id", flat=True)
+        )
+        added = [depends_on_id for depends_on_id in depends_on_ids if depends_on_id not in existing]
+        TaskDependency.objects.bulk_create([
+            TaskDependency(task_id=task_id, depends_on_id=depends_on_id, created_by=user) for depends_on_id in added
+        ])
+    return added
+
+
+def remove_dependencies(task_id, depends_on_ids):
+    """Remove dependencies of `task_id` with one DELETE; returns the ids removed."""
+    dependencies = TaskDependency.objects.filter(task_id=task_id, depends_on_id__in=depends_on_ids)
+    removed = list(dependencies.values_list("depends_on_id", flat=True))
+    dependencies.delete()
+    return removed
+
+
+def unblocked_tasks():
+    """Open tasks that have dependencies, all of them done."""
+    dependencies = TaskDependency.objects.filter(task=OuterRef("pk"))
+    return (
+        Task.objects.active()
+        .filter(status__in=OPEN_STATUSES)
+        .filter(Exists(dependencies))
+        .exclude(Exists(dependencies.exclude(depends_on__status="done")))
+    )
+
+
+class DependencyGraph:
+    """
+    Dependency graph held in memory as adjacency lists.
+
+    Loaded in bulk, with a single query returning every task of the graph and
+    the tasks it depends on, so graphs with hundreds of thousands of edges are
+    walked without a query per task. Use DependencyGraph.load().
+
+    Attributes:
+        tasks (dict): task id -> (title, status, estimated_hours).
+        dependencies (dict): task id -> ids of the tasks it depends on.
+        dependents (dict): task id -> ids of the tasks depending on it.
+    """
+    def __init__(self, tasks, dependencies):
+        self.tasks = tasks
+        self.dependencies = dependencies
+        self.dependents = defaultdict(list)
+        for task_id, depends_on_ids in dependencies.items():
+            for depends_on_id in depends_on_ids:
+                self.dependents[depends_on_id].append(task_id)
+
+    @classmethod
+    def load(cls, root=None):
+        """The whole graph, or only `root` and what it (transitively) depends on."""
+        edges = UPSTREAM_EDGES if root is not None else ALL_EDGES
+        tasks, dependencies = {}, {}
+        with connection.cursor() as cursor:
+            cursor.execute(ADJACENCY_SQL.format(edges=edges), {"root": root})
+            for task_id, title, status, hours, depends_on_ids in cursor.fetchall():
+                tasks[task_id] = (title, status, hours)
+                dependencies[task_id] = depends_on_ids
+        return cls(tasks, dependencies)
+
+    def topological_order(self):
+        """
+        Task ids, every task after all the tasks it depends on (Kahn's algorithm,
+        lowest id first among the tasks ready at the same time).
+        """
+        waiting = {task_id: len(self.dependencies[task_id]) for task_id in self.tasks}
+        ready = [task_id for task_id, count in waiting.items() if not count]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            task_id = heapq.heappop(ready)
+            order.append(task_id)
+            for dependent in self.dependents[task_id]:
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    heapq.heappush(ready, dependent)
+        return order
+
+    def critical_path(self):
+        """
+        The chain of dependencies with the most estimated hours: the shortest
+        time in which all the tasks can be finished.
+
+        Returns (hours, [task ids from the first task to do to the last]).
+        """
+        finish, previous = {}, {}
+        for task_id in self.topological_order():
+            start, before = Decimal(0), None
+            for depends_on_id in self.dependencies[task_id]:
+                if finish[depends_on_id] > start or before is None:
+                    start, before = finish[depends_on_id], depends_on_id
+            finish[task_id] = start + (self.tasks[task_id][2] or Decimal(0))
+            previous[task_id] = before
+        if not finish:
+            return Decimal(0), []
+
+        last = max(finish, key=finish.get)
+        path = [last]
+        while previous[path[-1]] is not None:
+            path.append(previous[path[-1]])
+        return finish[last], path[::-1]
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import logging
+import weakref
+from collections import defaultdict
+import redis.asyncio
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.common.redis import get_redis
+from .models import TaskAssignment
+
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channels change events are published on: one per task, and
+# one per user and per team for the tasks assigned to them
+TASK_CHANNEL = "tasks:events:task:{id}"
+USER_CHANNEL = "tasks:events:user:{id}"
+TEAM_CHANNEL = "tasks:events:team:{id}"
+CHANNELS = {"task": TASK_CHANNEL, "user": USER_CHANNEL, "team": TEAM_CHANNEL}
+
+# sent to a subscriber that fell too far behind instead of the events it missed
+RESYNC = json.dumps({"event": "resync"})
+
+
+def task_audiences(task_ids):
+    """
+    Channels each task's events go to: its own, and those of its assignees
+    and of their teams. One query whatever the number of tasks.
+
+    Returns {task_id: {channel, ...}}.
+    """
+    audiences = {task_id: {TASK_CHANNEL.format(id=task_id)} for task_id in task_ids}
+    assignments = TaskAssignment.objects.filter(task_id__in=audiences).values_list("task_id", "user_id", "user__team_id")
+    for task_id, user_id, team_id in assignments:
+        audiences[task_id].add(USER_CHANNEL.format(id=user_id))
+        if team_id is not None:
+            audiences[task_id].add(TEAM_CHANNEL.format(id=team_id))
+    return audiences
+
+
+def publish_task_events(task_ids, event, audiences=None):
+    """
+    Publish one compact `event` per task ({"event", "task", "at"}) once the
+    current transaction commits, so subscribers refetch committed data.
+
+    `audiences` ({task_id: channels}) can be given for tasks that are about to
+    disappear or lose assignees, otherwise it is resolved with task_audiences().
+    Publishing is best effort: a Redis error is logged, the write still succeeds.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    if audiences is None:
+        audiences = task_audiences(task_ids)
+    at = timezone.now().isoformat()
+    messages = [
+        (channel, json.dumps({"event": event, "task": task_id, "at": at}))
+        for task_id in task_ids
+        for channel in audiences.get(task_id, ())
+    ]
+    transaction.on_commit(lambda: publish(messages), robust=True)
+
+
+def publish(messages):
+    """PUBLISH every (channel, message) in a single round trip."""
+    pipe = get_redis().pipeline(transaction=False)
+    for channel, message in messages:
+        pipe.publish(channel, message)
+    pipe.execute()
+
+
+def requested_channels(params):
+    """
+    Channels named by the ?task= / ?user= / ?team= query parameters (each
+    repeatable or comma separated). Raises ValueError on a non numeric id.
+    """
+    channels = set()
+    for kind, channel in CHANNELS.items():
+        for value in params.getlist(kind):
+            for pk in filter(None, value.split(",")):
+                if not pk.isdigit():
+                    raise ValueError(f"{kind} must be a list of ids.")
+                channels.add(channel.format(id=int(pk)))
+    return channels
+
+
+class Subscription:
+    """
+    Events of some channels, queued for one client.
+
+    Attributes:
+        channels (set): the channels subscribed to.
+        queue (asyncio.Queue): messages waiting to be sent to the client.
+        last (str): the last message queued.
+    """
+    def __init__(self, channels):
+        self.channels = set(channels)
+        self.queue = asyncio.Queue(maxsize=settings.TASK_EVENTS_QUEUE_SIZE)
+        self.last = None
+
+    def put(self, message):
+        # an event published on several of the channels (a task, its assignee
+        # and their team...) arrives once per channel, back to back
+        if message == self.last:
+            return
+        self.last = message
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # a slow client gets a single "resync" instead of an unbounded backlog
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    def end(self):
+        # None ends the stream, ahead of anything still queued
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class Broadcaster:
+    """
+    Fans the events of Redis pub/sub out to the clients of this process.
+
+    Whatever the number of connected clients, the process holds a single
+    Redis connection subscribed to the union of their channels, and a single
+    reader task dispatching each message to the subscriptions of its channel.
+    Idle clients cost a queue each, no query and no extra connection.
+    Use get_broadcaster().
+
+    Attributes:
+        subscriptions (dict): channel -> subscriptions of that channel.
+        listening (set): channels the Redis connection is subscribed to.
+        closed (bool): the connection was lost, a new broadcaster takes over.
+    """
+    def __init__(self, client):
+        self.pubsub = client.pubsub()
+        self.subscriptions = defaultdict(set)
+        self.listening = set()
+        self.lock = asyncio.Lock()
+        self.reader = None
+        self.closed = False
+
+    async def subscribe(self, channels):
+        subscription = Subscription(channels)
+        async with self.lock:
+            if self.closed:
+                subscription.end()
+                return subscription
+            for channel in subscription.channels:
+                self.subscriptions[channel].add(subscription)
+            new = subscription.channels - self.listening
+            if new:
+                await self.pubsub.subscribe(*new)
+                self.listening |= new
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self.read())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Drop a subscription; the Redis side is pruned in the background."""
+        for channel in subscription.channels:
+            subscribers = self.subscriptions.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscriptions[channel]
+        if not self.closed:
+            asyncio.get_running_loop().create_task(self.prune())
+
+    async def prune(self):
+        # channels re-subscribed in the meantime are kept
+        async with self.lock:
+            idle = self.listening - self.subscriptions.keys()
+            if idle:
+                await self.pubsub.unsubscribe(*idle)
+                self.listening -= idle
+
+    async def read(self):
+        try:
+            while True:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+                if message is None or message["type"] != "message":
+                    continue
+                for subscription in self.subscriptions.get(message["channel"], ()):
+                    subscription.put(message["data"])
+        except redis.RedisError:
+            # connection lost: end every stream, clients reconnect and resubscribe
+            logger.exception("Task events reader stopped")
+            self.closed = True
+            for subscribers in self.subscriptions.values():
+                for subscription in subscribers:
+                    subscription.end()
+            self.subscriptions.clear()
+            await self.pubsub.aclose()
+
+
+# one broadcaster per event loop (the ASGI server runs one loop per process)
+_broadcasters = weakref.WeakKeyDictionary()
+
+
+def get_broadcaster():
+    loop = asyncio.get_running_loop()
+    broadcaster = _broadcasters.get(loop)
+    if broadcaster is None or broadcaster.closed:
+        broadcaster = Broadcaster(redis.asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True))
+        _broadcasters[loop] = broadcaster
+    return broadcaster
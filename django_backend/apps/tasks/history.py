@@ -0,0 +1,46 @@
+from .models import Task, TaskHistory
+
+
+def as_history_value(value):
+    return None if value is None else str(value)
+
+
+def history_entry(task_id, field, old, new, changed_by=None):
+    """Build an unsaved TaskHistory row; callers write them with bulk_create."""
+    return TaskHistory(
+        task_id=task_id,
+        changed_by=changed_by,
+        field_changed=field,
+        old_value=as_history_value(old),
+        new_value=as_history_value(new),
+    )
+
+
+def task_changes(instance, update_fields=None):
+    """
+    Compare a task against the values it was loaded with.
+
+    Uses the snapshot stored by Task.from_db() (or by the previous save), so no
+    query is needed. Instances built by hand with an existing pk have no
+    snapshot and fall back to reading the stored values once.
+
+    Returns a list of (field, old, new) tuples.
+    """
+    fields = Task.HISTORY_FIELDS
+    if update_fields is not None:
+        fields = [
+            field for field in fields
+            if field in update_fields or field.removesuffix("_id") in update_fields
+        ]
+    if not fields:
+        return []
+
+    previous = getattr(instance, "_loaded_values", None)
+    if previous is None:
+        previous = Task.objects.filter(pk=instance.pk).values(*fields).first() or {}
+
+    return [
+        (field, previous[field], getattr(instance, field))
+        for field in fields
+        if field in previous and previous[field] != getattr(instance, field)
+    ]
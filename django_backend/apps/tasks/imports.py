@@ -0,0 +1,249 @@
+import json
+from django.db import DataError, IntegrityError, connection, transaction
+from django.utils import timezone
+from apps.common.db import copy_rows
+from .cache import invalidate_tasks
+from .models import PRIORITY_CHOICES, STATUS_CHOICES
+
+# Bulk import (see the import_tasks command): each chunk of a file is COPYed
+# into a temporary staging table of text columns, then merged into the real
+# tables with set-based INSERT ... SELECT ... ON CONFLICT statements. Users,
+# tags and tasks are resolved by natural key (username, tag name, external_id);
+# rows whose references or required values are missing are skipped. Rows the
+# database refuses (a malformed date, a number out of range...) are isolated
+# and rejected one by one, and the rest of the chunk is merged.
+
+# staged task rows TASKS_UPSERT writes; the statements run after it only
+# follow these, so a skipped row changes nothing
+TASK_ROW_WRITTEN = """(
+    staged.external_id IS NOT NULL AND staged.title IS NOT NULL
+    AND staged.due_date IS NOT NULL AND staged.estimated_hours IS NOT NULL
+    AND COALESCE(staged.status, 'todo') = ANY(%(statuses)s)
+    AND COALESCE(staged.priority, 'medium') = ANY(%(priorities)s)
+    AND EXISTS (SELECT FROM users_user AS creator WHERE creator.username = staged.created_by)
+)"""
+
+TASKS_UPSERT = f"""
+INSERT INTO tasks_task (
+    external_id, title, description, status, priority, due_date, estimated_hours,
+    actual_hours, created_by_id, metadata, is_archived, created_at, updated_at
+)
+SELECT DISTINCT ON (staged.external_id)
+    staged.external_id, staged.title, COALESCE(staged.description, ''),
+    COALESCE(staged.status, 'todo'), COALESCE(staged.priority, 'medium'),
+    staged.due_date::timestamptz, staged.estimated_hours::numeric, staged.actual_hours::numeric,
+    creator.id, COALESCE(staged.metadata::jsonb, '{{}}'), COALESCE(staged.is_archived::boolean, false),
+    %(now)s, %(now)s
+FROM import_staging AS staged
+JOIN users_user AS creator ON creator.username = staged.created_by
+WHERE {TASK_ROW_WRITTEN}
+ORDER BY staged.external_id, staged.line DESC
+ON CONFLICT (external_id) DO UPDATE SET
+    title = EXCLUDED.title,
+    description = EXCLUDED.description,
+    status = EXCLUDED.status,
+    priority = EXCLUDED.priority,
+    due_date = EXCLUDED.due_date,
+    estimated_hours = EXCLUDED.estimated_hours,
+    actual_hours = EXCLUDED.actual_hours,
+    created_by_id = EXCLUDED.created_by_id,
+    metadata = EXCLUDED.metadata,
+    is_archived = EXCLUDED.is_archived,
+    updated_at = EXCLUDED.updated_at
+RETURNING id
+"""
+
+# parents are resolved once the chunk is in, so they may come later in the
+# same chunk (or in any earlier one)
+TASK_PARENTS_UPDATE = f"""
+UPDATE tasks_task AS task SET parent_task_id = parent.id
+FROM import_staging AS staged
+JOIN tasks_task AS parent ON parent.external_id = staged.parent
+WHERE {TASK_ROW_WRITTEN}
+  AND task.external_id = staged.external_id
+  AND task.id <> parent.id
+  AND task.parent_task_id IS DISTINCT FROM parent.id
+"""
+
+TASK_TAG_NAMES_INSERT = f"""
+INSERT INTO tasks_tag (name, description)
+SELECT DISTINCT btrim(tag_name.value), ''
+FROM import_staging AS staged, unnest(string_to_array(staged.tags, ',')) AS tag_name(value)
+WHERE {TASK_ROW_WRITTEN}
+  AND btrim(tag_name.value) <> ''
+ON CONFLICT (name) DO NOTHING
+"""
+
+TASK_TAGS_INSERT = f"""
+INSERT INTO tasks_task_tags (task_id, tag_id)
+SELECT DISTINCT task.id, tag.id
+FROM import_staging AS staged
+CROSS JOIN unnest(string_to_array(staged.tags, ',')) AS tag_name(value)
+JOIN tasks_task AS task ON task.external_id = staged.external_id
+JOIN tasks_tag AS tag ON tag.name = btrim(tag_name.value)
+WHERE {TASK_ROW_WRITTEN}
+ON CONFLICT (task_id, tag_id) DO NOTHING
+"""
+
+TAGS_UPSERT = """
+INSERT INTO tasks_tag (name, description)
+SELECT DISTINCT ON (staged.name) staged.name, COALESCE(staged.description, '')
+FROM import_staging AS staged
+WHERE staged.name IS NOT NULL
+ORDER BY staged.name, staged.line DESC
+ON CONFLICT (name) DO UPDATE SET description = EXCLUDED.description
+RETURNING NULL
+"""
+
+ASSIGNMENTS_UPSERT = """
+INSERT INTO tasks_taskassignment (task_id, user_id, role, assigned_by_id, assigned_at)
+SELECT DISTINCT ON (task.id, assignee.id)
+    task.id, assignee.id, COALESCE(staged.role, 'contributor'), assigner.id, %(now)s
+FROM import_staging AS staged
+JOIN tasks_task AS task ON task.external_id = staged.task
+JOIN users_user AS assignee ON assignee.username = staged.username
+LEFT JOIN users_user AS assigner ON assigner.username = staged.assigned_by
+ORDER BY task.id, assignee.id, staged.line DESC
+ON CONFLICT (task_id, user_id) DO UPDATE SET role = EXCLUDED.role
+RETURNING task_id
+"""
+
+COMMENTS_INSERT = """
+INSERT INTO tasks_comment (task_id, author_id, description, created_at)
+SELECT task.id, author.id, staged.description, COALESCE(staged.created_at::timestamptz, %(now)s)
+FROM import_staging AS staged
+JOIN tasks_task AS task ON task.external_id = staged.task
+JOIN users_user AS author ON author.username = staged.author
+WHERE staged.description IS NOT NULL
+RETURNING task_id
+"""
+
+# kind -> columns of the file (and of the staging table), the statement that
+# writes the rows (its RETURNING gives the affected task ids) and the
+# statements run after it
+IMPORT_KINDS = {
+    "tasks": {
+        "columns": [
+            "external_id", "title", "description", "status", "priority", "due_date",
+            "estimated_hours", "actual_hours", "created_by", "parent", "tags", "metadata",
+            "is_archived",
+        ],
+        "upsert": TASKS_UPSERT,
+        "then": [TASK_PARENTS_UPDATE, TASK_TAG_NAMES_INSERT, TASK_TAGS_INSERT],
+    },
+    "tags": {
+        "columns": ["name", "description"],
+        "upsert": TAGS_UPSERT,
+        "then": [],
+    },
+    "assignments": {
+        "columns": ["task", "username", "role", "assigned_by"],
+        "upsert": ASSIGNMENTS_UPSERT,
+        "then": [],
+    },
+    "comments": {
+        "columns": ["task", "author", "description", "created_at"],
+        "upsert": COMMENTS_INSERT,
+        "then": [],
+    },
+}
+
+
+def staging_value(value):
+    """Text form of a file value: lists (NDJSON tags) are comma joined, objects JSON encoded."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, list):
+        return ",".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return str(value)
+
+
+def merge_staged(cursor, spec, params):
+    """Run the statements of an import kind over import_staging; returns (rows written, task ids)."""
+    cursor.execute(spec["upsert"], params)
+    task_ids = {task_id for task_id, in cursor.fetchall() if task_id is not None}
+    written = cursor.rowcount
+    for statement in spec["then"]:
+        cursor.execute(statement, params)
+    return written, task_ids
+
+
+def merge_isolating(cursor, spec, params, lines, rejected):
+    """
+    Merge the chunk rows of `lines` (a range of line numbers, kept in
+    import_rows) in a savepoint; if the database refuses them, split the range
+    in two and retry each half, down to the single bad lines, which are added
+    to `rejected` as (line, error).
+
+    Halves are merged in line order, so the last row of an external_id still wins.
+    Returns (rows written, task ids).
+    """
+    try:
+        with transaction.atomic():
+            cursor.execute(
+                "CREATE TEMPORARY TABLE import_staging ON COMMIT DROP AS "
+                "SELECT * FROM import_rows WHERE line BETWEEN %s AND %s",
+                [lines[0], lines[-1]],
+            )
+            written, task_ids = merge_staged(cursor, spec, params)
+            cursor.execute("DROP TABLE import_staging")
+            return written, task_ids
+    except (DataError, IntegrityError) as error:
+        if len(lines) == 1:
+            rejected.append((lines[0], str(error).splitlines()[0]))
+            return 0, set()
+    middle = len(lines) // 2
+    written, task_ids = merge_isolating(cursor, spec, params, lines[:middle], rejected)
+    more_written, more_task_ids = merge_isolating(cursor, spec, params, lines[middle:], rejected)
+    return written + more_written, task_ids | more_task_ids
+
+
+def import_chunk(kind, records, first_line):
+    """
+    Stage and merge one chunk of records (dicts keyed by column name).
+
+    Must run inside a transaction: the staging table is dropped on commit.
+    The whole chunk is merged at once; only when the database refuses it are
+    the bad rows looked for (see merge_isolating).
+    Returns (rows written, [(line, error), ...] of the rejected rows).
+    """
+    spec = IMPORT_KINDS[kind]
+    columns = spec["columns"]
+    params = {
+        "now": timezone.now(),
+        "statuses": [value for value, _ in STATUS_CHOICES],
+        "priorities": [value for value, _ in PRIORITY_CHOICES],
+    }
+    rejected = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMPORARY TABLE IF NOT EXISTS import_staging (line bigint, {}) ON COMMIT DROP".format(
+                ", ".join(f"{column} text" for column in columns)
+            )
+        )
+        copy_rows(cursor, "import_staging", ["line", *columns], (
+            (first_line + offset, *(staging_value(record.get(column)) for column in columns))
+            for offset, record in enumerate(records)
+        ))
+        try:
+            with transaction.atomic():
+                written, task_ids = merge_staged(cursor, spec, params)
+        except (DataError, IntegrityError):
+            cursor.execute("ALTER TABLE import_staging RENAME TO import_rows")
+            lines = range(first_line, first_line + len(records))
+            written, task_ids = merge_isolating(cursor, spec, params, lines, rejected)
+            # the follow-up statements again over all the good rows: a task's
+            # parent, say, may have been merged with the other half
+            cursor.execute(
+                "CREATE TEMPORARY TABLE import_staging ON COMMIT DROP AS "
+                "SELECT * FROM import_rows WHERE line <> ALL(%s)",
+                [[line for line, _ in rejected]],
+            )
+            for statement in spec["then"]:
+                cursor.execute(statement, params)
+            cursor.execute("DROP TABLE import_rows")
+
+    invalidate_tasks(task_ids)
+    return written, rejected
@@ -0,0 +1,152 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from apps.tasks.imports import IMPORT_KINDS, import_chunk
+from apps.tasks.models import ImportCheckpoint
+
+
+class UnreadableLine(ValueError):
+    """An NDJSON line that isn't a JSON object; `text` is the line as read."""
+    def __init__(self, error, text):
+        super().__init__(error)
+        self.text = text
+
+
+def read_records(path, file_format):
+    """
+    Yield the rows of a CSV (with a header line) or NDJSON file as dicts.
+
+    NDJSON yields one item per line of the file, so rows are numbered on its
+    lines: None for a blank line, an UnreadableLine for a line that isn't a
+    JSON object.
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if file_format == "csv":
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if not line.strip():
+                yield None
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as error:
+                yield UnreadableLine(f"Invalid JSON: {error}", line.rstrip("\r\n"))
+                continue
+            if isinstance(record, dict):
+                yield record
+            else:
+                yield UnreadableLine(f"Expected a JSON object, got {type(record).__name__}", line.rstrip("\r\n"))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks, tags, assignments or comments from a CSV or NDJSON file "
+        "with COPY and set-based upserts. Resumes after the last committed chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=IMPORT_KINDS, help="What the file contains")
+        parser.add_argument("path", help="CSV (with a header line) or NDJSON file")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=10000, help="Rows per COPY and transaction")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and import the whole file")
+        parser.add_argument(
+            "--rejected", help="CSV report of the rows that couldn't be read or that the database refused "
+                               "(row, i.e. the line of an NDJSON file, error, record); "
+                               "defaults to the file path + .rejected.csv"
+        )
+
+    def handle(self, *args, **options):
+        kind = options["kind"]
+        path = os.path.abspath(options["path"])
+        if not os.path.isfile(path):
+            raise CommandError(f"File not found: {path}")
+        file_format = options["format"] or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        size = os.path.getsize(path)
+
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=f"{kind}:{path}", defaults={"size": size})
+        if options["restart"]:
+            checkpoint.rows_done, checkpoint.completed_at = 0, None
+        elif checkpoint.completed_at:
+            self.stdout.write(self.style.WARNING(f"{path} was already imported, use --restart to import it again."))
+            return
+        elif checkpoint.rows_done:
+            # e.g. a bad row fixed after a failed run: rows are counted, not
+            # bytes, so resuming stays right as long as no row was added or
+            # removed before the checkpoint
+            changed = " (the file changed since the last run)" if checkpoint.size != size else ""
+            self.stdout.write(self.style.WARNING(f"Resuming after row {checkpoint.rows_done}{changed}."))
+        checkpoint.size = size
+        checkpoint.save()
+
+        report_path = options["rejected"] or f"{path}.rejected.csv"
+        # a resumed run adds to the report of the earlier ones
+        report_mode = "a" if checkpoint.rows_done else "w"
+        report = None
+        records = islice(read_records(path, file_format), checkpoint.rows_done, None)
+        start = time.monotonic()
+        read = written = rejected = 0
+        for chunk in chunked(records, options["chunk_size"]):
+            first_line = checkpoint.rows_done + 1
+            # blank and unreadable lines are staged as empty rows, which every
+            # kind skips, so the line numbers stay those of the file
+            unreadable = [
+                (first_line + offset, str(record), record.text)
+                for offset, record in enumerate(chunk) if isinstance(record, UnreadableLine)
+            ]
+            blank = chunk.count(None)
+            rows = [record if isinstance(record, dict) else {} for record in chunk]
+            try:
+                # the chunk and its checkpoint commit together: a failure
+                # leaves both as they were and the next run retries the chunk
+                with transaction.atomic():
+                    chunk_written, chunk_rejected = import_chunk(kind, rows, first_line)
+                    checkpoint.rows_done += len(chunk)
+                    checkpoint.save(update_fields=["rows_done", "updated_at"])
+            except DatabaseError as error:
+                checkpoint.rows_done = first_line - 1
+                raise CommandError(
+                    f"Rows {first_line}-{first_line + len(chunk) - 1} failed: {error}\n"
+                    f"Rows up to {checkpoint.rows_done} are imported; run the command again to resume."
+                )
+            chunk_rejected = unreadable + [
+                (line, error, json.dumps(rows[line - first_line])) for line, error in chunk_rejected
+            ]
+            if chunk_rejected:
+                if report is None:
+                    report = open(report_path, report_mode, newline="", encoding="utf-8")
+                    writer = csv.writer(report)
+                    if report_mode == "w":
+                        writer.writerow(["row", "error", "record"])
+                writer.writerows(sorted(chunk_rejected))
+                report.flush()
+            written += chunk_written
+            rejected += len(chunk_rejected)
+            read += len(chunk) - blank
+            elapsed = time.monotonic() - start
+            self.stdout.write(f"{checkpoint.rows_done} rows done ({read / elapsed:.0f} rows/s)")
+
+        checkpoint.completed_at = timezone.now()
+        checkpoint.save(update_fields=["completed_at", "updated_at"])
+        if report is not None:
+            report.close()
+            self.stdout.write(self.style.WARNING(f"{rejected} rows rejected, see {report_path}"))
+
+        elapsed = time.monotonic() - start
+        rate = read / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {read} rows read, {written} written, {read - written - rejected} skipped, {rejected} rejected "
+            f"in {elapsed:.1f}s ({rate:.0f} rows/s)"
+        ))
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:18
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+# The trigger keeps search_vector in sync with title (weight A) and description
+# (weight B) on every INSERT and on UPDATEs touching either column.
+SEARCH_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('{config}'::regconfig, coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('{config}'::regconfig, coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task;
+CREATE TRIGGER tasks_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_update();
+
+UPDATE tasks_task SET title = title;
+"""
+
+DROP_SEARCH_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task;
+DROP FUNCTION IF EXISTS tasks_task_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    config = settings.TASK_SEARCH_CONFIG.replace("'", "")
+    schema_editor.execute(SEARCH_TRIGGER_SQL.format(config=config))
+
+
+def drop_search_trigger(apps, schema_editor):
+    schema_editor.execute(DROP_SEARCH_TRIGGER_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_tasktemplate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
@@ -0,0 +1,170 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:45
+
+from django.db import migrations, models
+
+# The dashboard counters (TaskStat) follow every write to tasks and assignments,
+# whatever issues it (ORM saves, bulk updates, raw SQL, COPY): statement-level
+# triggers aggregate the rows a statement changed into one upsert per counter.
+# Deltas go to the slot of the database session (pid mod 8), so concurrent
+# transactions rarely wait on each other's counter rows.
+#
+# Counters: archived (all tasks), status, priority, overdue and team (active
+# tasks; a task counts once per team among its assignees' teams).
+TASK_STATS_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION tasks_task_stats_update() RETURNS trigger AS $$
+DECLARE
+    changes text;
+BEGIN
+    -- rows leaving the counters (-1) and entering them (+1)
+    IF TG_OP = 'INSERT' THEN
+        changes := 'SELECT 1 AS sign, id, status, priority, is_archived FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        changes := 'SELECT -1 AS sign, id, status, priority, is_archived FROM old_rows';
+    ELSE
+        changes := 'SELECT -1 AS sign, id, status, priority, is_archived FROM old_rows '
+                   'UNION ALL SELECT 1, id, status, priority, is_archived FROM new_rows';
+    END IF;
+
+    EXECUTE format($sql$
+        WITH changes AS (%s),
+        deltas AS (
+            SELECT 'archived' AS dimension, is_archived::text AS key, sign FROM changes
+            UNION ALL
+            SELECT 'status', status, sign FROM changes WHERE NOT is_archived
+            UNION ALL
+            SELECT 'priority', priority, sign FROM changes WHERE NOT is_archived
+            UNION ALL
+            SELECT 'overdue', (status = 'overdue')::text, sign FROM changes WHERE NOT is_archived
+            UNION ALL
+            SELECT 'team', teams.team_id::text, changes.sign
+            FROM changes
+            JOIN (
+                SELECT DISTINCT a.task_id, u.team_id
+                FROM tasks_taskassignment a JOIN users_user u ON u.id = a.user_id
+                WHERE a.task_id IN (SELECT id FROM changes) AND u.team_id IS NOT NULL
+            ) teams ON teams.task_id = changes.id
+            WHERE NOT changes.is_archived
+        )
+        INSERT INTO tasks_taskstat (dimension, key, slot, count)
+        SELECT dimension, key, mod(pg_backend_pid(), 8), sum(sign)
+        FROM deltas
+        GROUP BY dimension, key
+        HAVING sum(sign) <> 0
+        ORDER BY dimension, key
+        ON CONFLICT (dimension, key, slot) DO UPDATE SET count = tasks_taskstat.count + EXCLUDED.count
+    $sql$, changes);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- a task enters a team's count with the first assignee of that team and
+-- leaves it with the last one
+CREATE OR REPLACE FUNCTION tasks_taskassignment_stats_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO tasks_taskstat (dimension, key, slot, count)
+        SELECT 'team', pairs.team_id::text, mod(pg_backend_pid(), 8), count(*)
+        FROM (
+            SELECT DISTINCT n.task_id, u.team_id
+            FROM new_rows n
+            JOIN users_user u ON u.id = n.user_id
+            JOIN tasks_task t ON t.id = n.task_id
+            WHERE NOT t.is_archived AND u.team_id IS NOT NULL
+        ) pairs
+        WHERE NOT EXISTS (
+            SELECT 1 FROM tasks_taskassignment a JOIN users_user u ON u.id = a.user_id
+            WHERE a.task_id = pairs.task_id AND u.team_id = pairs.team_id
+              AND NOT EXISTS (SELECT 1 FROM new_rows n WHERE n.id = a.id)
+        )
+        GROUP BY pairs.team_id
+        ORDER BY pairs.team_id::text
+        ON CONFLICT (dimension, key, slot) DO UPDATE SET count = tasks_taskstat.count + EXCLUDED.count;
+    ELSE
+        INSERT INTO tasks_taskstat (dimension, key, slot, count)
+        SELECT 'team', pairs.team_id::text, mod(pg_backend_pid(), 8), -count(*)
+        FROM (
+            SELECT DISTINCT o.task_id, u.team_id
+            FROM old_rows o
+            JOIN users_user u ON u.id = o.user_id
+            JOIN tasks_task t ON t.id = o.task_id
+            WHERE NOT t.is_archived AND u.team_id IS NOT NULL
+        ) pairs
+        WHERE NOT EXISTS (
+            SELECT 1 FROM tasks_taskassignment a JOIN users_user u ON u.id = a.user_id
+            WHERE a.task_id = pairs.task_id AND u.team_id = pairs.team_id
+        )
+        GROUP BY pairs.team_id
+        ORDER BY pairs.team_id::text
+        ON CONFLICT (dimension, key, slot) DO UPDATE SET count = tasks_taskstat.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- transition tables require one trigger per event
+CREATE TRIGGER tasks_task_stats_insert AFTER INSERT ON tasks_task
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION tasks_task_stats_update();
+CREATE TRIGGER tasks_task_stats_update AFTER UPDATE ON tasks_task
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION tasks_task_stats_update();
+CREATE TRIGGER tasks_task_stats_delete AFTER DELETE ON tasks_task
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION tasks_task_stats_update();
+CREATE TRIGGER tasks_taskassignment_stats_insert AFTER INSERT ON tasks_taskassignment
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION tasks_taskassignment_stats_update();
+CREATE TRIGGER tasks_taskassignment_stats_delete AFTER DELETE ON tasks_taskassignment
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION tasks_taskassignment_stats_update();
+
+-- counters of the existing tasks
+WITH counts AS (
+    SELECT is_archived, status, priority, count(*) AS n
+    FROM tasks_task GROUP BY is_archived, status, priority
+)
+INSERT INTO tasks_taskstat (dimension, key, slot, count)
+SELECT 'archived', is_archived::text, 0, sum(n) FROM counts GROUP BY is_archived
+UNION ALL
+SELECT 'status', status, 0, sum(n) FROM counts WHERE NOT is_archived GROUP BY status
+UNION ALL
+SELECT 'priority', priority, 0, sum(n) FROM counts WHERE NOT is_archived GROUP BY priority
+UNION ALL
+SELECT 'overdue', (status = 'overdue')::text, 0, sum(n) FROM counts WHERE NOT is_archived GROUP BY status = 'overdue'
+UNION ALL
+SELECT 'team', u.team_id::text, 0, count(DISTINCT a.task_id)
+FROM tasks_taskassignment a
+JOIN users_user u ON u.id = a.user_id
+JOIN tasks_task t ON t.id = a.task_id
+WHERE NOT t.is_archived AND u.team_id IS NOT NULL
+GROUP BY u.team_id;
+"""
+
+DROP_TASK_STATS_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS tasks_task_stats_insert ON tasks_task;
+DROP TRIGGER IF EXISTS tasks_task_stats_update ON tasks_task;
+DROP TRIGGER IF EXISTS tasks_task_stats_delete ON tasks_task;
+DROP TRIGGER IF EXISTS tasks_taskassignment_stats_insert ON tasks_taskassignment;
+DROP TRIGGER IF EXISTS tasks_taskassignment_stats_delete ON tasks_taskassignment;
+DROP FUNCTION IF EXISTS tasks_task_stats_update();
+DROP FUNCTION IF EXISTS tasks_taskassignment_stats_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_external_id_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=20)),
+                ('key', models.CharField(max_length=50)),
+                ('slot', models.PositiveSmallIntegerField(default=0)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key', 'slot'), name='task_stat_slot_unique')],
+            },
+        ),
+        migrations.RunSQL(TASK_STATS_TRIGGER_SQL, DROP_TASK_STATS_TRIGGER_SQL),
+    ]
@@ -1,4 +1,9 @@
-from django.db.models import Q
+import re
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
 from django.utils import timezone
 from django.db import models
 from apps.users.models import User
@@ -32,7 +37,7 @@ class TaskQuerySet(models.QuerySet):
     - by_status(status): filters task by status.
     - by_priority(priority): filters tasks by priority.
     - overdue(): returns taks whose due date has passed and are not completed.
-    - search(query): performs a search on task titles and descriptions.
+    - search(query): performs a ranked full-text search on task titles and descriptions.
 
     Usage:
         Task.objects.active()
@@ -51,12 +56,49 @@ class TaskQuerySet(models.QuerySet):
         return self.filter(priority=priority)
 
     def overdue(self):
-        return self.filter(due_date__lt=timezone.now(), status__in=['todo', 'in_progress'])
+        return self.filter(due_date__lt=timezone.now(), status__in=OPEN_STATUSES)
+
+    # matches against the trigger-maintained search_vector (GIN indexed), so the
+    # query never falls back to an ILIKE sequential scan. Results are ordered by rank
+    def search(self, query):
+        search_query = build_search_query(query)
+        if search_query is None:
+            return self.none()
+        return (
+            self.filter(search_vector=search_query)
+            # double precision: keyset cursors (?pagination=cursor) carry the exact rank
+            .annotate(search_rank=Cast(SearchRank(F("search_vector"), search_query), FloatField()))
+            .order_by("-search_rank", "-id")
+        )
+
+
+class PrefixSearchQuery(SearchQuery):
+    """
+    Websearch query whose last term matches as a prefix: `:*` is appended to
+    the last lexeme of websearch_to_tsquery(), so phrases, `or` and `-word`
+    keep working. The lexemes are already normalized, hence the plain cast.
+    """
+    template = r"regexp_replace(%(function)s(%(expressions)s)::text, '''$', ''':*')::tsquery"
 
-    # uses Django's Q objects to perform an or operation, the task will be included if
-    # either the title or the description matches str
-    def search(self, str):
-        return self.filter(Q(title__icontains=str) | Q(description__icontains=str))
+
+def build_search_query(query):
+    """
+    Build a SearchQuery for the configured text search language.
+
+    - Plain terms, "quoted phrases", `or` and `-excluded` words use PostgreSQL's
+      websearch syntax.
+    - A trailing `*` makes the last word a prefix, e.g. `deplo*` matches
+      "deploy", "deployment"..., and `"login error" or deplo*` still works.
+
+    Returns None when the query has no searchable words.
+    """
+    config = settings.TASK_SEARCH_CONFIG
+    query = query.strip()
+    if not re.search(r"\w", query):
+        return None
+    if query.endswith("*"):
+        return PrefixSearchQuery(query.rstrip("*"), search_type="websearch", config=config)
+    return SearchQuery(query, search_type="websearch", config=config)
 
 class TaskManager(models.Manager):
     """
@@ -69,10 +111,12 @@ class TaskManager(models.Manager):
     - get_queryset(): Returns a TaskQuerySet instead of the default QuerySet.
     - active(): Returns tasks that are not archived.
     - overdue(): Return tasks that are past their due date and on status 'todo' or 'in_progress'.
+    - search(query): Returns tasks matching a full-text query, best matches first.
 
     Usage:
         Task.objects.active()
         Task.objects.overdue()
+        Task.objects.search('deploy')
     """
     def get_queryset(self):
         return TaskQuerySet(self.model, using=self._db)
@@ -83,6 +127,9 @@ class TaskManager(models.Manager):
     def overdue(self):
         return self.get_queryset().overdue()
 
+    def search(self, query):
+        return self.get_queryset().search(query)
+
 STATUS_CHOICES = [
     ("todo", "To Do"),
     ("in_progress", "In Progress"),
@@ -90,6 +137,9 @@ STATUS_CHOICES = [
     ("overdue", "Overdue"),
 ]
 
+# statuses a task can become overdue from
+OPEN_STATUSES = ["todo", "in_progress"]
+
 PRIORITY_CHOICES = [
     ("low", "Low"),
     ("medium", "Medium"),
@@ -118,10 +168,23 @@ class Task(models.Model):
         created_at (datetime): Task creation timestamp.
         updated_at (datetime): Last update timestamp.
         is_archived (bool): Whether the task is archived.
+        search_vector (tsvector): Weighted title/description lexemes, maintained by a
+            database trigger (see migration 0006) and used by TaskQuerySet.search().
+        external_id (str): Optional unique id of the task in an external system, the
+            natural key used by the import_tasks command.
 
     Methods:
         __str__(): Returns the title as string representation. 
+        from_db(): Loads the instance and snapshots its tracked fields.
+        snapshot_tracked_fields(): Stores the current values of HISTORY_FIELDS, the
+            baseline TaskHistory diffs are computed against (see signals.py).
     """
+    # fields whose changes are recorded in TaskHistory when the task is saved
+    HISTORY_FIELDS = [
+        "title", "description", "status", "priority", "due_date", "estimated_hours",
+        "actual_hours", "is_archived", "parent_task_id",
+    ]
+
     title = models.CharField(max_length=200)
     description = models.TextField()
     status = models.CharField(choices=STATUS_CHOICES, default="todo")
@@ -150,11 +213,42 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_archived = models.BooleanField(default=False)
+    # Full-text search
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Natural key for imports
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
 
     objects = TaskManager()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="task_search_vector_idx"),
+            # keyset pagination order, see TasksCursorPagination
+            models.Index(fields=["updated_at", "id"], name="task_updated_id_idx"),
+            # tasks created in the last day, see generate_daily_summary
+            models.Index(fields=["created_at"], name="task_created_at_idx"),
+            # open tasks by due date, see check_overdue_tasks
+            models.Index(
+                fields=["due_date"],
+                condition=Q(status__in=OPEN_STATUSES),
+                name="task_open_due_date_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_tracked_fields()
+        return instance
+
+    def snapshot_tracked_fields(self):
+        # deferred fields are left out, they are not compared on save
+        self._loaded_values = {
+            field: self.__dict__[field] for field in self.HISTORY_FIELDS if field in self.__dict__
+        }
     
 class TaskAssignment(models.Model):
     """
@@ -205,6 +299,12 @@ class Comment(models.Model):
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination order, see CommentsCursorPagination
+            models.Index(fields=["task", "created_at", "id"], name="comment_task_created_idx"),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username} on {self.task.title}"
     
@@ -230,6 +330,12 @@ class TaskHistory(models.Model):
     new_value = models.TextField(null=True, blank=True)
     changed_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination order, see HistoryCursorPagination
+            models.Index(fields=["task", "changed_at", "id"], name="history_task_changed_idx"),
+        ]
+
     def __str__(self):
         return f"History for {self.task.title} at {self.changed_at}"
     
@@ -254,4 +360,89 @@ class TaskTemplate(models.Model):
     metadata = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of an import_tasks run over one file, so a failed import resumes
+    after the last committed chunk instead of starting over.
+
+    Attributes:
+        source (str): Import kind and absolute path of the file ("tasks:/data/tasks.csv").
+        size (int): File size at the last run, to warn when resuming over a changed file.
+        rows_done (int): Rows of the file already committed.
+        completed_at (datetime): When the whole file was imported.
+        updated_at (datetime): Last committed chunk.
+
+    Methods:
+        __str__(): Returns the source and the rows done.
+    """
+    source = models.CharField(max_length=500, unique=True)
+    size = models.BigIntegerField()
+    rows_done = models.BigIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} ({self.rows_done} rows)"
+
+class TaskDependency(models.Model):
+    """
+    A dependency between two tasks: `task` is blocked until `depends_on` is done.
+
+    Edges that would close a cycle are refused when they are added (see
+    apps.tasks.dependencies), so the graph stays acyclic.
+
+    Attributes:
+        task (Task): The blocked task.
+        depends_on (Task): The task it waits for.
+        created_by (User): User who added the dependency.
+        created_at (datetime): When the dependency was added.
+
+    Methods:
+        __str__(): Returns both task ids.
+    """
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="dependencies")
+    depends_on = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="dependents")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["task", "depends_on"], name="task_dependency_unique"),
+            models.CheckConstraint(condition=~Q(task=F("depends_on")), name="task_dependency_not_self"),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} depends on {self.depends_on_id}"
+
+class TaskStat(models.Model):
+    """
+    One counter of the task dashboard, e.g. ("status", "todo"): the number of
+    active tasks with that status. Maintained by database triggers on tasks and
+    assignments (see migration 0011) and read by apps.tasks.stats.
+
+    Each counter is split in slots, one per group of database sessions, so
+    concurrent writes don't queue on the same row; its value is the sum of its slots.
+
+    Attributes:
+        dimension (str): "status", "priority", "overdue", "team" or "archived".
+        key (str): Value counted (status name, team id, "true"/"false"...).
+        slot (int): Slot of the counter.
+        count (int): Delta accumulated in this slot (can be negative).
+
+    Methods:
+        __str__(): Returns the dimension, key, slot and count.
+    """
+    dimension = models.CharField(max_length=20)
+    key = models.CharField(max_length=50)
+    slot = models.PositiveSmallIntegerField(default=0)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dimension", "key", "slot"], name="task_stat_slot_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.key} [{self.slot}]: {self.count}"
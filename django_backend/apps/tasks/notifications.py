@@ -0,0 +1,177 @@
+import json
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+from apps.common.redis import get_redis
+from apps.users.models import User
+from .models import Task, TaskAssignment
+
+# sorted set: user id -> timestamp of the oldest buffered event
+PENDING_KEY = "notifications:pending"
+# list of JSON events waiting for the next digest of a user
+BUFFER_KEY = "notifications:buffer:{user_id}"
+
+
+def task_recipients(task_ids):
+    """
+    Resolve the people notified about each task: its assignees and its creator.
+
+    Two queries whatever the number of tasks.
+    Returns {task_id: (title, {user_id, ...})}.
+    """
+    recipients = {}
+    for task_id, title, creator_id in Task.objects.filter(pk__in=task_ids).values_list("id", "title", "created_by_id"):
+        recipients[task_id] = (title, {creator_id})
+    for task_id, user_id in TaskAssignment.objects.filter(task_id__in=task_ids).values_list("task_id", "user_id"):
+        recipients[task_id][1].add(user_id)
+    return recipients
+
+
+def buffer_events(events_by_user):
+    """
+    Append events to the per-recipient buffers, in a single round trip.
+
+    A user's digest window starts with their first buffered event
+    (ZADD NX keeps the oldest timestamp).
+    """
+    if not events_by_user:
+        return
+    now = timezone.now().timestamp()
+    pipe = get_redis().pipeline(transaction=False)
+    for user_id, events in events_by_user.items():
+        pipe.rpush(BUFFER_KEY.format(user_id=user_id), *(json.dumps(event) for event in events))
+        pipe.zadd(PENDING_KEY, {user_id: now}, nx=True)
+    pipe.execute()
+
+
+def queue_task_events(task_ids, event, recipients=None):
+    """
+    Buffer one `event` per recipient of each task.
+
+    `recipients` ({task_id: (title, user_ids)}) can be given for tasks that are
+    about to disappear, otherwise it is resolved with task_recipients().
+    """
+    if recipients is None:
+        recipients = task_recipients(task_ids)
+    at = timezone.now().isoformat()
+    events_by_user = defaultdict(list)
+    for task_id, (title, user_ids) in recipients.items():
+        for user_id in user_ids:
+            events_by_user[user_id].append({"task_id": task_id, "title": title, "event": event, "at": at})
+    buffer_events(events_by_user)
+
+
+def queue_assignment_events(assignments, event="assigned", notify_creators=False):
+    """
+    Buffer an `event` ("assigned" or "unassigned") for the user of each
+    (task_id, user_id) pair of `assignments` and, with `notify_creators`, once
+    for the creator of each task.
+
+    Titles (and creators) are read with one query. A user assigned to many
+    tasks gets them all in one digest.
+    """
+    tasks = {
+        task_id: (title, creator_id) for task_id, title, creator_id in
+        Task.objects.filter(pk__in={task_id for task_id, _ in assignments}).values_list("id", "title", "created_by_id")
+    }
+    # ordered and without duplicates: a creator who was also removed gets one event
+    recipients = dict.fromkeys((task_id, user_id) for task_id, user_id in assignments if task_id in tasks)
+    if notify_creators:
+        recipients.update(dict.fromkeys((task_id, tasks[task_id][1]) for task_id, _ in list(recipients)))
+    at = timezone.now().isoformat()
+    events_by_user = defaultdict(list)
+    for task_id, user_id in recipients:
+        events_by_user[user_id].append({"task_id": task_id, "title": tasks[task_id][0], "event": event, "at": at})
+    buffer_events(events_by_user)
+
+
+def pop_due_buffers(window, limit=1000):
+    """
+    Take the buffers whose window has elapsed.
+
+    Reading and deleting a buffer happens in one MULTI block, so events pushed
+    meanwhile are never lost: they start a new window instead. Buffers that
+    can't be mailed are given back with requeue_buffers().
+    Returns {user_id: [event, ...]}.
+    """
+    client = get_redis()
+    cutoff = timezone.now().timestamp() - window
+    user_ids = client.zrangebyscore(PENDING_KEY, "-inf", cutoff, start=0, num=limit)
+    if not user_ids:
+        return {}
+    pipe = client.pipeline(transaction=True)
+    for user_id in user_ids:
+        key = BUFFER_KEY.format(user_id=user_id)
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+    pipe.zrem(PENDING_KEY, *user_ids)
+    results = pipe.execute()
+    return {
+        int(user_id): [json.loads(event) for event in results[index * 2]]
+        for index, user_id in enumerate(user_ids)
+    }
+
+
+def requeue_buffers(buffers):
+    """
+    Put popped buffers back in front of the events buffered since, due at once,
+    so the next flush sends them again.
+    """
+    if not buffers:
+        return
+    pipe = get_redis().pipeline(transaction=False)
+    for user_id, events in buffers.items():
+        pipe.lpush(BUFFER_KEY.format(user_id=user_id), *(json.dumps(event) for event in reversed(events)))
+        pipe.zadd(PENDING_KEY, {user_id: 0})
+    pipe.execute()
+
+
+def render_digest(events):
+    """Group a user's events by task, in the order they happened."""
+    by_task = {}
+    for event in events:
+        entry = by_task.setdefault(event["task_id"], {"title": event["title"], "events": []})
+        entry["events"].append(event["event"])
+    lines = []
+    for entry in by_task.values():
+        counts = Counter(entry["events"])
+        described = ", ".join(kind if n == 1 else f"{kind} ({n} times)" for kind, n in counts.items())
+        lines.append(f"- {entry['title']}: {described}")
+    return "\n".join(lines)
+
+
+def send_digests(buffers):
+    """
+    Send one digest per recipient over a single mail connection.
+
+    Event types a user opted out of (User.notification_opt_outs) are dropped,
+    as are users without an email address. If anything fails, the buffers of
+    the users not mailed yet are requeued before the error is raised.
+    Returns the number of emails sent.
+    """
+    mailed = set()
+    try:
+        users = User.objects.filter(pk__in=buffers.keys()).values("id", "email", "notification_opt_outs")
+        messages = {}
+        for user in users:
+            events = [event for event in buffers[user["id"]] if event["event"] not in user["notification_opt_outs"]]
+            if not events or not user["email"]:
+                continue
+            messages[user["id"]] = EmailMessage(
+                subject=f"Task notifications ({len(events)} updates)",
+                body=render_digest(events),
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[user["email"]],
+            )
+        if not messages:
+            return 0
+        with get_connection() as connection:
+            # one message at a time, to know who got theirs
+            for user_id, message in messages.items():
+                connection.send_messages([message])
+                mailed.add(user_id)
+    except Exception:
+        requeue_buffers({user_id: events for user_id, events in buffers.items() if user_id not in mailed})
+        raise
+    return len(mailed)
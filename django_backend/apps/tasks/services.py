@@ -0,0 +1,245 @@
+from collections import Counter, defaultdict
+from django.db import connection, transaction
+from django.utils import timezone
+from django.db.models import Prefetch
+from .models import Comment, Task, TaskHistory
+from .history import history_entry, task_changes
+from .cache import invalidate_tasks
+from .events import publish_task_events, task_audiences
+from .tasks import send_tasks_notification, send_assignment_notification, send_unassignment_notification
+
+
+def item_error(index, errors):
+    return {"index": index, "errors": errors}
+
+
+def check_parents(valid):
+    """
+    Check the parent tasks of validated batch items, with one query for the
+    whole batch.
+
+    `valid` is a list of (index, validated_data), as validated by the API.
+    Returns (checked, errors): the items whose parent exists (or have none) and
+    a list of {"index", "errors"}.
+    """
+    parent_ids = {data["parent_task_id"] for _, data in valid if data.get("parent_task_id")}
+    existing = set(Task.objects.filter(pk__in=parent_ids).values_list("pk", flat=True))
+    checked, errors = [], []
+    for index, data in valid:
+        parent_id = data.get("parent_task_id")
+        if parent_id and parent_id not in existing:
+            errors.append(item_error(index, {"parent_task": [f"Invalid pk \"{parent_id}\" - object does not exist."]}))
+        else:
+            checked.append((index, data))
+    return checked, errors
+
+
+def filter_tasks(params):
+    """
+    Tasks matching the list parameters of `params` (a QueryDict): `include_archived`,
+    `status` and `priority`, most recently updated first.
+
+    Shared by the API and the template views, which call it in process.
+    """
+    qs = Task.objects.all() if params.get("include_archived") == "true" else Task.objects.active()
+    qs = qs.order_by("-updated_at", "-id")
+    status = params.get("status")
+    if status:
+        qs = qs.by_status(status)
+    priority = params.get("priority")
+    if priority:
+        qs = qs.by_priority(priority)
+    return qs
+
+
+def list_prefetches(fields):
+    """
+    Prefetch plan of a page of tasks: the lookups of the relations among
+    `fields` (names of the fields displayed), so a page costs a fixed number of
+    queries whatever its size. Shared by the API and the template views.
+    """
+    lookups = {
+        "assigned_to": "assigned_to",
+        "tags": "tags",
+        "comments": Prefetch("comments", queryset=Comment.objects.select_related("author")),
+        "history": Prefetch("history", queryset=TaskHistory.objects.select_related("changed_by")),
+    }
+    return [lookup for name, lookup in lookups.items() if name in fields]
+
+
+def detail_prefetches():
+    """Prefetch plan of a single task: assignees, tags, comments and history (use with select_related("created_by"))."""
+    return list_prefetches({"assigned_to", "tags", "comments", "history"})
+
+
+def notify_on_commit(task_ids, event):
+    """Invalidate cached responses, push the change events and queue a single notification job for the batch."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    invalidate_tasks(task_ids)
+    publish_task_events(task_ids, event)
+    transaction.on_commit(lambda: send_tasks_notification.delay(task_ids, event))
+
+
+@transaction.atomic
+def bulk_create_tasks(valid, user):
+    """
+    Create the validated items of a batch ((index, data) pairs) with one bulk INSERT.
+
+    Returns (created task ids, per-item errors).
+    """
+    valid, errors = check_parents(valid)
+    tasks = [Task(created_by=user, **{k: v for k, v in data.items() if k != "id"}) for _, data in valid]
+    Task.objects.bulk_create(tasks)
+    created = [task.pk for task in tasks]
+    notify_on_commit(created, "created")
+    return created, errors
+
+
+@transaction.atomic
+def bulk_update_tasks(valid, user):
+    """
+    Apply the validated partial updates of a batch ((index, data) pairs, each
+    with its "id") with one bulk UPDATE.
+
+    A task can appear once per batch: every item of an id given twice is
+    refused, since neither update would obviously win.
+    Tasks are loaded with one query (their load-time snapshot gives the diff),
+    changes are written with bulk_update and their history with one INSERT.
+    Returns (updated task ids, per-item errors).
+    """
+    occurrences = Counter(data["id"] for _, data in valid)
+    errors = [item_error(index, {"id": ["Duplicate id in this batch."]})
+              for index, data in valid if occurrences[data["id"]] > 1]
+    valid, parent_errors = check_parents([(index, data) for index, data in valid if occurrences[data["id"]] == 1])
+    errors += parent_errors
+    tasks = Task.objects.in_bulk([data["id"] for _, data in valid])
+
+    now = timezone.now()
+    changed, fields, history = {}, {"updated_at"}, []
+    for index, data in valid:
+        task = tasks.get(data["id"])
+        if task is None:
+            errors.append(item_error(index, {"id": ["Task not found."]}))
+            continue
+        modified = [field for field, value in data.items() if field != "id" and getattr(task, field) != value]
+        if not modified:
+            continue
+        for field in modified:
+            setattr(task, field, data[field])
+        task.updated_at = now
+        changed[task.pk] = task
+        fields.update(modified)
+        changes = task_changes(task)
+        history.extend(history_entry(task.pk, field, old, new, user) for field, old, new in changes)
+
+    Task.objects.bulk_update(changed.values(), sorted(fields))
+    TaskHistory.objects.bulk_create(history)
+    notify_on_commit(changed, "updated")
+    errors.sort(key=lambda error: error["index"])
+    return list(changed), errors
+
+
+@transaction.atomic
+def bulk_archive_tasks(ids, user):
+    """
+    Archive many tasks with one UPDATE and one history INSERT.
+
+    Already archived tasks are left untouched.
+    Returns (archived task ids, per-item errors for unknown ids).
+    """
+    existing = dict(Task.objects.filter(pk__in=ids).values_list("pk", "is_archived"))
+    errors = [item_error(index, {"id": ["Task not found."]}) for index, pk in enumerate(ids) if pk not in existing]
+    archived = [pk for pk, is_archived in existing.items() if not is_archived]
+
+    Task.objects.filter(pk__in=archived).update(is_archived=True, updated_at=timezone.now())
+    TaskHistory.objects.bulk_create([history_entry(pk, "is_archived", False, True, user) for pk in archived])
+    notify_on_commit(archived, "updated")
+    return archived, errors
+
+
+# one INSERT for every (task, user, role) of the batch; pairs already assigned
+# are skipped by the unique (task, user) constraint instead of failing
+ASSIGN_SQL = """
+INSERT INTO tasks_taskassignment (task_id, user_id, role, assigned_by_id, assigned_at)
+SELECT pair.task_id, pair.user_id, pair.role, %(assigned_by)s, %(now)s
+FROM unnest(%(task_ids)s::bigint[], %(user_ids)s::bigint[], %(roles)s::varchar[]) AS pair(task_id, user_id, role)
+ON CONFLICT (task_id, user_id) DO NOTHING
+RETURNING task_id, user_id
+"""
+
+UNASSIGN_SQL = """
+DELETE FROM tasks_taskassignment
+WHERE task_id = ANY(%(task_ids)s::bigint[]) AND user_id = ANY(%(user_ids)s::bigint[])
+RETURNING task_id, user_id
+"""
+
+
+def assignment_history(rows, user, added):
+    """One history row per task listing the users added or removed, like the m2m signal does."""
+    users_by_task = defaultdict(list)
+    for task_id, user_id in rows:
+        users_by_task[task_id].append(user_id)
+    entries = []
+    for task_id, user_ids in users_by_task.items():
+        joined = ",".join(str(pk) for pk in sorted(user_ids))
+        old, new = (None, joined) if added else (joined, None)
+        entries.append(history_entry(task_id, "assigned_to", old, new, user))
+    TaskHistory.objects.bulk_create(entries)
+    invalidate_tasks(users_by_task)
+
+
+@transaction.atomic
+def bulk_assign_users(task_ids, roles, user):
+    """
+    Assign every user of `roles` ({user_id: role}) to every task of `task_ids`.
+
+    One INSERT ... ON CONFLICT DO NOTHING writes the whole batch; users already
+    assigned to a task keep their current role. History rows go in one INSERT
+    and the newly assigned users get one "assigned" event per task, coalesced
+    into their digest.
+    Returns the created (task_id, user_id) pairs.
+    """
+    pairs = [(task_id, user_id, role) for task_id in task_ids for user_id, role in roles.items()]
+    if not pairs:
+        return []
+    task_column, user_column, role_column = (list(column) for column in zip(*pairs))
+    with connection.cursor() as cursor:
+        cursor.execute(ASSIGN_SQL, {
+            "assigned_by": user.pk,
+            "now": timezone.now(),
+            "task_ids": task_column,
+            "user_ids": user_column,
+            "roles": role_column,
+        })
+        created = cursor.fetchall()
+
+    assignment_history(created, user, added=True)
+    # resolved after the INSERT: the new assignees get the event too
+    publish_task_events({task_id for task_id, _ in created}, "assigned")
+    if created:
+        transaction.on_commit(lambda: send_assignment_notification.delay(created))
+    return created
+
+
+@transaction.atomic
+def bulk_unassign_users(task_ids, user_ids, user):
+    """
+    Remove every user of `user_ids` from every task of `task_ids` with one DELETE.
+
+    The removed users and the creators of their tasks get one "unassigned"
+    event per task, coalesced into their digest.
+    Returns the removed (task_id, user_id) pairs.
+    """
+    task_ids = list(task_ids)
+    # resolved before the DELETE: the removed assignees get the event too
+    audiences = task_audiences(task_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(UNASSIGN_SQL, {"task_ids": task_ids, "user_ids": list(user_ids)})
+        removed = cursor.fetchall()
+    assignment_history(removed, user, added=False)
+    publish_task_events({task_id for task_id, _ in removed}, "unassigned", audiences)
+    if removed:
+        transaction.on_commit(lambda: send_unassignment_notification.delay(removed))
+    return removed
@@ -1,34 +1,86 @@
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Task, TaskHistory
+from .models import Task, TaskAssignment, Comment, TaskHistory
+from .history import task_changes, history_entry
+from .cache import invalidate_tasks
 
 @receiver(pre_save, sender=Task)
+def collect_task_changes(sender, instance, update_fields=None, **kwargs):
+    """
+    Diff the task against its load-time snapshot before saving.
+    No query is run: see Task.from_db() and history.task_changes().
+    """
+    if instance._state.adding:
+        return
+    instance._pending_history = task_changes(instance, update_fields)
+
+@receiver(post_save, sender=Task)
 def create_task_history(sender, instance, **kwargs):
     """
-    Registration of task updates before saving.
+    Registration of task updates once the save succeeded, in a single INSERT.
+    """
+    changes = getattr(instance, "_pending_history", None)
+    if changes:
+        changed_by = getattr(instance, "updated_by", None)
+        TaskHistory.objects.bulk_create([
+            history_entry(instance.pk, field, old, new, changed_by) for field, old, new in changes
+        ])
+    instance._pending_history = None
+    # the saved values are the baseline for the next save of this instance
+    instance.snapshot_tracked_fields()
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+@receiver(m2m_changed, sender=Task.tags.through)
+def track_m2m_task_changes(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Registration of assigned_to / tags changes made through the related managers
+    (task.tags.add(...), user.tasks_assigned.remove(...), ...), and invalidation
+    of the cached responses of the tasks affected.
+
+    Forward changes write one row per operation with the affected ids, reverse
+    changes one row per affected task. Clears read the ids being removed first;
+    history and invalidation share one receiver so they both get them.
     """
-    if not instance.pk:
+    field = "assigned_to" if sender is Task.assigned_to.through else "tags"
+    other = Task._meta.get_field(field).m2m_reverse_field_name()
+
+    if action == "pre_clear":
+        if reverse:
+            lookup, column = {other: instance}, "task_id"
+        else:
+            lookup, column = {"task": instance}, f"{other}_id"
+        instance._m2m_cleared = set(sender.objects.filter(**lookup).values_list(column, flat=True))
+        return
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_m2m_cleared", set())
+    elif action not in ("post_add", "post_remove"):
         return
+    if not pk_set:
+        return
+
+    def values(ids):
+        joined = ",".join(str(pk) for pk in sorted(ids))
+        return (None, joined) if action == "post_add" else (joined, None)
+
+    if reverse:
+        old, new = values([instance.pk])
+        entries = [history_entry(task_id, field, old, new) for task_id in pk_set]
+    else:
+        old, new = values(pk_set)
+        entries = [history_entry(instance.pk, field, old, new, getattr(instance, "updated_by", None))]
+    TaskHistory.objects.bulk_create(entries)
+    invalidate_tasks(pk_set if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_cache(sender, instance, **kwargs):
+    invalidate_tasks([instance.pk])
 
-    previous = Task.objects.get(pk=instance.pk)
-    changes = []
-
-    fields_to_track = [
-        "title", "description", "status", "priority", "due_date", "estimated_hours",
-        "actual_hours", "is_archived", "parent_task_id", "assigned_to", "tags", "is_archived"
-    ]
-
-    for field in fields_to_track:
-        old = getattr(previous, field)
-        new = getattr(instance, field)
-        if old != new:
-            changes.append((field, old, new))
-
-    for field, old, new in changes:
-        TaskHistory.objects.create(
-            task=instance,
-            changed_by=getattr(instance, 'updated_by', None),
-            field_changed=field,
-            old_value=old,
-            new_value=new
-        )
\ No newline at end of file
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=TaskAssignment)
+@receiver(post_delete, sender=TaskAssignment)
+@receiver(post_save, sender=TaskHistory)
+def invalidate_related_task_cache(sender, instance, **kwargs):
+    invalidate_tasks([instance.task_id])
@@ -0,0 +1,99 @@
+from collections import defaultdict
+from django.db import connection
+from django.db.models import Sum
+from apps.common.models import Team
+from .models import PRIORITY_CHOICES, STATUS_CHOICES, TaskStat
+
+# Exact counters, computed from the tasks in one scan: (dimension, key, count).
+# Same definitions as the triggers of migration 0011.
+COUNTS_SQL = """
+WITH counts AS (
+    SELECT is_archived, status, priority, count(*) AS n
+    FROM tasks_task GROUP BY is_archived, status, priority
+)
+SELECT 'archived', is_archived::text, sum(n)::bigint FROM counts GROUP BY is_archived
+UNION ALL
+SELECT 'status', status, sum(n)::bigint FROM counts WHERE NOT is_archived GROUP BY status
+UNION ALL
+SELECT 'priority', priority, sum(n)::bigint FROM counts WHERE NOT is_archived GROUP BY priority
+UNION ALL
+SELECT 'overdue', (status = 'overdue')::text, sum(n)::bigint FROM counts WHERE NOT is_archived GROUP BY status = 'overdue'
+UNION ALL
+SELECT 'team', u.team_id::text, count(DISTINCT a.task_id)
+FROM tasks_taskassignment a
+JOIN users_user u ON u.id = a.user_id
+JOIN tasks_task t ON t.id = a.task_id
+WHERE NOT t.is_archived AND u.team_id IS NOT NULL
+GROUP BY u.team_id
+"""
+
+STORED_SQL = "SELECT dimension, key, sum(count)::bigint FROM tasks_taskstat GROUP BY dimension, key"
+
+# Counters whose stored value differs from the recount: (dimension, key,
+# expected - stored). One statement, so both sides come from one snapshot.
+DRIFT_SQL = f"""
+WITH expected (dimension, key, count) AS ({COUNTS_SQL}),
+stored (dimension, key, count) AS ({STORED_SQL})
+SELECT COALESCE(expected.dimension, stored.dimension), COALESCE(expected.key, stored.key),
+       COALESCE(expected.count, 0) - COALESCE(stored.count, 0) AS correction
+FROM expected FULL JOIN stored ON stored.dimension = expected.dimension AND stored.key = expected.key
+WHERE COALESCE(expected.count, 0) <> COALESCE(stored.count, 0)
+"""
+
+# corrections go to slot 0
+CORRECT_SQL = """
+INSERT INTO tasks_taskstat (dimension, key, slot, count)
+SELECT * FROM unnest(%s::varchar[], %s::varchar[], %s::smallint[], %s::bigint[])
+ON CONFLICT (dimension, key, slot) DO UPDATE SET count = tasks_taskstat.count + EXCLUDED.count
+"""
+
+
+def task_stats():
+    """
+    Dashboard counts of the active tasks, read from the maintained counters
+    (a few dozen rows, whatever the number of tasks).
+
+    Returns {"total", "archived", "overdue", "status": {status: n},
+    "priority": {priority: n}, "teams": [{"id", "name", "count"}]}.
+    """
+    counts = defaultdict(dict)
+    rows = TaskStat.objects.values("dimension", "key").annotate(total=Sum("count"))
+    for dimension, key, total in rows.values_list("dimension", "key", "total"):
+        counts[dimension][key] = total
+
+    team_counts = {int(key): total for key, total in counts["team"].items() if total}
+    teams = Team.objects.filter(pk__in=team_counts).order_by("name").values_list("id", "name")
+    return {
+        "total": counts["archived"].get("false", 0),
+        "archived": counts["archived"].get("true", 0),
+        "overdue": counts["overdue"].get("true", 0),
+        "status": {status: counts["status"].get(status, 0) for status, _ in STATUS_CHOICES},
+        "priority": {priority: counts["priority"].get(priority, 0) for priority, _ in PRIORITY_CHOICES},
+        "teams": [{"id": pk, "name": name, "count": team_counts[pk]} for pk, name in teams],
+    }
+
+
+def reconcile_stats():
+    """
+    Recount every counter from the tasks and correct the ones that drifted
+    (changes of a user's team, concurrent assignments to the same team, rows
+    written with triggers disabled...).
+
+    Nothing is locked: the recount and the stored counters are read from the
+    same snapshot, and their difference is added as a delta, like a trigger's.
+    Writes committed since the snapshot add their own deltas, so none is
+    counted twice or missed.
+    Returns {(dimension, key): correction}.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(DRIFT_SQL)
+        drift = {(dimension, key): correction for dimension, key, correction in cursor.fetchall()}
+        if drift:
+            counters = list(drift)
+            cursor.execute(CORRECT_SQL, [
+                [dimension for dimension, _ in counters],
+                [key for _, key in counters],
+                [0] * len(counters),
+                [drift[counter] for counter in counters],
+            ])
+    return drift
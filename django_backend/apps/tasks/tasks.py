@@ -1,83 +1,222 @@
-from datetime import timedelta
+import logging
+from datetime import datetime, timedelta
+from itertools import groupby, islice
+from operator import itemgetter
 from celery import shared_task
 from django.utils import timezone
-from django.core.mail import send_mail
-from .models import Task
-from apps.users.models import User
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import CharField, F, Value
+from apps.common.metrics import items_processed
+from apps.common.redis import get_redis
+from .models import OPEN_STATUSES, Task, TaskAssignment, TaskHistory
+from .history import history_entry
+from .cache import invalidate_tasks
+from .stats import reconcile_stats
+from .notifications import task_recipients, queue_task_events, queue_assignment_events, pop_due_buffers, send_digests
+
+logger = logging.getLogger(__name__)
 
 @shared_task
-def send_task_notification(task_id, notification_type):
-    """Send email notifications for task events"""
-    try:
-        task = Task.objects.get(id=task_id)
-        users_emails = list(task.assigned_to.values_list("email", flat=True))
-        if task.created_by and task.created_by.email:
-            users_emails.append(task.created_by.email)
-        users_emails = list(set(users_emails))
-
-        if not users_emails:
-            print("No destinatary for notification")
-
-        send_mail(
-            "Task notification",
-            f'Notification: task {task.title} {notification_type}',
-            "noreply@example.com",
-            users_emails,
-        )
-    except Task.DoesNotExist:
-        print("Task doesn't exist")
+def send_task_notification(task_id, notification_type, title=None, recipient_ids=None):
+    """
+    Buffer a task event for its assignees and creator.
+
+    Nothing is mailed here: events are coalesced per recipient and delivered as
+    a digest by flush_notification_digests. `title` and `recipient_ids` are given
+    for deleted tasks, which can no longer be looked up.
+    """
+    if recipient_ids is not None:
+        recipients = {task_id: (title, set(recipient_ids))}
+    else:
+        recipients = task_recipients([task_id])
+        if not recipients:
+            print("Task doesn't exist")
+            return
+    queue_task_events([task_id], notification_type, recipients)
+    items_processed(1)
+
+@shared_task
+def send_tasks_notification(task_ids, notification_type):
+    """Buffer the same event for many tasks at once (bulk endpoints)"""
+    queue_task_events(task_ids, notification_type)
+    items_processed(len(task_ids))
+
+@shared_task
+def send_assignment_notification(assignments):
+    """Buffer an "assigned" event for each new (task_id, user_id) assignment"""
+    queue_assignment_events(assignments)
+    items_processed(len(assignments))
+
+@shared_task
+def send_unassignment_notification(removals):
+    """Buffer an "unassigned" event for each removed (task_id, user_id) assignment and the task's creator"""
+    queue_assignment_events(removals, "unassigned", notify_creators=True)
+    items_processed(len(removals))
+
+@shared_task
+def flush_notification_digests():
+    """
+    Send one digest email per recipient whose buffering window has elapsed
+    (NOTIFICATION_DIGEST_WINDOW), over a single SMTP connection.
+
+    When sending fails, the undelivered buffers are requeued and the next run
+    (every minute) retries them.
+    """
+    sent = 0
+    while True:
+        buffers = pop_due_buffers(settings.NOTIFICATION_DIGEST_WINDOW)
+        if not buffers:
+            return sent
+        count = send_digests(buffers)
+        items_processed(count)
+        sent += count
+
+def daily_summary_rows(since):
+    """
+    Stream the daily summary of every user in one query, ordered by recipient.
+
+    Rows are (user_id, email, kind, title, status), kind being 'created' (tasks
+    the user created since `since`) or 'assigned' (tasks assigned to the user
+    updated since `since`). Users without an email address are left out.
+    """
+    created = (
+        Task.objects.filter(created_at__gte=since).exclude(created_by__email="")
+        .annotate(recipient=F("created_by_id"), email=F("created_by__email"),
+                  kind=Value("created", output_field=CharField()))
+        .values_list("recipient", "email", "kind", "title", "status")
+    )
+    assigned = (
+        TaskAssignment.objects.filter(task__updated_at__gte=since).exclude(user__email="")
+        .annotate(recipient=F("user_id"), email=F("user__email"),
+                  kind=Value("assigned", output_field=CharField()),
+                  title=F("task__title"), status=F("task__status"))
+        .values_list("recipient", "email", "kind", "title", "status")
+    )
+    rows = created.union(assigned, all=True).order_by("recipient", "kind")
+    return rows.iterator(chunk_size=settings.DAILY_SUMMARY_BATCH_SIZE)
 
 @shared_task
 def generate_daily_summary():
-    """Generate daily task summary for all users"""
+    """
+    Generate daily task summary for all users with activity in the last day.
+
+    Summaries are grouped from a single streaming query and each chunk of
+    DAILY_SUMMARY_BATCH_SIZE users is sent to send_daily_summary_batch as soon
+    as it is complete, so only one chunk is held in memory.
+    """
     yesterday = timezone.now() - timezone.timedelta(days=1)
+    summaries = daily_summaries(daily_summary_rows(yesterday))
+
+    users = batches = 0
+    while batch := list(islice(summaries, settings.DAILY_SUMMARY_BATCH_SIZE)):
+        send_daily_summary_batch.delay(batch)
+        users += len(batch)
+        batches += 1
+    items_processed(users)
+    return f"Daily summary of {users} users queued in {batches} batches."
+
+def daily_summaries(rows):
+    """Summary of each user, {"email", "created", "assigned"}, from the rows of daily_summary_rows()."""
+    for user_id, user_rows in groupby(rows, key=itemgetter(0)):
+        summary = {"email": None, "created": [], "assigned": []}
+        for _, email, kind, title, status in user_rows:
+            summary["email"] = email
+            summary[kind].append([title, status])
+        yield summary
+
+def render_daily_summary(summary):
+    tasks_to_summary = []
+    if summary["created"]:
+        tasks_to_summary.append("Tasks created by you:")
+        for title, status in summary["created"]:
+            tasks_to_summary.append(f"- {title} [{status}]")
+
+    if summary["assigned"]:
+        tasks_to_summary.append("Tasks assigned to you:")
+        for title, status in summary["assigned"]:
+            tasks_to_summary.append(f"- {title} [{status}]")
+    return "\n".join(tasks_to_summary)
+
+@shared_task
+def send_daily_summary_batch(summaries):
+    """Render and send a batch of daily summaries over a single mail connection"""
+    messages = [
+        EmailMessage(
+            subject="Daily task summary",
+            body=render_daily_summary(summary),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[summary["email"]],
+        )
+        for summary in summaries
+    ]
+    with get_connection() as connection:
+        sent = connection.send_messages(messages)
+    items_processed(sent)
+    return sent
+
+# due date lower bound of the next overdue check, see check_overdue_tasks
+OVERDUE_WATERMARK_KEY = "tasks:overdue:watermark"
+
+# pg_advisory_xact_lock key serializing overdue checks
+OVERDUE_LOCK_KEY = 7_305_002
+
+MARK_OVERDUE_SQL = """
+WITH candidates AS (
+    SELECT id, status FROM tasks_task
+    WHERE status = ANY(%(open_statuses)s) AND due_date < %(now)s {since_filter}
+    FOR UPDATE
+)
+UPDATE tasks_task AS task SET status = 'overdue', updated_at = %(now)s
+FROM candidates
+WHERE task.id = candidates.id
+RETURNING task.id, task.title, candidates.status
+"""
 
-    for user in User.objects.all():
-        created_tasks = Task.objects.filter(created_by=user, created_at__gte=yesterday)
-        assigned_tasks = Task.objects.filter(assigned_to=user, updated_at__gte=yesterday)
-
-        tasks_to_summary = []
-        if created_tasks.exists():
-            tasks_to_summary.append("Tasks created by you:")
-            for task in created_tasks:
-                tasks_to_summary.append(f"- {task.title} [{task.status}]")
-            
-        if assigned_tasks.exists():
-            tasks_to_summary.append("Tasks assigned to you:")
-            for task in assigned_tasks:
-                tasks_to_summary.append(f"- {task.title} [{task.status}]")
-
-        summary = "\n".join(tasks_to_summary)
-        if user.email:
-            send_mail(
-                subject="Daily task summary",
-                message=summary,
-                from_email="noreply@example.com",
-                recipient_list=[user.email],
-
-            )
-        else:
-            print(f"No email for user {user.username}")
+# tasks that became due since the last run, or that were edited since then
+# (reopened, due date moved to the past...)
+SINCE_FILTER = "AND (due_date >= %(since)s OR updated_at >= %(since)s)"
 
 @shared_task
 def check_overdue_tasks():
-    """Mark tasks as overdue and notify assignees"""
-    now = timezone.now()
-    overdue_tasks = Task.objects.filter(due_date__lt=now).exclude(status='completed')
-
-    for task in overdue_tasks:
-        if task.status != 'overdue':
-            task.status = 'overdue'
-            task.save(update_fields=['status'])
-
-        for user in task.assigned_to.all():
-            if user.email:
-                send_mail(
-                    subject=f"Task Overdue: {task.title}",
-                    message=f"The task '{task.title}' was due on {task.due_date.strftime('%Y-%m-%d %H:%M')} and is now overdue.",
-                    from_email="noreply@example.com",
-                    recipient_list=[user.email],
-                )
+    """
+    Mark tasks as overdue and notify assignees.
+
+    A single UPDATE ... RETURNING (backed by the task_open_due_date_idx partial
+    index) flips open tasks past their due date. A watermark limits the scan to
+    tasks that became due, or were edited, since the previous run. History rows
+    are bulk inserted and assignees get the event in their notification digest.
+
+    The watermark must never move past a task that wasn't considered: rows
+    locked by a writer are waited for rather than skipped, and the next run
+    starts OVERDUE_WATERMARK_OVERLAP seconds before this one (database clock),
+    so it still sees writes that were in flight, with an updated_at taken on
+    an application server's clock. Runs are serialized with an advisory lock.
+    """
+    client = get_redis()
+    since = client.get(OVERDUE_WATERMARK_KEY)
+    since = datetime.fromisoformat(since) if since else None
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s), now()", [OVERDUE_LOCK_KEY])
+        now = cursor.fetchone()[1]
+        params = {"open_statuses": list(OPEN_STATUSES), "now": now, "since": since}
+        cursor.execute(MARK_OVERDUE_SQL.format(since_filter=SINCE_FILTER if since else ""), params)
+        marked = cursor.fetchall()
+        TaskHistory.objects.bulk_create([
+            history_entry(task_id, "status", old_status, "overdue") for task_id, _, old_status in marked
+        ])
+        invalidate_tasks(task_id for task_id, _, _ in marked)
+
+    recipients = {task_id: (title, set()) for task_id, title, _ in marked}
+    for task_id, user_id in TaskAssignment.objects.filter(task_id__in=recipients).values_list("task_id", "user_id"):
+        recipients[task_id][1].add(user_id)
+    queue_task_events(list(recipients), "overdue", recipients)
+
+    client.set(OVERDUE_WATERMARK_KEY, (now - timedelta(seconds=settings.OVERDUE_WATERMARK_OVERLAP)).isoformat())
+    items_processed(len(marked))
+    return f"{len(marked)} tasks marked as overdue."
 
 @shared_task
 def cleanup_archived_tasks():
@@ -86,6 +225,18 @@ def cleanup_archived_tasks():
     """
     cutoff_date = timezone.now() - timedelta(days=30)
     old_archived_tasks = Task.objects.filter(is_archived=True, updated_at__lt=cutoff_date)
-    old_archived_tasks.delete()
+    _, deleted = old_archived_tasks.delete()
+    items_processed(deleted.get("tasks.Task", 0))
+
+    return f"Archived tasks older than 30 days were deleted."
 
-    return f"Archived tasks older than 30 days were deleted."
\ No newline at end of file
+@shared_task
+def reconcile_task_stats():
+    """
+    Recount the dashboard counters from the tasks and correct any drift
+    (see apps/tasks/stats.py).
+    """
+    drift = reconcile_stats()
+    for (dimension, key), correction in sorted(drift.items()):
+        logger.warning("Task stats drift corrected: %s=%s %+d", dimension, key, correction)
+    return f"{len(drift)} task counters corrected."
@@ -1,3 +1,533 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import ThreadSensitiveContext, async_to_sync, sync_to_async
+from django.db import connection, transaction
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.common.models import Team
+from apps.common.redis import get_redis
+from apps.tasks.api.pagination import decode_cursor, encode_cursor, keyset_page
+from apps.tasks.api.stream import task_events_view
+from apps.tasks.dependencies import DependencyCycle, DependencyGraph, add_dependencies
+from apps.tasks.events import get_broadcaster
+from apps.tasks.notifications import BUFFER_KEY, PENDING_KEY, buffer_events, pop_due_buffers, send_digests
+from apps.tasks.models import Comment, ImportCheckpoint, Tag, Task, TaskAssignment, TaskHistory
+from apps.tasks.services import bulk_unassign_users
+from apps.tasks.stats import reconcile_stats, task_stats
+from apps.tasks.tasks import reconcile_task_stats, send_unassignment_notification
+from apps.tasks.views import TaskListView
+from apps.users.models import User
+from apps.users.services import issue_tokens
 
-# Create your tests here.
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def make_task(user, **fields):
+    fields = {"title": "Task", "description": "", "due_date": timezone.now() + timedelta(days=7),
+              "estimated_hours": 1, **fields}
+    return Task.objects.create(created_by=user, **fields)
+
+
+def busy_connections():
+    """Connections checked out of the pool (DB_POOL), or else open, apart from this thread's."""
+    if connection.settings_dict["OPTIONS"].get("pool"):
+        stats = connection.pool.get_stats()
+        return stats["pool_size"] - stats["pool_available"]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid()"
+        )
+        return cursor.fetchone()[0]
+
+
+class TaskEventsStreamTests(TransactionTestCase):
+    streams = 5
+
+    def test_open_streams_hold_no_database_connection(self):
+        token = issue_tokens(User.objects.create_user("streamer", password="secret"))["access"]
+        connection.close()
+
+        async def open_streams():
+            responses = []
+            for _ in range(self.streams):
+                # the ASGI handler runs the sync code of each request in a thread of its own
+                async with ThreadSensitiveContext():
+                    request = RequestFactory().get("/api/events/", {"task": 1, "token": token})
+                    responses.append(await task_events_view(request))
+            busy = await sync_to_async(busy_connections)()
+            broadcaster = get_broadcaster()
+            broadcaster.reader.cancel()
+            await broadcaster.pubsub.aclose()
+            return [response.status_code for response in responses], busy
+
+        statuses, busy = async_to_sync(open_streams)()
+        self.assertEqual(statuses, [200] * self.streams)
+        self.assertEqual(busy, 0)
+
+
+class TaskExportTests(TestCase):
+    def test_asgi_export_is_streamed_in_chunks(self):
+        user = User.objects.create_user("exporter", password="secret")
+        for number in range(5):
+            make_task(user, title=f"Task {number}")
+        token = issue_tokens(user)["access"]
+
+        async def export():
+            response = await self.async_client.get("/api/tasks/export/", headers={"authorization": f"Bearer {token}"})
+            return response, [chunk async for chunk in response.streaming_content]
+
+        with self.settings(TASKS_EXPORT_CHUNK_SIZE=2):
+            response, chunks = async_to_sync(export)()
+        self.assertTrue(response.is_async)
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for chunk in chunks for line in chunk.decode().splitlines()]
+        self.assertEqual(sorted(row["title"] for row in rows), [f"Task {number}" for number in range(5)])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch.object(TaskListView, "page_size", 2)
+class TaskListPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("viewer", password="secret")
+        for number in range(3):
+            make_task(self.user, title=f"Todo {number}")
+        make_task(self.user, title="Done", status="done")
+        self.client.force_login(self.user)
+
+    def test_pagination_links_keep_the_filters(self):
+        response = self.client.get("/tasks/", {"status": "todo"})
+        self.assertIsNone(response.context["first_url"])
+        next_url = response.context["next_url"]
+        self.assertIn("status=todo", next_url)
+
+        response = self.client.get(f"/tasks/{next_url}")
+        self.assertEqual(response.context["first_url"], "?status=todo")
+        self.assertIsNone(response.context["next_url"])
+        self.assertEqual([task.title for task in response.context["tasks"]], ["Todo 0"])
+
+    def test_cached_rows_are_not_loaded(self):
+        self.client.get("/tasks/")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/tasks/")
+        task_queries = [query["sql"] for query in queries if '"tasks_task"' in query["sql"]]
+        # the page's ids only: the rows come from their cached fragments
+        self.assertEqual(len(task_queries), 1)
+        self.assertContains(response, "Todo 2")
+
+
+class KeysetPaginationTests(TestCase):
+    ordering = ("-updated_at", "-id")
+
+    def setUp(self):
+        self.user = User.objects.create_user("pager", password="secret")
+        self.tasks = [make_task(self.user, title=f"Task {number}") for number in range(7)]
+        # ties on updated_at are broken by id
+        Task.objects.filter(pk__in=[task.pk for task in self.tasks[2:5]]).update(updated_at=self.tasks[2].updated_at)
+
+    def test_cursor_round_trip_keeps_microseconds(self):
+        position = [self.tasks[0].updated_at, self.tasks[0].pk]
+        self.assertEqual(decode_cursor(encode_cursor(position), Task.objects.all(), self.ordering), position)
+
+    def test_invalid_cursors(self):
+        self.assertIsNone(decode_cursor("", Task.objects.all(), self.ordering))
+        for cursor in ["garbage", encode_cursor([1]), encode_cursor(["not a date", 1])]:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor, Task.objects.all(), self.ordering)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        seen, position = [], None
+        while True:
+            rows, position = keyset_page(Task.objects.all(), self.ordering, position, 3)
+            seen += [task.pk for task in rows]
+            if position is None:
+                break
+            position = decode_cursor(encode_cursor(position), Task.objects.all(), self.ordering)
+        self.assertEqual(seen, list(Task.objects.order_by(*self.ordering).values_list("pk", flat=True)))
+
+
+class TaskHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("historian", password="secret")
+        self.task = make_task(self.user, title="Old title")
+
+    def history(self):
+        return list(TaskHistory.objects.filter(task=self.task).order_by("id").values_list(
+            "field_changed", "old_value", "new_value"
+        ))
+
+    def test_only_changed_fields_are_recorded(self):
+        task = Task.objects.get(pk=self.task.pk)
+        task.title = "New title"
+        task.status = "in_progress"
+        task.priority = task.priority
+        task.save()
+        self.assertEqual(sorted(self.history()), [("status", "todo", "in_progress"), ("title", "Old title", "New title")])
+
+    def test_successive_saves_diff_against_the_previous_save(self):
+        self.task.status = "in_progress"
+        self.task.save()
+        self.task.status = "done"
+        self.task.save()
+        self.assertEqual(self.history(), [("status", "todo", "in_progress"), ("status", "in_progress", "done")])
+
+    def test_update_fields_limit_the_diff(self):
+        self.task.title = "Unsaved"
+        self.task.status = "done"
+        self.task.save(update_fields=["status"])
+        self.assertEqual(self.history(), [("status", "todo", "done")])
+
+    def test_tag_changes(self):
+        tags = [Tag.objects.create(name=name) for name in ("a", "b")]
+        self.task.tags.add(*tags)
+        self.task.tags.clear()
+        ids = ",".join(str(tag.pk) for tag in tags)
+        self.assertEqual(self.history(), [("tags", None, ids), ("tags", ids, None)])
+
+    def test_reverse_clear_is_recorded_and_invalidates_the_tasks(self):
+        tag = Tag.objects.create(name="shared")
+        other = make_task(self.user)
+        tag.tasks.add(self.task, other)
+        with mock.patch("apps.tasks.signals.invalidate_tasks") as invalidate:
+            tag.tasks.clear()
+        invalidate.assert_called_once_with({self.task.pk, other.pk})
+        self.assertEqual(self.history()[-1], ("tags", str(tag.pk), None))
+        self.assertEqual(TaskHistory.objects.filter(task=other, field_changed="tags", new_value=None).count(), 1)
+
+
+class DependencyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("planner", password="secret")
+        self.a, self.b, self.c, self.d = (make_task(self.user, title=name, estimated_hours=hours)
+                                          for name, hours in (("a", 1), ("b", 2), ("c", 4), ("d", 1)))
+        # c depends on b, which depends on a; d depends on a
+        add_dependencies(self.b.pk, [self.a.pk], self.user)
+        add_dependencies(self.c.pk, [self.b.pk], self.user)
+        add_dependencies(self.d.pk, [self.a.pk], self.user)
+
+    def test_cycles_are_refused_naming_the_culprits(self):
+        e = make_task(self.user, title="e")
+        with self.assertRaisesMessage(DependencyCycle, f"can't depend on [{self.c.pk}]"):
+            add_dependencies(self.a.pk, [e.pk, self.c.pk], self.user)
+        with self.assertRaises(DependencyCycle):
+            add_dependencies(self.a.pk, [self.a.pk], self.user)
+
+    def test_existing_and_parallel_dependencies_are_allowed(self):
+        self.assertEqual(add_dependencies(self.c.pk, [self.b.pk, self.a.pk], self.user), [self.a.pk])
+
+    def test_topological_order_and_critical_path(self):
+        graph = DependencyGraph.load()
+        order = graph.topological_order()
+        for task, depends_on in ((self.b, self.a), (self.c, self.b), (self.d, self.a)):
+            self.assertLess(order.index(depends_on.pk), order.index(task.pk))
+        self.assertEqual(graph.critical_path(), (7, [self.a.pk, self.b.pk, self.c.pk]))
+        self.assertEqual(DependencyGraph.load(root=self.d.pk).topological_order(), [self.a.pk, self.d.pk])
+
+
+class TaskStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("counter", password="secret")
+        self.team = Team.objects.create(name="Counters")
+        self.member = User.objects.create_user("member", password="secret", team=self.team)
+
+    def test_triggers_keep_the_counters_exact(self):
+        tasks = [make_task(self.user, priority="high") for _ in range(3)]
+        tasks[0].status = "overdue"
+        tasks[0].save()
+        tasks[1].is_archived = True
+        tasks[1].save()
+        TaskAssignment.objects.create(task=tasks[2], user=self.member)
+        Task.objects.filter(pk=tasks[2].pk).update(status="done", priority="low")
+        tasks[0].delete()
+
+        stats = task_stats()
+        self.assertEqual((stats["total"], stats["archived"], stats["overdue"]), (1, 1, 0))
+        self.assertEqual(stats["status"]["done"], 1)
+        self.assertEqual((stats["priority"]["low"], stats["priority"]["high"]), (1, 0))
+        self.assertEqual(stats["teams"], [{"id": self.team.pk, "name": "Counters", "count": 1}])
+        self.assertEqual(reconcile_stats(), {})
+
+    def test_reconcile_corrects_drift(self):
+        make_task(self.user)
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE tasks_taskstat SET count = count + 5 WHERE dimension = 'status' AND key = 'todo'")
+        self.assertEqual(reconcile_stats(), {("status", "todo"): -5})
+        self.assertEqual(task_stats()["status"]["todo"], 1)
+        self.assertEqual(reconcile_stats(), {})
+
+    def test_reconcile_task_logs_the_corrections(self):
+        make_task(self.user)
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE tasks_taskstat SET count = count + 2 WHERE dimension = 'status' AND key = 'todo'")
+        with self.assertLogs("apps.tasks.tasks", "WARNING") as logs:
+            self.assertEqual(reconcile_task_stats(), "1 task counters corrected.")
+        self.assertEqual(logs.output, ["WARNING:apps.tasks.tasks:Task stats drift corrected: status=todo -2"])
+
+
+
+class TaskStatsReconcileTests(TransactionTestCase):
+    def test_reconcile_does_not_wait_for_task_writes(self):
+        user = User.objects.create_user("writer", password="secret")
+        written, release = threading.Event(), threading.Event()
+
+        def write_a_task():
+            try:
+                with transaction.atomic():
+                    make_task(user)
+                    written.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        writer = threading.Thread(target=write_a_task)
+        writer.start()
+        try:
+            written.wait(10)
+            with connection.cursor() as cursor:
+                cursor.execute("SET lock_timeout = '2s'")
+            # the uncommitted task is in neither the recount nor the counters
+            self.assertEqual(reconcile_stats(), {})
+        finally:
+            release.set()
+            writer.join()
+        self.assertEqual(task_stats()["total"], 1)
+        self.assertEqual(reconcile_stats(), {})
+
+class NotificationDigestTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f"reader{n}", password="secret", email=f"reader{n}@example.com")
+                      for n in range(2)]
+        self.clear_buffers()
+        self.addCleanup(self.clear_buffers)
+
+    def clear_buffers(self):
+        get_redis().delete(PENDING_KEY, *(BUFFER_KEY.format(user_id=user.pk) for user in self.users))
+
+    def event(self, task_id):
+        return {"task_id": task_id, "title": f"Task {task_id}", "event": "updated", "at": timezone.now().isoformat()}
+
+    def test_failed_sends_are_requeued(self):
+        buffer_events({self.users[0].pk: [self.event(1)], self.users[1].pk: [self.event(2), self.event(3)]})
+        buffers = pop_due_buffers(window=0)
+        buffer_events({user.pk: [self.event(4)] for user in self.users})
+
+        send = EmailBackend.send_messages
+        calls = []
+
+        def send_one_then_fail(backend, messages):
+            calls.append(messages)
+            if len(calls) > 1:
+                raise OSError("connection lost")
+            return send(backend, messages)
+
+        with mock.patch.object(EmailBackend, "send_messages", send_one_then_fail), self.assertRaises(OSError):
+            send_digests(buffers)
+        mailed, = mail.outbox
+
+        mailed_user = next(user for user in self.users if user.email in mailed.to)
+        unmailed_user = next(user for user in self.users if user is not mailed_user)
+
+        requeued = pop_due_buffers(window=0)
+        task_ids = {user_id: [event["task_id"] for event in events] for user_id, events in requeued.items()}
+        # the undelivered events go back before the ones buffered since
+        self.assertEqual(task_ids, {
+            mailed_user.pk: [4],
+            unmailed_user.pk: [event["task_id"] for event in buffers[unmailed_user.pk]] + [4],
+        })
+        self.assertEqual(send_digests(requeued), 2)
+
+    def test_unassigned_users_and_creators_get_one_event_per_task(self):
+        creator, removed = self.users
+        kept = User.objects.create_user("kept", password="secret")
+        tasks = [make_task(creator, title=f"Task {n}") for n in range(2)]
+        for task in tasks:
+            TaskAssignment.objects.create(task=task, user=removed)
+            TaskAssignment.objects.create(task=task, user=kept)
+
+        with mock.patch("apps.tasks.services.send_unassignment_notification") as job, \
+                self.captureOnCommitCallbacks(execute=True):
+            pairs = bulk_unassign_users([task.pk for task in tasks], [removed.pk], creator)
+        job.delay.assert_called_once_with(pairs)
+
+        send_unassignment_notification(json.loads(json.dumps(pairs)))
+        buffers = pop_due_buffers(window=0)
+        self.assertEqual(sorted(buffers), sorted([creator.pk, removed.pk]))
+        for events in buffers.values():
+            self.assertEqual(sorted((event["task_id"], event["event"]) for event in events),
+                             [(task.pk, "unassigned") for task in tasks])
+
+
+class TaskImportTests(TransactionTestCase):
+    columns = ["external_id", "title", "due_date", "estimated_hours", "created_by", "parent", "tags"]
+
+    def setUp(self):
+        self.user = User.objects.create_user("importer", password="secret")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def import_csv(self, rows, **options):
+        path = os.path.join(self.directory, "tasks.csv")
+        with open(path, "w", newline="") as file:
+            csv.writer(file).writerows([self.columns, *rows])
+        call_command("import_tasks", "tasks", path, stdout=open(os.devnull, "w"), **options)
+        return path
+
+    def test_bad_rows_are_rejected_and_the_rest_imported(self):
+        path = self.import_csv([
+            ["child", "Child", "2030-01-01", "1", "importer", "parent", "a"],
+            ["bad-date", "Bad date", "someday", "1", "importer", "", ""],
+            ["parent", "Parent", "2030-01-01", "2", "importer", "", "b"],
+            ["too-long", "Too long", "2030-01-01", "123456", "importer", "", ""],
+            ["last", "Last", "2030-01-01", "3", "importer", "", "a"],
+        ], chunk_size=4)
+
+        self.assertEqual(sorted(Task.objects.values_list("external_id", flat=True)), ["child", "last", "parent"])
+        self.assertEqual(Task.objects.get(external_id="child").parent_task.external_id, "parent")
+        self.assertEqual(sorted(Tag.objects.values_list("name", flat=True)), ["a", "b"])
+        self.assertIsNotNone(ImportCheckpoint.objects.get().completed_at)
+        with open(f"{path}.rejected.csv", newline="") as file:
+            report = list(csv.DictReader(file))
+        self.assertEqual([row["row"] for row in report], ["2", "4"])
+        self.assertIn("someday", report[0]["error"])
+        self.assertEqual(json.loads(report[1]["record"])["external_id"], "too-long")
+
+    def test_unreadable_ndjson_lines_are_rejected_with_their_line_number(self):
+        row = {"title": "Task", "due_date": "2030-01-01", "estimated_hours": 1, "created_by": "importer"}
+        path = os.path.join(self.directory, "tasks.ndjson")
+        with open(path, "w") as file:
+            file.write("\n".join([
+                json.dumps({**row, "external_id": "first"}),
+                "",
+                '{"external_id": "broken",',
+                json.dumps(["not", "an", "object"]),
+                json.dumps({**row, "external_id": "last"}),
+            ]) + "\n")
+        call_command("import_tasks", "tasks", path, chunk_size=2, stdout=open(os.devnull, "w"))
+
+        self.assertEqual(sorted(Task.objects.values_list("external_id", flat=True)), ["first", "last"])
+        with open(f"{path}.rejected.csv", newline="") as file:
+            report = list(csv.DictReader(file))
+        self.assertEqual([(row["row"], row["record"]) for row in report], [
+            ("3", '{"external_id": "broken",'), ("4", '["not", "an", "object"]'),
+        ])
+        self.assertIn("Invalid JSON", report[0]["error"])
+        self.assertIn("got list", report[1]["error"])
+
+    def test_skipped_rows_leave_the_existing_task_alone(self):
+        parent, other = (make_task(self.user, external_id=external_id) for external_id in ("parent", "other"))
+        task = make_task(self.user, external_id="task", parent_task=parent)
+        self.import_csv([
+            ["task", "No estimate", "2030-01-01", "", "importer", "other", "new"],
+            ["task", "Unknown creator", "2030-01-01", "1", "nobody", "other", "new"],
+            ["task", "", "2030-01-01", "1", "importer", "other", "new"],
+        ], chunk_size=10)
+
+        task.refresh_from_db()
+        self.assertEqual(task.parent_task_id, parent.pk)
+        self.assertFalse(Tag.objects.exists())
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("reader", password="secret")
+        self.task = make_task(user)
+        self.comments = [Comment.objects.create(task=self.task, author=user, description=f"Comment {n}") for n in range(2)]
+        self.url = f"/api/tasks/{self.task.pk}/comments/"
+        self.headers = {"authorization": f"Bearer {issue_tokens(user)['access']}"}
+
+    def get(self, **headers):
+        return self.client.get(self.url, headers={**self.headers, **headers})
+
+    def test_deleting_a_comment_changes_the_etag(self):
+        response = self.get()
+        self.assertNotIn("Last-Modified", response)
+        etag = response["ETag"]
+        self.assertEqual(self.get(if_none_match=etag).status_code, 304)
+
+        # same second, and the latest comment is still the same
+        self.comments[0].delete()
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(self.get(if_none_match=response["ETag"]).status_code, 304)
+
+    def test_if_modified_since_alone_is_not_answered_with_a_304(self):
+        self.assertEqual(self.get(if_modified_since="Fri, 01 Jan 2100 00:00:00 GMT").status_code, 200)
+
+
+class BulkUpdateTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("bulk", password="secret")
+        self.tasks = [make_task(user, title=f"Task {n}") for n in range(2)]
+        self.headers = {"authorization": f"Bearer {issue_tokens(user)['access']}"}
+
+    def patch(self, items):
+        return self.client.patch("/api/tasks/bulk/", items, content_type="application/json", headers=self.headers)
+
+    def test_items_need_a_unique_id(self):
+        first, second = self.tasks
+        response = self.patch([
+            {"title": "No id"},
+            {"id": first.pk, "title": "Once"},
+            {"id": second.pk, "title": "Twice"},
+            {"id": second.pk, "status": "done"},
+            {"id": 0, "title": "Unknown"},
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.json(), {"updated": [first.pk], "errors": [
+            {"index": 0, "errors": {"id": ["This field is required."]}},
+            {"index": 2, "errors": {"id": ["Duplicate id in this batch."]}},
+            {"index": 3, "errors": {"id": ["Duplicate id in this batch."]}},
+            {"index": 4, "errors": {"id": ["Task not found."]}},
+        ]})
+        second.refresh_from_db()
+        self.assertEqual((second.title, second.status), ("Task 1", "todo"))
+
+    def test_archive_ids_must_be_integers(self):
+        first = self.tasks[0]
+        response = self.client.post("/api/tasks/bulk/archive/", {"ids": [first.pk, True]},
+                                    content_type="application/json", headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"detail": "Task ids must be integers."})
+        first.refresh_from_db()
+        self.assertFalse(first.is_archived)
+
+
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("searcher", password="secret")
+        # the best match is the oldest task
+        for title in ["Deploy deploy deploy", "Deploy the API", "Deployment checklist", "Login error on mobile",
+                      "Login error on web", "Signup form"]:
+            make_task(user, title=title)
+        self.headers = {"authorization": f"Bearer {issue_tokens(user)['access']}"}
+
+    def titles(self, query):
+        return sorted(Task.objects.search(query).values_list("title", flat=True))
+
+    def test_prefix_keeps_the_websearch_operators(self):
+        self.assertEqual(self.titles("deplo*"), ["Deploy deploy deploy", "Deploy the API", "Deployment checklist"])
+        self.assertEqual(self.titles('"error on mobile" or sign*'), ["Login error on mobile", "Signup form"])
+        self.assertEqual(self.titles("-deploy check*"), [])
+        self.assertEqual(self.titles("login -mobile err*"), ["Login error on web"])
+        self.assertEqual(self.titles("*"), [])
+
+    def test_cursor_pages_follow_the_rank(self):
+        expected = list(Task.objects.search("deploy or login").values_list("title", flat=True))
+        titles, url = [], "/api/tasks/?search=deploy or login&pagination=cursor&page_size=2"
+        while url:
+            page = self.client.get(url, headers=self.headers).json()
+            titles += [task["title"] for task in page["results"]]
+            url = page["next"]
+        self.assertEqual(titles, expected)
+        self.assertEqual(titles[0], "Deploy deploy deploy")
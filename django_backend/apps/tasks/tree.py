@@ -0,0 +1,87 @@
+from decimal import Decimal
+from django.db import connection
+
+# The whole subtree in one round trip. `path` holds the ids from the root, so a
+# parent_task cycle stops the recursion instead of looping.
+SUBTREE_SQL = """
+WITH RECURSIVE tree AS (
+    SELECT id, parent_task_id, 0 AS depth, ARRAY[id] AS path
+    FROM tasks_task
+    WHERE id = %(root)s AND (%(include_archived)s OR NOT is_archived)
+    UNION ALL
+    SELECT task.id, task.parent_task_id, tree.depth + 1, tree.path || task.id
+    FROM tasks_task task
+    JOIN tree ON task.parent_task_id = tree.id
+    WHERE task.id <> ALL(tree.path)
+      AND (%(include_archived)s OR NOT task.is_archived)
+      AND (%(max_depth)s IS NULL OR tree.depth < %(max_depth)s)
+)
+SELECT task.id, tree.parent_task_id, tree.depth, task.title, task.status, task.priority,
+       task.estimated_hours, task.actual_hours
+FROM tree JOIN tasks_task task ON task.id = tree.id
+ORDER BY tree.depth, task.id
+"""
+
+NODE_FIELDS = ["id", "parent_task", "depth", "title", "status", "priority", "estimated_hours", "actual_hours"]
+
+
+def hours(value):
+    return f"{value:.2f}"
+
+
+def task_tree(root_id, include_archived=False, max_depth=None):
+    """
+    Load the subtree of `root_id` and roll its hours up.
+
+    Every node carries its own fields, its `children` and a `rollup` over
+    itself and all its descendants: estimated and actual hours, task count,
+    done count and `completion`, the share (%) of the estimated hours that is
+    done (of the tasks when no hours are estimated).
+
+    Returns the root node, or None when the task doesn't exist (or is archived
+    and `include_archived` is False).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(SUBTREE_SQL, {"root": root_id, "include_archived": include_archived, "max_depth": max_depth})
+        rows = cursor.fetchall()
+    if not rows:
+        return None
+
+    nodes = {}
+    for row in rows:
+        node = dict(zip(NODE_FIELDS, row))
+        done = node["status"] == "done"
+        estimated = node["estimated_hours"] or Decimal(0)
+        node["rollup"] = {
+            "estimated_hours": estimated,
+            "actual_hours": node["actual_hours"] or Decimal(0),
+            "done_hours": estimated if done else Decimal(0),
+            "tasks": 1,
+            "done": int(done),
+        }
+        node["children"] = []
+        nodes[node["id"]] = node
+
+    # rows are ordered by depth: going backwards, a node is complete before its parent
+    for node in reversed(nodes.values()):
+        if node["depth"]:
+            parent = nodes[node["parent_task"]]
+            for field, value in node["rollup"].items():
+                parent["rollup"][field] += value
+            parent["children"].append(node)
+
+    for node in nodes.values():
+        node["children"].reverse()
+        rollup = node["rollup"]
+        done_hours = rollup.pop("done_hours")
+        if rollup["estimated_hours"]:
+            completion = done_hours / rollup["estimated_hours"] * 100
+        else:
+            completion = Decimal(rollup["done"] * 100) / rollup["tasks"]
+        rollup["completion"] = round(float(completion), 1)
+        rollup["estimated_hours"] = hours(rollup["estimated_hours"])
+        rollup["actual_hours"] = hours(rollup["actual_hours"])
+        for field in ("estimated_hours", "actual_hours"):
+            if node[field] is not None:
+                node[field] = hours(node[field])
+    return nodes[rows[0][0]]
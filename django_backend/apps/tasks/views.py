@@ -1,50 +1,74 @@
+from django.conf import settings
+from django.db.models import prefetch_related_objects
+from django.http import Http404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-import requests
 from apps.tasks.models import Task
+from apps.tasks.services import filter_tasks, list_prefetches
+from apps.tasks.api.pagination import decode_cursor, encode_cursor, keyset_page
+from apps.tasks import cache as task_cache
+from apps.users.services import session_user
 
 class TaskListView(View):
     """
     View to display the list of tasks.
 
-    - If the user is authenticated in Django:
-        - Retrieves tasks using the ORM with `select_related` and `prefetch_related`.
-        - Renders 'tasks_list.html' with the retrieved tasks.
-
-    - If the user is not authenticated in Django but has a JWT in session:
-        - Makes a request to the internal task API using the access token.
-        - Renders 'tasks_list.html' with the tasks data from the API.
+    - The user is the Django session user or, failing that, the owner of the
+      JWT kept in the session (see apps/users/services.py).
+    - Tasks are queried in process with the same filters as the API
+      (`status`, `priority`, `include_archived`), `page_size` at a time with
+      keyset pagination (`?cursor=`, most recently updated first).
+    - Each row is a `{% cache %}` fragment keyed by the task's cache version,
+      which task writes replace: only the rows not cached are loaded, with
+      their assignees prefetched (same plan as the API), and rendered.
+    - Renders 'tasks_list.html' with the page and the links to the first and
+      next pages, which keep the filters.
 
     - If no valid user or token is present:
         - Redirects to the login page.
     """
     template_name = "tasks_list.html"
+    page_size = 50
+    ordering = ('-updated_at', '-id')
 
     def get(self, request):
-        # using ORM
-        if request.user.is_authenticated:
-            tasks = Task.objects.select_related('created_by', 'parent_task').prefetch_related('assigned_to', 'tags').all()
-            return render(request, self.template_name, {"tasks": tasks})
-
-        # if useer is not authenticated in Django, use API with JWT
-        access = request.session.get("access_token")
-        if access:
-            api_url = f"{request.scheme}://{request.get_host()}/api/tasks/"
-            try:
-                resp = requests.get(api_url, headers={"Authorization": f"Bearer {access}"}, timeout=5)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    tasks_json = data.get("results", data) 
-                    return render(request, self.template_name, {"tasks_json": tasks_json})
-                else:
-                    request.session.pop("access_token", None)
-                    return redirect("login")
-            except requests.RequestException:
-                return render(request, self.template_name, {"error": "Could not fetch tasks from API."})
-
-        return redirect("login")
+        if session_user(request) is None:
+            return redirect("login")
+        queryset = filter_tasks(request.GET).only('id', 'updated_at')
+        try:
+            position = decode_cursor(request.GET.get("cursor"), queryset, self.ordering)
+        except ValueError:
+            raise Http404("Invalid cursor")
+        # the page's ids, then their versions, then the rows: read before the
+        # versions, a row changed in between would be cached under its new version
+        page, next_position = keyset_page(queryset, self.ordering, position, self.page_size)
+        versions = task_cache.task_versions([task.pk for task in page])
+        cached = task_cache.cached_rows(versions)
+        rows = Task.objects.select_related('created_by').in_bulk([pk for pk in versions if pk not in cached])
+        prefetch_related_objects(list(rows.values()), *list_prefetches({"assigned_to"}))
+
+        # cached rows only need their id and version; tasks deleted meanwhile are left out
+        tasks = [rows.get(task.pk, task) for task in page if task.pk in rows or task.pk in cached]
+        for task in tasks:
+            task.cache_version = versions[task.pk]
+
+        params = request.GET.copy()
+        params.pop("cursor", None)
+        first_url = None
+        if position is not None:
+            first_url = f"?{params.urlencode()}" if params else request.path
+        next_url = None
+        if next_position is not None:
+            params["cursor"] = encode_cursor(next_position)
+            next_url = f"?{params.urlencode()}"
+        return render(request, self.template_name, {
+            "tasks": tasks,
+            "first_url": first_url,
+            "next_url": next_url,
+            "fragment_timeout": settings.TASK_CACHE_TIMEOUT,
+        })
     
 class NewTaskView(LoginRequiredMixin, View):
     """
@@ -91,11 +115,15 @@ class TaskDetailView(LoginRequiredMixin, View):
     View to display the details of a single task.
 
     GET:
-        - Fetches the task by ID using `get_object_or_404`.
+        - Fetches the task by ID using `get_object_or_404`, with its creator,
+          assignees, tags and comments loaded up front (same plan as the API).
         - Renders 'task_detail.html' template with the task data.
     """
     template_name = "task_detail.html"
 
     def get(self, request, task_id):
-        task = get_object_or_404(Task, id=task_id)
+        tasks = Task.objects.select_related('created_by').prefetch_related(
+            *list_prefetches({"assigned_to", "tags", "comments"})
+        )
+        task = get_object_or_404(tasks, id=task_id)
         return render(request, self.template_name, {"task": task})
\ No newline at end of file
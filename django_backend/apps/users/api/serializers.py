@@ -1,11 +1,13 @@
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from apps.common.metrics import TimedSerializerMixin
+from apps.users.models import NOTIFICATION_EVENT_CHOICES
 
 # Gets the user by default set on settings.py
 User = get_user_model()
 
-class   UserSerializer(serializers.ModelSerializer):
+class   UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for User model.
 
@@ -23,6 +25,24 @@ class   UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'team']
 
 
+class NotificationPreferencesSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Serializer for a user's notification preferences.
+
+    Fields:
+        notification_opt_outs (list[str]): Task event types left out of the user's
+            notification digests ('created', 'updated', 'deleted', 'assigned', 'unassigned', 'overdue').
+    """
+    notification_opt_outs = serializers.ListField(
+        child=serializers.ChoiceField(choices=NOTIFICATION_EVENT_CHOICES),
+        allow_empty=True,
+    )
+
+    class Meta:
+        model = User
+        fields = ['notification_opt_outs']
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     """
     Serializer for registering new users.
@@ -1,12 +1,14 @@
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import logout
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, permission_classes
 from rest_framework.response import Response
-from .serializers import RegisterSerializer, UserSerializer
+from .serializers import RegisterSerializer, UserSerializer, NotificationPreferencesSerializer
 from .pagination import UsersPagination
+from apps.users.authentication import VersionedTokenRefreshSerializer
+from apps.users.services import login_tokens
 
 User = get_user_model()
 
@@ -33,6 +35,7 @@ class AuthViewSet(viewsets.ViewSet):
         Returns:
             - 200 with new access token if refresh is valid
             - 400 if refresh token is missing or invalid
+            - 401 if the token was revoked or the user is inactive
     """
     permission_classes = []
 
@@ -48,13 +51,9 @@ class AuthViewSet(viewsets.ViewSet):
     def login(self, request):
         username = request.data.get("username")
         password = request.data.get("password")
-        user = authenticate(request, username=username, password=password)
-        if user:
-            refresh = RefreshToken.for_user(user)
-            return Response({
-                "access": str(refresh.access_token),
-                "refresh": str(refresh),
-            })
+        tokens = login_tokens(request, username, password)
+        if tokens:
+            return Response(tokens)
         return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
 
     @action(detail=False, methods=["post"])
@@ -67,12 +66,13 @@ class AuthViewSet(viewsets.ViewSet):
         refresh_token = request.data.get("refresh")
         if not refresh_token:
             return Response({"error": "Refresh token required"}, status=status.HTTP_400_BAD_REQUEST)
+        # a revoked token or an inactive user is refused with a 401
+        serializer = VersionedTokenRefreshSerializer(data={"refresh": refresh_token})
         try:
-            refresh = RefreshToken(refresh_token)
-            access_token = refresh.access_token
-            return Response({"access": str(access_token)})
-        except Exception as e:
+            serializer.is_valid(raise_exception=True)
+        except TokenError:
             return Response({"error": "Invalid refresh token"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.validated_data)
     
 class UserViewSet(viewsets.ViewSet):
     """
@@ -88,9 +88,13 @@ class UserViewSet(viewsets.ViewSet):
     - update: Updating a user
         Expects: full user data (not partial).  
         Returns: updated user data or validation errors.
+        The user's cached authentication entry is dropped on save (apps/users/signals.py).
     - me: Retrieving the currently authenticated user
         Retrieve details of the currently authenticated user.
         Returns: user data with team info.
+    - notifications: Reading or updating the current user's notification opt-outs
+        Expects (PUT): notification_opt_outs, a list of task event types.
+        Returns: the notification preferences or validation errors.
     """
 
     permission_classes = [IsAuthenticated]
@@ -126,4 +130,15 @@ class UserViewSet(viewsets.ViewSet):
     def me(self, request):
         user = User.objects.select_related('team').get(pk=request.user.pk)
         serializer = UserSerializer(user)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get", "put"], url_path="me/notifications")
+    def notifications(self, request):
+        if request.method == "PUT":
+            serializer = NotificationPreferencesSerializer(request.user, data=request.data)
+            if serializer.is_valid():
+                serializer.save()
+                return Response(serializer.data)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer = NotificationPreferencesSerializer(request.user)
         return Response(serializer.data)
\ No newline at end of file
@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# claim carrying User.token_version: bumping the version revokes every token
+# issued before (tokens without the claim are version 0)
+TOKEN_VERSION_CLAIM = "token_version"
+
+# the user access tokens resolve to, cached for AUTH_USER_CACHE_TIMEOUT
+USER_CACHE_KEY = "users:auth:fields:{user_id}"
+# the fields of it that are cached: what authentication, permissions and the
+# views read; never the password hash or the contact details
+AUTH_USER_FIELDS = ("id", "username", "is_active", "is_staff", "team_id", "token_version")
+
+
+class VersionedRefreshToken(RefreshToken):
+    """Refresh token (and the access tokens derived from it) carrying the user's token version."""
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair of /auth/token/ (SIMPLE_JWT["TOKEN_OBTAIN_SERIALIZER"])."""
+    token_class = VersionedRefreshToken
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh of /auth/token/refresh/ (SIMPLE_JWT["TOKEN_REFRESH_SERIALIZER"])
+    and /api/auth/refresh/.
+
+    A refresh token only mints access tokens while its user exists, is active
+    and still has the token's version: a revoked refresh token would otherwise
+    hand out access tokens for its whole lifetime.
+    """
+    token_class = VersionedRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], code="no_active_account")
+        check_token_version(user, refresh)
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # rotation and blacklisting are left to simplejwt (the user is loaded again)
+            return super().validate(attrs)
+        return {"access": str(refresh.access_token)}
+
+
+def check_token_version(user, token):
+    """Raise AuthenticationFailed when `token` was issued before the user's current token version."""
+    if user.token_version != token.get(TOKEN_VERSION_CLAIM, 0):
+        raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+
+
+def invalidate_user(user):
+    """Drop the cached authentication user of `user` once the current transaction commits."""
+    key = USER_CACHE_KEY.format(user_id=user.pk)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def cached_user(values):
+    """User rebuilt from its cached AUTH_USER_FIELDS, the other fields deferred."""
+    # from_db takes the loaded values in the model's field order
+    names = [field.attname for field in get_user_model()._meta.concrete_fields if field.attname in values]
+    return get_user_model().from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication resolving the user from the cache instead of a
+    SELECT on users_user for every request.
+
+    The AUTH_USER_FIELDS of users are cached for AUTH_USER_CACHE_TIMEOUT
+    seconds under their id, and dropped whenever they are saved (see
+    apps/users/signals.py). A cached user comes back as a User with the other
+    fields deferred: reading one loads it, and a save only writes the fields
+    loaded. A token whose version differs from the user's is rejected, cached or not: bumping
+    User.token_version revokes the tokens issued before.
+
+    With JWT_STATELESS_READS, safe requests to views setting
+    `stateless_authentication = True` skip the user lookup altogether: the
+    user is a TokenUser built from the token claims. A deactivated user or a
+    revoked token is then only noticed when the access token expires.
+    """
+    def authenticate(self, request):
+        self.stateless = (
+            settings.JWT_STATELESS_READS
+            and request.method in SAFE_METHODS
+            and getattr(request.parser_context.get("view"), "stateless_authentication", False)
+        )
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if getattr(self, "stateless", False):
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken("Token contained no recognizable user identification")
+            return TokenUser(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        values = cache.get(key)
+        if values is None:
+            user = super().get_user(validated_token)
+            values = {name: getattr(user, name) for name in AUTH_USER_FIELDS}
+            cache.set(key, values, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        else:
+            user = cached_user(values)
+        check_token_version(user, validated_token)
+        return user
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='notification_opt_outs',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
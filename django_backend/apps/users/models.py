@@ -2,6 +2,16 @@ from apps.common.models import Team
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+# task events a user can be notified about, see apps/tasks/notifications.py
+NOTIFICATION_EVENT_CHOICES = [
+    ("created", "Task created"),
+    ("updated", "Task updated"),
+    ("deleted", "Task deleted"),
+    ("assigned", "Assigned to a task"),
+    ("unassigned", "Removed from a task"),
+    ("overdue", "Task overdue"),
+]
+
 class User(AbstractUser):
     """
     Custom User model extending AbstractUser.
@@ -10,8 +20,13 @@ class User(AbstractUser):
         role (str): The role of the user in the system, e.g., 'member', 'admin'.
         team (Team, optional) : Reference to the team the user belong to.
             Can be null or blank. Deleting a team sets this field to null.
+        notification_opt_outs (list[str]): Task event types (NOTIFICATION_EVENT_CHOICES)
+            the user does not want in their notification digests.
+        token_version (int): Version carried by the user's JWTs; tokens of an older
+            version are rejected (see apps/users/authentication.py).
     Methods:
         __str__(): Returns the username as string representation. 
+        save(): A password change also revokes the tokens issued before it.
     """
     role = models.CharField(max_length=50, default="member")
     team = models.ForeignKey(
@@ -21,6 +36,17 @@ class User(AbstractUser):
         blank=True,
         related_name="members"                  
     )
+    notification_opt_outs = models.JSONField(default=list, blank=True)
+    token_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.username
+
+    def save(self, *args, **kwargs):
+        # _password is only set by set_password(), not by the hash upgrade of check_password()
+        if self._password is not None and self.pk is not None:
+            self.token_version += 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "token_version"}
+        super().save(*args, **kwargs)
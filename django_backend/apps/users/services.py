@@ -0,0 +1,47 @@
+from django.contrib.auth import authenticate
+from rest_framework.exceptions import AuthenticationFailed
+from .authentication import CachedJWTAuthentication, VersionedRefreshToken
+
+# session key the template views keep the access token under
+SESSION_TOKEN_KEY = "access_token"
+
+
+def issue_tokens(user):
+    """A new JWT pair for `user`: {"access", "refresh"}."""
+    refresh = VersionedRefreshToken.for_user(user)
+    return {"access": str(refresh.access_token), "refresh": str(refresh)}
+
+
+def login_tokens(request, username, password):
+    """Check the credentials and issue a JWT pair; None when they are invalid."""
+    user = authenticate(request, username=username, password=password)
+    if user is None:
+        return None
+    return issue_tokens(user)
+
+
+def token_user(raw_token):
+    """The active user an access token was issued to; None when the token is invalid or expired."""
+    authentication = CachedJWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except AuthenticationFailed:
+        return None
+
+
+def session_user(request):
+    """
+    User of a template view request: the Django session user or, failing
+    that, the owner of the access token kept in the session.
+
+    An invalid token is dropped from the session. Returns None when neither is valid.
+    """
+    if request.user.is_authenticated:
+        return request.user
+    raw_token = request.session.get(SESSION_TOKEN_KEY)
+    if not raw_token:
+        return None
+    user = token_user(raw_token)
+    if user is None:
+        request.session.pop(SESSION_TOKEN_KEY, None)
+    return user
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .authentication import invalidate_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Any change of a user (update, deactivation, password or team change...)
+    replaces their cached authentication user.
+    """
+    invalidate_user(instance)
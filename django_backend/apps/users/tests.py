@@ -1,3 +1,87 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from apps.users.authentication import USER_CACHE_KEY
+from apps.users.models import User
+from apps.users.services import issue_tokens
 
-# Create your tests here.
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+REFRESH_URLS = ["/auth/token/refresh/", "/api/auth/refresh/"]
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="old-secret")
+        self.tokens = issue_tokens(self.user)
+
+    def get_me(self, access):
+        return self.client.get("/api/users/me/", headers={"authorization": f"Bearer {access}"})
+
+    def refresh(self, url, refresh):
+        return self.client.post(url, {"refresh": refresh}, content_type="application/json")
+
+    def change(self, **fields):
+        # the cached user is dropped on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, value in fields.items():
+                if name == "password":
+                    self.user.set_password(value)
+                else:
+                    setattr(self.user, name, value)
+            self.user.save()
+
+    def test_cached_user_is_served_without_a_query(self):
+        self.assertEqual(self.get_me(self.tokens["access"]).status_code, 200)
+        with self.assertNumQueries(1):
+            # /me/ itself loads the user with its team
+            self.assertEqual(self.get_me(self.tokens["access"]).status_code, 200)
+
+    def test_cache_holds_no_password_hash(self):
+        self.assertEqual(self.get_me(self.tokens["access"]).status_code, 200)
+        cached = cache.get(USER_CACHE_KEY.format(user_id=self.user.pk))
+        self.assertEqual(set(cached), {"id", "username", "is_active", "is_staff", "team_id", "token_version"})
+        self.assertEqual(cached["username"], self.user.username)
+
+    def test_saving_a_cached_user_keeps_the_other_fields(self):
+        headers = {"authorization": f"Bearer {self.tokens['access']}"}
+        self.assertEqual(self.get_me(self.tokens["access"]).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put("/api/users/me/notifications/", {"notification_opt_outs": ["updated"]},
+                                       content_type="application/json", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.notification_opt_outs, ["updated"])
+        self.assertTrue(self.user.check_password("old-secret"))
+        response = self.client.get("/api/users/me/notifications/", headers=headers)
+        self.assertEqual(response.json(), {"notification_opt_outs": ["updated"]})
+
+    def test_password_change_revokes_access_tokens(self):
+        self.assertEqual(self.get_me(self.tokens["access"]).status_code, 200)
+        self.change(password="new-secret")
+        self.assertEqual(self.get_me(self.tokens["access"]).status_code, 401)
+        self.assertEqual(self.get_me(issue_tokens(self.user)["access"]).status_code, 200)
+
+    def test_deactivation_revokes_access_tokens(self):
+        self.assertEqual(self.get_me(self.tokens["access"]).status_code, 200)
+        self.change(is_active=False)
+        self.assertEqual(self.get_me(self.tokens["access"]).status_code, 401)
+
+    def test_refresh_issues_an_access_token(self):
+        for url in REFRESH_URLS:
+            response = self.refresh(url, self.tokens["refresh"])
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(self.get_me(response.json()["access"]).status_code, 200, url)
+
+    def test_refresh_token_is_revoked_by_a_password_change(self):
+        self.change(password="new-secret")
+        for url in REFRESH_URLS:
+            self.assertEqual(self.refresh(url, self.tokens["refresh"]).status_code, 401, url)
+
+    def test_refresh_token_of_an_inactive_user_is_refused(self):
+        self.change(is_active=False)
+        for url in REFRESH_URLS:
+            self.assertEqual(self.refresh(url, self.tokens["refresh"]).status_code, 401, url)
+
+    def test_invalid_refresh_token(self):
+        self.assertEqual(self.refresh("/api/auth/refresh/", "garbage").status_code, 400)
+        self.assertEqual(self.refresh("/auth/token/refresh/", "garbage").status_code, 401)
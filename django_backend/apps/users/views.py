@@ -1,7 +1,7 @@
 from django.shortcuts import render, redirect
 from django.views import View
-from django.contrib.auth import login, authenticate, logout
-import requests
+from django.contrib.auth import logout
+from apps.users.services import SESSION_TOKEN_KEY, login_tokens
 
 class UserLoginView(View):
     """
@@ -12,7 +12,7 @@ class UserLoginView(View):
 
     POST:
         - Retrieves the username and password from the submitted form.
-        - Sends a POST request to the API token endpoint to authenticate the user.
+        - Checks the credentials and issues the JWT pair in process (apps/users/services.py).
         - If authentication is successful:
             - Stores the access token in the session.
             - Redirects the user to the tasks page.
@@ -28,13 +28,9 @@ class UserLoginView(View):
         username = request.POST.get("username")
         password = request.POST.get("password")
 
-        api_url = "http://localhost:8000/api/auth/token/"
-        response = requests.post(api_url, data={"username": username, "password": password})
-
-        if response.status_code == 200:
-            tokens = response.json()
-            access_token = tokens["access"]
-            request.session["access_token"] = access_token 
+        tokens = login_tokens(request, username, password)
+        if tokens:
+            request.session[SESSION_TOKEN_KEY] = tokens["access"]
             return redirect("/tasks/")
 
         return render(request, self.template_name, {"error": "Credenciales inválidas"})
@@ -37,4 +37,12 @@ app.conf.beat_schedule = {
         'task': 'apps.tasks.tasks.check_overdue_tasks',
         'schedule': crontab(minute=0),
     },
+    'notification_digests': {
+        'task': 'apps.tasks.tasks.flush_notification_digests',
+        'schedule': crontab(),
+    },
+    'nightly_task_stats_reconcile': {
+        'task': 'apps.tasks.tasks.reconcile_task_stats',
+        'schedule': crontab(hour=3, minute=30),
+    },
 }
\ No newline at end of file
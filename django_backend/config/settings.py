@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'django_filters',
     'drf_yasg',
@@ -51,7 +52,7 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         # 'rest_framework.authentication.SessionAuthentication',
         # 'rest_framework.authentication.BasicAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -66,7 +67,15 @@ REST_FRAMEWORK = {
     ],
 }
 
+SIMPLE_JWT = {
+    # tokens carry the user's token version (see apps/users/authentication.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.users.authentication.VersionedTokenObtainPairSerializer',
+    # refreshing checks the version too, and that the user is still active
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.authentication.VersionedTokenRefreshSerializer',
+}
+
 MIDDLEWARE = [
+    'apps.common.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -125,9 +134,42 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'postgres'),
         'HOST': os.getenv('POSTGRES_HOST', 'db_task'),
         'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        # check a connection is alive before handing it out again
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
     }
 }
 
+# Connection reuse. With DB_POOL, each process (server process, Celery pool
+# process) keeps a psycopg pool of DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE
+# connections: a request waits up to DB_POOL_TIMEOUT seconds for a free one,
+# connections idle for DB_POOL_MAX_IDLE seconds are closed down to the minimum
+# and every connection is replaced after DB_POOL_MAX_LIFETIME seconds.
+# Without it, a thread keeps its connection DB_CONN_MAX_AGE seconds (0: a new
+# connection per request). Under ASGI every request runs in a new thread, so
+# only the pool avoids a connection per request there.
+DB_POOL = os.getenv('DB_POOL', 'True') == 'True'
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+            'max_idle': int(os.getenv('DB_POOL_MAX_IDLE', '300')),
+            'max_lifetime': int(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '0'))
+
+# Full-text search language used to build and query Task.search_vector
+# (any PostgreSQL text search configuration: 'english', 'spanish', 'simple'...).
+# Changing it requires re-running the trigger migration so stored vectors match.
+TASK_SEARCH_CONFIG = os.getenv('TASK_SEARCH_CONFIG', 'english')
+
+# With ?count=estimated, task lists whose planner estimate reaches this many rows
+# report the estimate instead of running an exact COUNT(*).
+TASKS_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('TASKS_ESTIMATED_COUNT_THRESHOLD', '10000'))
+
 # *************************************************************************************
 
 
@@ -193,6 +235,69 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
 
+# Redis used for application data (notification buffers...), separate db from the broker
+REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379/1')
+
+# Redis db the benchmark command uses instead (it is flushed on every run)
+BENCHMARK_REDIS_URL = os.getenv('BENCHMARK_REDIS_URL', 'redis://redis:6379/15')
+
+# Task notifications are buffered per recipient for this many seconds and then
+# sent as a single digest email (see apps/tasks/notifications.py)
+NOTIFICATION_DIGEST_WINDOW = int(os.getenv('NOTIFICATION_DIGEST_WINDOW', '300'))
+
+# Each overdue check re-scans the tasks due or edited this many seconds before the
+# previous run started: longer than any task write transaction plus clock skew
+OVERDUE_WATERMARK_OVERLAP = int(os.getenv('OVERDUE_WATERMARK_OVERLAP', '300'))
+
+# Cache (task API responses), see apps/tasks/cache.py
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL', 'redis://redis:6379/2'),
+    }
+}
+
+# Upper bound on how long a cached task response lives; writes invalidate it earlier
+TASK_CACHE_TIMEOUT = int(os.getenv('TASK_CACHE_TIMEOUT', '300'))
+
+# Largest batch accepted by the /api/tasks/bulk/ endpoints
+TASKS_BULK_MAX_ITEMS = int(os.getenv('TASKS_BULK_MAX_ITEMS', '1000'))
+
+# Rows fetched per round trip by the /api/tasks/export/ server-side cursor
+TASKS_EXPORT_CHUNK_SIZE = int(os.getenv('TASKS_EXPORT_CHUNK_SIZE', '2000'))
+
+# Users per send_daily_summary_batch job (also the streaming fetch size)
+DAILY_SUMMARY_BATCH_SIZE = int(os.getenv('DAILY_SUMMARY_BATCH_SIZE', '500'))
+
+# Requests slower than this are logged with their slowest queries (apps/common/middleware.py)
+SLOW_REQUEST_THRESHOLD_MS = int(os.getenv('SLOW_REQUEST_THRESHOLD_MS', '500'))
+SLOW_REQUEST_TOP_QUERIES = int(os.getenv('SLOW_REQUEST_TOP_QUERIES', '5'))
+
+# Send the Server-Timing header (query count and timings) outside DEBUG too
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+
+# Bearer token Prometheus sends to scrape /metrics; empty: staff users only
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Seconds the user an access token resolves to stays cached (invalidated on every user save)
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60'))
+
+# Safe requests to the views that allow it (TaskViewSet) authenticate from the
+# token claims alone, without loading the user: a deactivated user keeps read
+# access until their access token expires
+JWT_STATELESS_READS = os.getenv('JWT_STATELESS_READS', 'False') == 'True'
+
+# Task events stream (/api/events/, see apps/tasks/events.py): seconds between
+# keepalive comments, events queued per slow client before it is told to
+# resync, channels per stream and EventSource reconnection delay
+TASK_EVENTS_KEEPALIVE = int(os.getenv('TASK_EVENTS_KEEPALIVE', '15'))
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv('TASK_EVENTS_QUEUE_SIZE', '100'))
+TASK_EVENTS_MAX_CHANNELS = int(os.getenv('TASK_EVENTS_MAX_CHANNELS', '50'))
+TASK_EVENTS_RETRY_MS = int(os.getenv('TASK_EVENTS_RETRY_MS', '3000'))
+
+# Port the Celery worker serves its Prometheus metrics on (0 disables it), see apps/common/signals.py
+CELERY_METRICS_PORT = int(os.getenv('CELERY_METRICS_PORT', '9808'))
+
 # Loggin configuration
 
 LOGGING = {
@@ -225,6 +330,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'apps': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -21,7 +21,10 @@ from apps.users.api.router import router_auth, router_users
 from apps.tasks.api.router import router_tasks
 from apps.users.views import UserLoginView, UserLogoutView
 from apps.tasks.views import TaskListView, NewTaskView, TaskDetailView
+from apps.common.views import metrics_view
+from apps.tasks.api.stream import task_events_view
 from django.urls import re_path
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
@@ -44,6 +47,7 @@ urlpatterns = [
     path('api/', include(router_auth.urls)),
     path('api/', include(router_users.urls)),
     path('api/', include(router_tasks.urls)),
+    path('api/events/', task_events_view, name='task_events'),
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('login/', UserLoginView.as_view(), name="login"),
@@ -53,5 +57,9 @@ urlpatterns = [
     path('tasks/<int:task_id>/', TaskDetailView.as_view(), name='task_detail'),
     path('swagger.<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('metrics', metrics_view, name='metrics'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
+
+# runserver used to serve the static files in DEBUG, uvicorn doesn't
+urlpatterns += staticfiles_urlpatterns()